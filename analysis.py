@@ -4,9 +4,593 @@ import pandas as pd
 from os import listdir
 import os
 import glob
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set()
+import fnmatch
+import json
+import hashlib
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from writer import get_writer, write_result
+from profiling import profiled
+
+class lazy_import:
+    """
+    lazy_import stands in for a module which is only imported on first attribute access, so importing the numeric core
+    (ETL, gibbs_fe, stats) does not load plotting or ML packages. setup(module) runs once after the import.
+
+    useage: plt = lazy_import('matplotlib.pyplot')
+    """
+    def __init__(self, name:str, setup=None):
+        self._name = name
+        self._setup = setup
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._setup is not None:
+                self._setup(module)
+            self._module = module
+        return getattr(self._module, attr)
+
+def _seaborn_style(module):
+    # seaborn plot style for all figures, as applied by sns.set() at import before
+    importlib.import_module('seaborn').set()
+
+plt = lazy_import('matplotlib.pyplot', setup=_seaborn_style)
+sns = lazy_import('seaborn', setup=lambda module: module.set())
+
+# columns required from the experimental data files (xlsx)
+SELECTED_COLUMNS = ['Time (Min)', 'Tc - AVG (oC)', 'Te - AVG (oC)', 'Pressure (mm of Hg)', 'Te - Tc (oC)', 'Q (W)','Resistance (oC/W)']
+# column titles used by other logger exports (eg. data/di_heat_inputs_6ofr)
+COLUMN_ALIASES = {'Time (min)': 'Time (Min)', 't(min)': 'Time (Min)', 'Te[C]': 'Te - AVG (oC)', 'Tc[C]': 'Tc - AVG (oC)', 'P[mmHg]': 'Pressure (mm of Hg)', 'Q[W]': 'Q (W)'}
+
+def logger_files(datapath:str, pattern='*.xlsx', exclude=()):
+    """
+    logger_files lists the experimental data files in datapath (sorted), skipping office lock files (~$*.xlsx).
+    exclude: file name patterns to skip as well (case-insensitive, eg. ['sample*'] for template workbooks); skipped files are printed.
+
+    useage: files = logger_files("datapath", pattern='*.xlsx')
+            files = logger_files("datapath", exclude=['sample*', 'template*'])
+    """
+    files = sorted(f for f in glob.glob(datapath + pattern) if not os.path.basename(f).startswith('~$'))
+    skipped = [f for f in files if any(fnmatch.fnmatch(os.path.basename(f).lower(), name.lower()) for name in exclude)]
+    if skipped:
+        print(f"Skipped files matching {list(exclude)}: {[os.path.basename(f) for f in skipped]}")
+    return [f for f in files if f not in skipped]
+
+def _is_logger_column(column):
+    return column in SELECTED_COLUMNS or column in COLUMN_ALIASES
+
+@profiled
+def read_logger_file(filename:str, chunksize=50000):
+    """
+    read_logger_file loads only the selected columns from one experimental data file (xlsx or csv) and tags every row with its source file name.
+    Incomplete rows (eg. the 'Avg' summary row of the logger sheet) are removed, so all columns keep a numeric dtype.
+    The file is read with iter_logger_file, so data_etl and the streaming ETL (iter_etl) share one loader.
+
+    useage: df = read_logger_file("datapath/php_exp1.xlsx")
+    """
+    return pd.concat(iter_logger_file(filename, chunksize=chunksize), axis=0, ignore_index=True)
+
+def iter_logger_file(filename:str, chunksize=50000):
+    """
+    iter_logger_file streams the selected columns of one experimental data file (xlsx or csv) in chunks of chunksize rows,
+    so memory use does not depend on the length of the file. Rows are tagged with the source file name; incomplete rows are removed.
+
+    useage: for df_chunk in iter_logger_file("datapath/php_exp1.xlsx", chunksize=50000):
+                ...
+    """
+    source = os.path.basename(filename)
+    if filename.endswith('.csv'):
+        chunks = pd.read_csv(filename, usecols=_is_logger_column, chunksize=chunksize)
+    else:
+        chunks = _iter_xlsx_chunks(filename, chunksize)
+    for df in chunks:
+        yield select_logger_columns(df, source)
+
+def select_logger_columns(df:pd.DataFrame, source:str):
+    """
+    select_logger_columns keeps the selected columns of a raw chunk of logger data as numbers, removes incomplete rows
+    and tags the rows with the source file name.
+    Alternative column titles (COLUMN_ALIASES) are renamed, time of day values (hh:mm:ss) are converted to minutes,
+    and missing 'Te - Tc (oC)' / 'Resistance (oC/W)' columns are derived from Te, Tc and Q.
+
+    useage: df = select_logger_columns(df_raw, "php_exp1.csv")
+    """
+    df = df.rename(columns=COLUMN_ALIASES)
+    df = df.loc[:, ~df.columns.duplicated()]
+    time = df['Time (Min)']
+    if not pd.api.types.is_numeric_dtype(time):
+        minutes = pd.to_numeric(time, errors='coerce')
+        clock = minutes.isna() & time.notna()
+        if clock.any():
+            minutes[clock] = pd.to_timedelta(time[clock].astype(str), errors='coerce').dt.total_seconds() / 60
+        df = df.assign(**{'Time (Min)': minutes})
+    df = df.apply(pd.to_numeric, errors='coerce')
+    if 'Te - Tc (oC)' not in df.columns:
+        df['Te - Tc (oC)'] = df['Te - AVG (oC)'] - df['Tc - AVG (oC)']
+    if 'Resistance (oC/W)' not in df.columns:
+        df['Resistance (oC/W)'] = df['Te - Tc (oC)'] / df['Q (W)']
+    df = df[SELECTED_COLUMNS].dropna()
+    df['source'] = source
+    return df
+
+def _iter_xlsx_chunks(filename:str, chunksize:int):
+    from openpyxl import load_workbook
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows))
+        columns = [i for i, column in enumerate(header) if _is_logger_column(column)]
+        names = [header[i] for i in columns]
+        chunk = []
+        for row in rows:
+            chunk.append([row[i] if i < len(row) else None for i in columns])
+            if len(chunk) == chunksize:
+                yield pd.DataFrame(chunk, columns=names)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=names)
+    finally:
+        workbook.close()
+
+class ETLCache:
+    """
+    ETLCache is a per-file columnar cache of loaded experimental data files (xlsx).
+    Entries are content-addressed by (path, size, mtime) and stored as Feather (pyarrow) or pickle files,
+    so only new or modified workbooks have to be parsed again.
+
+    useage: cache = ETLCache("datapath/.etl_cache")
+            df = read_logger_files(files, cache=cache)
+    """
+    def __init__(self, cache_dir:str):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(self.cache_dir, 'manifest.json')
+        self.changed = False
+        self.ext = '.feather' if importlib.util.find_spec('pyarrow') else '.pkl'
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {}
+
+    def key(self, filename:str):
+        """ content address of a data file from its absolute path, size and modification time """
+        stat = os.stat(filename)
+        signature = f"{os.path.abspath(filename)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(signature.encode()).hexdigest()
+
+    def get(self, filename:str):
+        """ returns the cached frame of filename, or None if it is new or modified """
+        entry = self.manifest.get(os.path.abspath(filename))
+        if entry is None or entry != self.key(filename) + self.ext:
+            return None
+        entry_path = os.path.join(self.cache_dir, entry)
+        if not os.path.exists(entry_path):
+            return None
+        return pd.read_feather(entry_path) if self.ext == '.feather' else pd.read_pickle(entry_path)
+
+    def put(self, filename:str, df:pd.DataFrame):
+        """ stores the loaded frame of filename and drops its outdated entry """
+        entry = self.key(filename) + self.ext
+        self._remove(self.manifest.get(os.path.abspath(filename)))
+        entry_path = os.path.join(self.cache_dir, entry)
+        df = df.reset_index(drop=True)
+        df.to_feather(entry_path) if self.ext == '.feather' else df.to_pickle(entry_path)
+        self.manifest[os.path.abspath(filename)] = entry
+        self.changed = True
+
+    def prune(self, filenames:list):
+        """ removes entries of data files which are no longer present """
+        keep = {os.path.abspath(filename) for filename in filenames}
+        for path in [path for path in self.manifest if path not in keep]:
+            self._remove(self.manifest.pop(path))
+            self.changed = True
+
+    def save(self):
+        with open(self.manifest_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+
+    def _remove(self, entry):
+        if entry and os.path.exists(os.path.join(self.cache_dir, entry)):
+            os.remove(os.path.join(self.cache_dir, entry))
+
+@profiled
+def read_logger_files(filenames:list, n_workers=1, cache:ETLCache=None):
+    """
+    read_logger_files loads all experimental data files and combines them with a single concat.
+    With n_workers > 1 (or None for all cores) the files are parsed in a process pool.
+    With an ETLCache only new or modified files are parsed; the rest is loaded from the cache.
+
+    useage: df = read_logger_files(files, n_workers=4)
+            df = read_logger_files(files, cache=ETLCache("datapath/.etl_cache"))
+    """
+    df_frames = {}
+    if cache is not None:
+        cache.prune(filenames)
+        for filename in filenames:
+            df_cached = cache.get(filename)
+            if df_cached is not None:
+                df_frames[filename] = df_cached
+    missing = [filename for filename in filenames if filename not in df_frames]
+    if n_workers == 1 or len(missing) < 2:
+        df_loaded = [read_logger_file(filename) for filename in missing]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            df_loaded = list(pool.map(read_logger_file, missing))
+    for filename, df_file in zip(missing, df_loaded):
+        df_frames[filename] = df_file
+        if cache is not None:
+            cache.put(filename, df_file)
+    if cache is not None and cache.changed:
+        cache.save()
+    return pd.concat([df_frames[filename] for filename in filenames], axis=0, ignore_index=True).dropna()
+
+@profiled
+def binned_stats(data:pd.DataFrame, bin_width:float, key='Te[K]'):
+    """
+    binned_stats calculates mean, standard deviation and count of all numeric columns in bins of width bin_width of the key column.
+    Bins are reduced with np.bincount in one pass over the data (no sorting); the key column of the result holds the mean key value of each bin.
+    Bins with a single sample have no standard deviation and are left out of df_std (index aligned with df_mean).
+    Non-finite values are skipped per column (as groupby mean/std skip NaN); 'count' is the number of rows of each bin.
+
+    useage: df_mean, df_std = binned_stats(data, bin_width=0.5, key='Te[K]')
+    """
+    data = data.select_dtypes('number')
+    # rows without a key value belong to no bin (as in groupby)
+    data = data[data[key].notna()]
+    if len(data) == 0:
+        # eg. after data_chop or filtering: empty tables with the result columns
+        df_mean = pd.DataFrame(columns=list(data.columns) + ['count'], dtype=np.float64)
+        return df_mean, df_mean.copy()
+    values = data.to_numpy(dtype=np.float64)
+    n_rows, n_cols = values.shape
+    bins = np.floor(data[key].to_numpy() / bin_width).astype(np.int64)
+    bins -= bins.min()
+    n_bins = bins.max() + 1
+    # flat (bin, column) codes, so every property is reduced by a single bincount; non-finite values are skipped per column
+    codes = (bins[:, None] * n_cols + np.arange(n_cols)).ravel()
+    finite = np.isfinite(values)
+    values = np.where(finite, values, 0.0)
+    count = np.bincount(bins, minlength=n_bins)
+    n_valid = np.bincount(codes, weights=finite.ravel(), minlength=n_bins * n_cols).reshape(n_bins, n_cols)
+    sums = np.bincount(codes, weights=values.ravel(), minlength=n_bins * n_cols).reshape(n_bins, n_cols)
+    occupied = count > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / n_valid
+        deviation = np.where(finite, values - mean[bins], 0.0)
+        m2 = np.bincount(codes, weights=(deviation * deviation).ravel(), minlength=n_bins * n_cols).reshape(n_bins, n_cols)
+        std = np.sqrt(m2 / np.where(n_valid > 1, n_valid - 1, np.nan))
+    df_mean = pd.DataFrame(mean[occupied], columns=data.columns)
+    df_mean['count'] = count[occupied]
+    df_std = pd.DataFrame(std[occupied], columns=data.columns)
+    df_std[key] = df_mean[key]
+    df_std['count'] = df_mean['count']
+    df_std = df_std[df_std['count'] > 1]
+    return df_mean, df_std
+
+def _group_codes(data:pd.DataFrame, keys:list, bins:dict):
+    # integer codes (sorted levels) and level values of every key; keys in bins are binned by floor(value / width), NaN is its own level
+    codes, levels = [], []
+    for key in keys:
+        column = data[key]
+        if key in bins:
+            column = np.floor(column.to_numpy(dtype=np.float64) / bins[key]) * bins[key]
+        code, level = pd.factorize(column, sort=True, use_na_sentinel=False)
+        codes.append(code.astype(np.int64))
+        levels.append(np.asarray(level))
+    return codes, levels
+
+@profiled
+def grouped_stats(data:pd.DataFrame, keys:list, properties=None, bins={}, quantiles=(0.25, 0.5, 0.75)):
+    """
+    grouped_stats calculates count, mean, standard deviation and quantiles of every property for every combination of keys
+    (eg. Fluid x FR x Q[W] x Te bin) in one sort-based pass: the keys are encoded as integer codes and combined into one int64 group key,
+    the rows are sorted once by that key, and mean/std are reduced per group with np.add.reduceat. Quantiles (linear interpolation,
+    as np.quantile) are read from one integer sort per property by (group, value rank). NaN values are ignored per property.
+    bins: bin width per numeric key, eg. {'Te[K]': 5.0} (the key column then holds the lower bin edge).
+    properties: numeric columns to summarise (default: all numeric columns that are not keys).
+
+    Returns one row per key combination present: the keys, 'count' (rows) and per property '<property> mean', 'std', 'q25', ...
+
+    useage: df_groups = grouped_stats(df_combined, ['Fluid', 'FR', 'Te[K]'], bins={'Te[K]': 5.0})
+    """
+    if properties is None:
+        properties = [column for column in data.select_dtypes('number').columns if column not in keys]
+    codes, levels = _group_codes(data, keys, bins)
+    # mixed radix group key, re-encoded when it would outgrow int64
+    group = np.zeros(len(data), dtype=np.int64)
+    size = 1
+    for code, level in zip(codes, levels):
+        if size * max(len(level), 1) >= 2**62:
+            group, unique = pd.factorize(group, sort=True)
+            size = len(unique)
+        group = group * len(level) + code
+        size *= max(len(level), 1)
+    # dense group codes in key order; up to 2**16 groups the stable sort is a radix sort
+    group, unique = pd.factorize(group, sort=True)
+    order = np.argsort(group.astype(np.uint16) if len(unique) <= 2**16 else group, kind='stable')
+    group_sorted = group[order]
+    starts = np.flatnonzero(np.r_[True, group_sorted[1:] != group_sorted[:-1]]) if len(group) else np.empty(0, dtype=np.int64)
+    n_rows = np.diff(np.r_[starts, len(group)])
+    first = order[starts]
+    df_groups = pd.DataFrame({key: level[code[first]] for key, code, level in zip(keys, codes, levels)})
+    df_groups['count'] = n_rows
+    if not len(group):
+        return df_groups
+    values = data[properties].to_numpy(dtype=np.float64)[order]
+    finite = np.isfinite(values)
+    count = np.add.reduceat(finite, starts, axis=0, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.add.reduceat(np.where(finite, values, 0.0), starts, axis=0) / count
+        deviation = np.where(finite, values - np.repeat(mean, n_rows, axis=0), 0.0)
+        std = np.sqrt(np.add.reduceat(deviation * deviation, starts, axis=0) / np.where(count > 1, count - 1, np.nan))
+    # quantiles: sorted by (group, value rank) with NaN last, interpolated between neighbouring order statistics
+    n_values = len(values)
+    group_rank = group_sorted.astype(np.int64) * n_values
+    rank = np.empty(n_values, dtype=np.int64)
+    columns = {}
+    for j, column in enumerate(properties):
+        rank[np.argsort(values[:, j])] = np.arange(n_values)
+        sorted_values = values[np.argsort(group_rank + rank), j]
+        n = count[:, j]
+        columns[f'{column} mean'] = mean[:, j]
+        columns[f'{column} std'] = std[:, j]
+        for q in quantiles:
+            position = q * np.maximum(n - 1, 0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, np.maximum(n - 1, 0))
+            weight = position - lower
+            low, high = sorted_values[starts + lower], sorted_values[starts + upper]
+            columns[f'{column} q{q * 100:g}'] = np.where(n > 0, low + (high - low) * weight, np.nan)
+    return pd.concat([df_groups, pd.DataFrame(columns)], axis=1)
+
+# columns added by gibbs_fe
+GFE_COLUMNS = ['GFE[KJ/mol]', 'GFE_Tc[KJ/mol]', 'dG[KJ/mol]']
+
+def gibbs_kernel(Te, Tc, P, out=None, dtype=np.float64, R_const=8.314, P_standard=1):
+    """
+    gibbs_kernel calculates GFE = RTe ln(P/P'), GFE_Tc = RTc ln(P/P') and dG = GFE - GFE_Tc into the preallocated buffers out
+    (array of shape (3,) + Te.shape, or a sequence of three arrays). ln(P/P') is calculated once and no temporary arrays are allocated.
+    Te, Tc and P can have any (equal) shape, eg. a stacked (experiments x samples) batch.
+
+    useage: out = gibbs_kernel(Te, Tc, P)
+            GFE, GFE_Tc, dG = gibbs_kernel(Te, Tc, P, dtype=np.float32)
+    """
+    if out is None:
+        out = np.empty((3,) + np.shape(Te), dtype=dtype)
+    gfe, gfe_tc, dG = out
+    # R ln(P/P') in the dG buffer
+    np.divide(P, P_standard, out=dG, casting='same_kind')
+    np.log(dG, out=dG)
+    np.multiply(dG, R_const, out=dG)
+    np.multiply(Te, dG, out=gfe, casting='same_kind')
+    np.multiply(Tc, dG, out=gfe_tc, casting='same_kind')
+    np.subtract(gfe, gfe_tc, out=dG)
+    return out
+
+@profiled
+def gibbs_frame(data, columns=GFE_COLUMNS, dtype=np.float64, R_const=8.314, P_standard=1):
+    """
+    gibbs_frame adds the Gibbs free energy columns (GFE, GFE_Tc, dG named by columns) to data with gibbs_kernel.
+    data can be a DataFrame or a list of DataFrames, which are calculated in one kernel call over the stacked rows.
+
+    useage: df_gfe = gibbs_frame(data)
+    """
+    frames = data if isinstance(data, list) else [data]
+    lengths = [len(frame) for frame in frames]
+    Te, Tc, P = [np.concatenate([frame[column].to_numpy() for frame in frames]) if len(frames) > 1 else frames[0][column].to_numpy()
+                 for column in ['Te[K]', 'Tc[K]', 'P[bar]']]
+    out = gibbs_kernel(Te, Tc, P, dtype=dtype, R_const=R_const, P_standard=P_standard)
+    results = []
+    for frame, start, stop in zip(frames, np.cumsum([0] + lengths[:-1]), np.cumsum(lengths)):
+        # pass-through columns are copied (to_numpy() may be a read-only view under copy-on-write);
+        # the freshly computed kernel blocks are used without a copy
+        frame_columns = {column: frame[column].to_numpy(copy=True) for column in frame.columns}
+        frame_columns.update(zip(columns, out[:, start:stop]))
+        results.append(pd.DataFrame(frame_columns, index=frame.index, copy=False))
+    return results if isinstance(data, list) else results[0]
+
+class TeIndex:
+    """
+    TeIndex sorts the data by Te[K] once and answers Te range queries by binary search.
+    range returns a slice of the sorted data (no boolean masks, no copy);
+    ranges returns mean, std and count of all numeric columns for many (Tmin, Tmax) windows from prefix sums, in O(1) per window
+    (non-finite values are skipped per column; count is the number of rows in the window).
+
+    useage: index = TeIndex(df_gfe)
+            df_selected = index.range(300, 350)
+            df_mean, df_std = index.ranges([(300, 320), (300, 340)])
+    """
+    def __init__(self, data:pd.DataFrame, key='Te[K]'):
+        self.key = key
+        self.data = data.sort_values(by=key, kind='stable')
+        self.key_values = self.data[key].to_numpy()
+        self._prefix = None
+
+    def __len__(self):
+        return len(self.key_values)
+
+    def bounds(self, Tmin, Tmax):
+        """ positions [lo, hi) of the rows with Tmin <= Te <= Tmax in the sorted data """
+        lo = np.searchsorted(self.key_values, Tmin, side='left')
+        hi = np.searchsorted(self.key_values, Tmax, side='right')
+        return lo, hi
+
+    def range(self, Tmin, Tmax):
+        """ rows with Tmin <= Te <= Tmax, as a slice of the sorted data """
+        lo, hi = self.bounds(Tmin, Tmax)
+        return self.data.iloc[lo:hi]
+
+    def ranges(self, windows:list):
+        """ mean and std (with Tmin, Tmax and count columns) of all numeric columns for every (Tmin, Tmax) window """
+        if self._prefix is None:
+            numeric = self.data.select_dtypes('number')
+            values = numeric.to_numpy(dtype=np.float64)
+            finite = np.isfinite(values)
+            # shifted by the column means to keep the sums of squares well conditioned; non-finite values are skipped per column
+            n_finite = finite.sum(axis=0)
+            self._shift = np.where(finite, values, 0.0).sum(axis=0) / np.maximum(n_finite, 1)
+            values = np.where(finite, values - self._shift, 0.0)
+            self._columns = numeric.columns
+            self._prefix = np.zeros((3, len(values) + 1, values.shape[1]))
+            np.cumsum(values, axis=0, out=self._prefix[0, 1:])
+            np.cumsum(values * values, axis=0, out=self._prefix[1, 1:])
+            np.cumsum(finite, axis=0, out=self._prefix[2, 1:])
+        windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+        lo = np.searchsorted(self.key_values, windows[:, 0], side='left')
+        hi = np.searchsorted(self.key_values, windows[:, 1], side='right')
+        hi = np.maximum(hi, lo)
+        count = (hi - lo)[:, None]
+        sums = self._prefix[:, hi] - self._prefix[:, lo]
+        n_valid = sums[2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums[0] / n_valid
+            var = (sums[1] - sums[0] * mean) / np.where(n_valid > 1, n_valid - 1, np.nan)
+        std = np.sqrt(np.maximum(var, 0.0))
+        df_mean = pd.DataFrame(mean + self._shift, columns=self._columns)
+        df_std = pd.DataFrame(std, columns=self._columns)
+        for df in (df_mean, df_std):
+            df.insert(0, 'Tmax', windows[:, 1])
+            df.insert(0, 'Tmin', windows[:, 0])
+            df['count'] = count[:, 0]
+        return df_mean, df_std
+
+def pareto_front_idx(values:np.ndarray, block_size=2048):
+    """
+    pareto_front_idx returns the positions of the non-dominated rows of values (n x d objectives, all minimised), sorted by the first objective.
+    The rows are sorted lexicographically once, so no later row can dominate an earlier one. For two objectives the front is found
+    by a running-minimum sweep (O(n log n)); for more objectives the front is filtered block by block: block_size rows at a time are
+    compared against the front found so far and against the earlier rows of the block with NumPy broadcasts (O(n x front) comparisons).
+
+    useage: idx = pareto_front_idx(data[['dG[KJ/mol]', 'TR[K/W]']].to_numpy())
+    """
+    n_rows, n_obj = values.shape
+    if n_rows == 0:
+        return np.arange(0)
+    order = np.lexsort(values.T[::-1])
+    values = values[order]
+    if n_obj == 1:
+        return order[:1]
+    if n_obj == 2:
+        running_min = np.minimum.accumulate(values[:, 1])
+        keep = np.empty(n_rows, dtype=bool)
+        keep[0] = True
+        keep[1:] = values[1:, 1] < running_min[:-1]
+        return order[keep]
+    def dominates(a, b):
+        # dominates[i, j]: a[i] <= b[j] in every objective; the first objective holds for every earlier row (sorted rows)
+        result = a[:, None, 1] <= b[None, :, 1]
+        for k in range(2, n_obj):
+            result &= a[:, None, k] <= b[None, :, k]
+        return result
+    front = np.empty((0, n_obj), dtype=values.dtype)
+    front_idx = []
+    earlier = np.tri(block_size, k=-1, dtype=bool).T # earlier[j, i]: row j precedes row i within a block
+    for start in range(0, n_rows, block_size):
+        block = values[start:start + block_size]
+        # dominated by a row of the front so far, compared in chunks of block_size front rows
+        dominated = np.zeros(len(block), dtype=bool)
+        for f in range(0, len(front), block_size):
+            dominated |= dominates(front[f:f + block_size], block).any(axis=0)
+        # remaining rows dominated by an earlier remaining row of the block (dominance is transitive, so the rows dropped above need no check)
+        keep = np.flatnonzero(~dominated)
+        candidates = block[keep]
+        keep = keep[~(dominates(candidates, candidates) & earlier[:len(keep), :len(keep)]).any(axis=0)]
+        front = np.concatenate([front, block[keep]])
+        front_idx.append(start + keep)
+    return order[np.concatenate(front_idx)]
+
+def _bootstrap_replicates(values:np.ndarray, starts:np.ndarray, sizes:np.ndarray, n_boot:int, seed, batch_elements=2**23):
+    # n_boot two-level replicates: experiments drawn with replacement, then the rows of every drawn experiment with replacement
+    rng = np.random.default_rng(seed)
+    n_groups, n_props = len(sizes), values.shape[1]
+    chosen = rng.integers(0, n_groups, size=(n_boot, n_groups)) # experiment index matrix
+    sums = np.zeros((n_boot, n_props))
+    counts = sizes[chosen].sum(axis=1)
+    replicate = np.repeat(np.arange(n_boot), n_groups)
+    columns = np.ascontiguousarray(values.T)
+    for group in range(n_groups):
+        slots = replicate[chosen.ravel() == group] # replicates (with multiplicity) which drew this experiment
+        size = sizes[group]
+        batch = max(batch_elements // size, 1)
+        for first in range(0, len(slots), batch):
+            rows = starts[group] + rng.integers(0, size, size=(len(slots[first:first + batch]), size)) # row index matrix
+            group_sums = np.column_stack([np.take(column, rows).sum(axis=1) for column in columns])
+            np.add.at(sums, slots[first:first + batch], group_sums)
+    return sums / counts[:, None]
+
+def bootstrap_means(values:np.ndarray, groups=None, n_boot=2000, seed=42, n_workers=1):
+    """
+    bootstrap_means returns n_boot bootstrap replicates (n_boot x d) of the column means of values (n samples x d properties).
+    With groups (experiment label per sample) every replicate resamples the experiments with replacement and then the rows
+    of each drawn experiment with replacement, so the spread includes the between-experiment variance; without groups the rows are resampled.
+    Experiments and rows are drawn as index matrices and reduced in batches; with n_workers > 1 (None: all cores) the replicates
+    are split across worker processes, seeded with independent streams (SeedSequence.spawn), so results depend on seed and n_workers only.
+
+    useage: replicates = bootstrap_means(df[['Tc[K]', 'P[bar]']].to_numpy(), groups=df['source'].to_numpy(), n_boot=2000)
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    if groups is None:
+        groups = np.zeros(len(values), dtype=np.int64)
+    codes = pd.factorize(np.asarray(groups), sort=True)[0]
+    order = np.argsort(codes, kind='stable')
+    values = values[order]
+    sizes = np.bincount(codes)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    if n_workers == 1:
+        return _bootstrap_replicates(values, starts, sizes, n_boot, np.random.SeedSequence(seed))
+    n_workers = n_workers or os.cpu_count()
+    parts = [len(part) for part in np.array_split(np.arange(n_boot), n_workers) if len(part)]
+    seeds = np.random.SeedSequence(seed).spawn(len(parts))
+    with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+        replicates = pool.map(_bootstrap_replicates, [values] * len(parts), [starts] * len(parts), [sizes] * len(parts), parts, seeds)
+        return np.concatenate(list(replicates))
+
+def decimate_idx(values:np.ndarray, max_points=2000):
+    """
+    decimate_idx returns the sorted positions of the rows to draw from values (n samples x d series), about max_points rows per series:
+    the samples are cut into max_points/2 equal buckets and the minimum and maximum of every series in each bucket are kept
+    (min/max decimation), so peaks and the visual extent of the curves are preserved. No decimation for max_points=None.
+
+    useage: data = data.iloc[decimate_idx(data[['Te[K]', 'Tc[K]']].to_numpy(), max_points=2000)]
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    n_rows = len(values)
+    if max_points is None or n_rows <= max_points:
+        return np.arange(n_rows)
+    bucket = np.arange(n_rows) * max(max_points // 2, 1) // n_rows
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n_rows] - 1
+    keep = [np.array([0, n_rows - 1])]
+    for column in values.T:
+        # per bucket: first position (after sorting by value) is the minimum, last the maximum; NaN is never chosen
+        order = np.lexsort((np.where(np.isnan(column), np.inf, column), bucket))
+        keep.append(order[starts])
+        order = np.lexsort((np.where(np.isnan(column), -np.inf, column), bucket))
+        keep.append(order[ends])
+    return np.unique(np.concatenate(keep))
+
+def eu_envelope(x, lower, upper, max_points=2000):
+    """
+    eu_envelope reduces an uncertainty band (lower/upper limits over x) to at most about max_points points for fill_between.
+    The points are sorted by x and cut into max_points/2 equal buckets; every bucket is drawn from its first to its last x
+    with the lowest lower and the highest upper limit of the bucket, so the drawn band always contains the full band.
+
+    useage: x_env, lower_env, upper_env = eu_envelope(df_std['Te[K]'], mean - 2*std, mean + 2*std)
+    """
+    x, lower, upper = (np.asarray(values, dtype=np.float64) for values in (x, lower, upper))
+    order = np.argsort(x, kind='stable')
+    x, lower, upper = x[order], lower[order], upper[order]
+    n_rows = len(x)
+    if max_points is None or n_rows <= max_points:
+        return x, lower, upper
+    starts = np.unique(np.arange(n_rows) * max(max_points // 2, 1) // n_rows, return_index=True)[1]
+    ends = np.r_[starts[1:], n_rows] - 1
+    lower_env = np.fmin.reduceat(lower, starts)
+    upper_env = np.fmax.reduceat(upper, starts)
+    return np.column_stack([x[starts], x[ends]]).ravel(), np.repeat(lower_env, 2), np.repeat(upper_env, 2)
 
 ## Data Analysis
 class PulseHeatPipe:
@@ -28,10 +612,15 @@ class PulseHeatPipe:
     ## list of avilable functions
     1. data_etl
     2. gibbs_fe
+    2a. iter_etl / stream_etl (chunked data_etl -> gibbs_fe for long data files)
     3. data_chop
+    3a. data_index (sorted Te index for repeated range queries)
     4. data_stat
     5. data_property_avg
+    5a. data_property_summary (data_property_avg as a DataFrame)
+    5b. data_property_ci (bootstrap confidence intervals over experiments and rows)
     6. best_TP
+    6a. top_k / pareto_front (returned best operating points)
     7. plot_all_data
     8. plot_Te_Tc
     9. plot_eu
@@ -46,96 +635,219 @@ class PulseHeatPipe:
         print(f"Data loaded from directory: {self.datapath}")
 
     # data ETL    
-    def data_etl(self):
+    @profiled
+    def data_etl(self, n_workers=1, cache=False, save=True, store=None, exclude=()):
         """
         data_etl loads experimental data from all experimental data files (xlsx).
-        Filters data and keeps only important columns.
+        Filters data and keeps only important columns; each row is tagged with its source file.
+        Every file is read with the chunked loader of iter_etl (see read_logger_file) and the files are combined with a single concat.
         Combine selected data and save to csv file.
         Conver units to MKS [K, bar] system and save to csv file. 
+        Files are written through the global writer (csv by default, see writer.configure).
+        With cache=True loaded files are cached in 'datapath/.etl_cache/', so a re-run only parses new or modified files
+        and the csv files are not rewritten when nothing changed.
+        With store (ExperimentStore or path of the store file, see store.py) the converted data of every source file is also written
+        into the store as stage 'converted'.
+        exclude: file name patterns of xlsx files in datapath which are not experimental data (see logger_files), eg. ['sample*'].
 
         useage: analysis = PulseHeatPipe("path")
                 df, df_conv = analysis.data_etl()
+                df, df_conv = analysis.data_etl(n_workers=4) # parallel loading; n_workers=None uses all cores
+                df, df_conv = analysis.data_etl(cache=True) # incremental re-loading
+                df, df_conv = analysis.data_etl(save=False) # no csv files
+                df, df_conv = analysis.data_etl(store="data/php_store.sqlite")
+                df, df_conv = analysis.data_etl(exclude=['sample*', 'template*']) # no template workbooks
         """
-        data_filenames_list = glob.glob((self.datapath + '*.xlsx'))
-        df_frames = []
-        for i in range(0, len(data_filenames_list)) :
-            # loading data in loop
-            df_raw = pd.read_excel((data_filenames_list[i]))
-            selected_columns = ['Time (Min)', 'Tc - AVG (oC)', 'Te - AVG (oC)', 'Pressure (mm of Hg)', 'Te - Tc (oC)', 'Q (W)','Resistance (oC/W)']
-            df_selected_columns = df_raw[selected_columns]
-            df_frames.append(df_selected_columns)
-            df = pd.concat(df_frames, axis=0, ignore_index=True).dropna()
+        data_filenames_list = logger_files(self.datapath, exclude=exclude)
+        assert data_filenames_list, f"No experimental data files (xlsx) found at: {self.datapath}"
+        etl_cache = ETLCache(self.datapath + '.etl_cache') if cache else None
+        df = read_logger_files(data_filenames_list, n_workers=n_workers, cache=etl_cache)
         # converting data to MKS
-        df_conv_fram = [df['Time (Min)'], df['Te - AVG (oC)']+self.T_k, df['Tc - AVG (oC)']+self.T_k, df['Te - Tc (oC)'] , df['Pressure (mm of Hg)']/self.P_const, df['Resistance (oC/W)']]
-        df_conv = pd.concat(df_conv_fram, axis=1, ignore_index=True).dropna()
-        df_conv_columns = ['t(min)' ,'Te[K]', 'Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]']
-        df_conv.columns = df_conv_columns
-        # saving data to csv
-        df_out = df.to_csv(self.datapath + "combined_data.csv")
-        df_conv_out = df_conv.to_csv(self.datapath + "combined_converted_data.csv")
-        print(f"Compiled and converted data is saved at: {self.datapath}'combined_converted_data.csv'")
+        df_conv = self._convert_units(df)
+        if store is not None:
+            from store import opened
+            with opened(store) as experiment_store:
+                experiment_store.write(df_conv, 'converted', groups=df['source'], datapath=self.datapath)
+        if not save or not get_writer().persist:
+            return df, df_conv
+        # saving data (see writer.configure for the format)
+        outputs = [self.datapath + "combined_data.csv", self.datapath + "combined_converted_data.csv"]
+        if etl_cache is not None and not etl_cache.changed and all(os.path.exists(get_writer().path(output)) for output in outputs):
+            print(f"No new or modified data files, compiled data is up to date at: '{get_writer().path(outputs[1])}'")
+            return df, df_conv
+        df_out = write_result(df, outputs[0])
+        df_conv_out = write_result(df_conv, outputs[1])
+        print(f"Compiled and converted data is saved at: '{df_conv_out}'")
         return df, df_conv
     
+    # converting a chunk of selected data to MKS
+    @profiled
+    def _convert_units(self, df:pd.DataFrame):
+        df_conv = pd.DataFrame({'t(min)': df['Time (Min)'].to_numpy(),
+                                'Te[K]': df['Te - AVG (oC)'].to_numpy() + self.T_k,
+                                'Tc[K]': df['Tc - AVG (oC)'].to_numpy() + self.T_k,
+                                'dT[K]': df['Te - Tc (oC)'].to_numpy(),
+                                'P[bar]': df['Pressure (mm of Hg)'].to_numpy() / self.P_const,
+                                'TR[K/W]': df['Resistance (oC/W)'].to_numpy(),
+                                'Q[W]': df['Q (W)'].to_numpy()}, index=df.index)
+        return df_conv
+
+    # experiment label per row: groups (Series aligned by index, or array), else data['source'], else one experiment
+    def _groups(self, data:pd.DataFrame, groups):
+        if groups is None:
+            return data['source'].to_numpy() if 'source' in data.columns else np.zeros(len(data), dtype=np.int64)
+        if isinstance(groups, pd.Series):
+            return groups.loc[data.index].to_numpy()
+        return np.asarray(groups)
+
+    # streaming ETL for long experimental data files
+    def iter_etl(self, files=None, chunksize=50000, gfe=True):
+        """
+        iter_etl is a generator version of data_etl -> gibbs_fe for long experimental data files (xlsx or csv).
+        Every file is read in chunks of chunksize rows: select columns -> convert units to MKS [K, bar] -> Gibbs free energy columns.
+        Peak memory depends on chunksize only, not on the total number of rows.
+
+        useage: for df_chunk in analysis.iter_etl(chunksize=50000):
+                    ...
+                here, files = list of data files (default: all xlsx files in datapath)
+                gfe = False yields only the converted data (as df_conv of data_etl)
+        """
+        if files is None:
+            files = logger_files(self.datapath)
+        assert files, f"No experimental data files (xlsx) found at: {self.datapath}"
+        for filename in files:
+            for df_chunk in iter_logger_file(filename, chunksize=chunksize):
+                df_conv = self._convert_units(df_chunk)
+                yield self._gibbs_fe(df_conv) if gfe else df_conv
+
+    @profiled
+    def stream_etl(self, files=None, chunksize=50000, gfe=True, output='gfe_combined.csv'):
+        """
+        stream_etl runs iter_etl and appends every processed chunk to the output file in datapath, with bounded memory.
+        The file is written through the global writer (csv by default, parquet or feather; see writer.configure); with persist=False nothing is written.
+        The result matches gibbs_fe(data_etl()[1]) (or data_etl()[1] for gfe=False) for the same files.
+
+        useage: n_rows = analysis.stream_etl(chunksize=50000, output='gfe_combined.csv')
+        """
+        sink = get_writer().stream(self.datapath + output)
+        n_rows = 0
+        try:
+            for df_chunk in self.iter_etl(files=files, chunksize=chunksize, gfe=gfe):
+                df_chunk.index = pd.RangeIndex(n_rows, n_rows + len(df_chunk))
+                if sink is not None:
+                    sink.write(df_chunk)
+                n_rows += len(df_chunk)
+        finally:
+            if sink is not None:
+                sink.close()
+        if sink is not None:
+            print(f"Streamed {n_rows} rows of compiled data to: '{sink.output_path}'")
+        return n_rows
+
     # to calculate gibbs free energy at given (T[K],P[bar])
-    def gibbs_fe(self, data:pd.DataFrame):
+    @profiled
+    def gibbs_fe(self, data, save=True, dtype=np.float64, store=None, groups=None):
         """
         gibbs_fe calculates the chagne in the gibbs free energy at a given vacuum pressure and temperature.
         dG = dG' + RTln(P/P')
         here, R = 8.314 [J/molK]
         P and P' = Pressure [bar]
         T = Temperature [K]
+        data can also be a list of DataFrames (eg. many experiments); all of them are calculated in a single kernel call (see gibbs_kernel).
+        With store (ExperimentStore or path of the store file, see store.py) the result is also written into the store as stage 'gfe',
+        per experiment of groups (source file per row, eg. df['source'] of data_etl, as for the 'converted' stage; default: data['source']).
+        groups is required with store when data has no 'source' column, so the stages of an experiment share one experiment id.
 
         useage: df_gfe = analysis.gibbs_fe(data)
+                df_gfe = analysis.gibbs_fe(data, save=False, dtype=np.float32) # no csv file, float32 GFE columns
+                df_gfe_list = analysis.gibbs_fe([data_1, data_2], save=False)
+                df_gfe = analysis.gibbs_fe(df_conv, groups=df['source'], store="data/php_store.sqlite")
         """
-        Te = (data['Te[K]']) 
-        Tc = (data['Tc[K]'])  
-        P_vacuum = (data['P[bar]']) # converting to bar
-        dG_vacuume_Te = self.R_const * Te * np.log(P_vacuum/self.P_standard)
-        dG_vacuume_Tc = self.R_const * Tc * np.log(P_vacuum/self.P_standard)
-        dG = dG_vacuume_Te - dG_vacuume_Tc
-        selected_columns = ['t(min)' ,'Te[K]', 'Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]', 'GFE[KJ/mol]', 'GFE_Tc[KJ/mol]', 'dG[KJ/mol]']
-        data = pd.concat([data, dG_vacuume_Te, dG_vacuume_Tc, dG], axis=1, ignore_index=True)
-        data.columns = selected_columns
-        data_out = data.to_csv(self.datapath + "gfe_combined.csv")
-        msg = print(f"Gibbs Free Energy calculated data saved at: {self.datapath}'gfe_combined.csv")
+        data = self._gibbs_fe(data, dtype=dtype)
+        if store is not None:
+            from store import opened
+            df_gfe = pd.concat(data, axis=0) if isinstance(data, list) else data
+            assert groups is not None or 'source' in df_gfe.columns, "Enter groups (eg. df['source'] of data_etl) to write into the store"
+            with opened(store) as experiment_store:
+                experiment_store.write(df_gfe, 'gfe', groups=self._groups(df_gfe, groups), datapath=self.datapath)
+        if save:
+            df_gfe = pd.concat(data, axis=0, ignore_index=True) if isinstance(data, list) else data
+            data_out = write_result(df_gfe, self.datapath + "gfe_combined.csv")
+            if data_out:
+                msg = print(f"Gibbs Free Energy calculated data saved at: '{data_out}'")
         return data
+
+    def _gibbs_fe(self, data, dtype=np.float64):
+        return gibbs_frame(data, GFE_COLUMNS, dtype=dtype, R_const=self.R_const, P_standard=self.P_standard)
     
     # To select data from specific Te range
-    def data_chop(self, data:pd.DataFrame, Tmin=300, Tmax=400):
+    @profiled
+    def data_chop(self, data, Tmin=300, Tmax=400):
         """ 
         data_chop function is used to chop the data for the selected temperature value from the Te[K] column.
+        data can also be a TeIndex (see data_index); then the range is found by binary search and returned as a slice of the sorted data.
 
         useage: data = analysis.data_chop(df, Tmin, Tmax)
         here, Tmin/Tmax is a suitable value (int) from the data.
         default values: Tmin=300, Tmax=400
         """
-        Tmina = data['Te[K]'].min()
-        Tmaxa = data['Te[K]'].max()
+        if isinstance(data, TeIndex):
+            Tmina, Tmaxa = data.key_values[0], data.key_values[-1]
+        else:
+            Tmina = data['Te[K]'].min()
+            Tmaxa = data['Te[K]'].max()
         assert Tmin < Tmax, f"Entered wrong values: Correct range [Tmin:{round(Tmina,4)}, Tmax:{round(Tmaxa,4)} ]"
         print(f"Optimal range of temperature(Te) for data selection: [Tmin:{round(Tmina,4)}, Tmax:{round(Tmaxa)}]")
+        if isinstance(data, TeIndex):
+            return data.range(Tmin, Tmax)
         data_T = data[data['Te[K]'] <= Tmax]
         data_T = data_T[data_T['Te[K]'] >= Tmin]
         return data_T
+
+    # sorted Te index for repeated range queries
+    @profiled
+    def data_index(self, data:pd.DataFrame):
+        """
+        data_index sorts the data by Te[K] once and returns a TeIndex for fast repeated range queries (eg. with data_chop).
+
+        useage: index = analysis.data_index(df_gfe)
+                df_selected = index.range(Tmin=300, Tmax=350)
+                df_mean, df_std = index.ranges([(300, 320), (300, 340), (310, 350)])
+        """
+        return TeIndex(data)
     
         # data mixing and re-arranging
-    def data_stat(self, data:pd.DataFrame):
+    @profiled
+    def data_stat(self, data:pd.DataFrame, bin_width=None, save=True):
         """
         data_stat sorts and arrange value by a group from the experimental data loaded with data_etl function, calculates mean and standard deviation of the grouped data.
-        Calculated result will be stored at the location of data files.
+        By default data is grouped by the exact Te[K] values. With bin_width [K] the data is grouped in Te bins of that width
+        in a single vectorised pass (see binned_stats) and a 'count' column is added.
+        Calculated result will be stored at the location of data files (unless save=False).
 
         df_mean, df_std = analysis.data_stat(data)
+        df_mean, df_std = analysis.data_stat(data, bin_width=0.5)
         """
-        df_mean = data.sort_values(by=['Te[K]']).groupby(['Te[K]'], as_index=False).mean()
-        df_mean_out = df_mean.to_csv(self.datapath + 'combined_mean.csv')
-        df_std = data.sort_values(by=['Te[K]']).groupby(['Te[K]'], as_index=False).std().dropna()
-        df_std_out = df_std.to_csv(self.datapath + 'combined_std.csv')
-        print(f"Calculated mean and standard deviation values saved at {self.datapath}'combined_mean.csv' and 'combined_std.csv'")
+        if bin_width is None:
+            grouped = data.groupby(['Te[K]'], as_index=False)
+            df_mean = grouped.mean()
+            df_std = grouped.std().dropna()
+        else:
+            df_mean, df_std = binned_stats(data, bin_width)
+        if not save:
+            return df_mean, df_std
+        df_mean_out = write_result(df_mean, self.datapath + 'combined_mean.csv')
+        df_std_out = write_result(df_std, self.datapath + 'combined_std.csv')
+        if df_mean_out:
+            print(f"Calculated mean and standard deviation values saved at '{df_mean_out}' and '{df_std_out}'")
         return df_mean, df_std
     
     # prepare average values for all thermal properties
+    @profiled
     def data_property_avg(self, df_mean:pd.DataFrame, df_std:pd.DataFrame):
         """
         data_property_avg calculates average values of measured thermal properties for the given experiment data.
+        For confidence intervals including the between-experiment variance use data_property_ci.
 
         useage: analysis.data_property_avg(df_mean, df_std)
         """
@@ -159,28 +871,103 @@ class PulseHeatPipe:
         f"GFE average:     {round(GFE_avg,4)} +- {round(GFE_std,4)} [KJ/mol]\n");
         return print(msg)
     
+    @profiled
+    def data_property_summary(self, df_mean:pd.DataFrame, df_std:pd.DataFrame, properties=['Tc[K]', 'P[bar]', 'dT[K]', 'TR[K/W]', 'GFE[KJ/mol]']):
+        """
+        data_property_summary returns the values reported by data_property_avg as a DataFrame (index: property, columns: average, std).
+
+        useage: df_summary = analysis.data_property_summary(df_mean, df_std)
+        """
+        return pd.DataFrame({'average': df_mean[properties].mean(), 'std': df_std[properties].mean()})
+
+    @profiled
+    def data_property_ci(self, data:pd.DataFrame, groups=None, properties=['Tc[K]', 'P[bar]', 'dT[K]', 'TR[K/W]', 'GFE[KJ/mol]'],
+                         n_boot=2000, level=0.95, seed=42, n_workers=1):
+        """
+        data_property_ci estimates bootstrap confidence intervals of the average thermal properties of the (selected) data.
+        Experiments and their rows are resampled (see bootstrap_means), so between-experiment variance is included.
+        groups: experiment label per row, eg. df['source'] of data_etl (aligned by index); default: data['source'] if present, else rows only
+        n_workers: worker processes for the replicates (None: all cores)
+
+        Returns a DataFrame (index: property) with average, se (bootstrap standard error), ci_low and ci_high at the given level;
+        the number of replicates, experiments and rows are in df_ci.attrs.
+
+        useage: df, df_conv = analysis.data_etl()
+                df_selected = analysis.data_chop(analysis.gibbs_fe(df_conv), Tmin=300, Tmax=400)
+                df_ci = analysis.data_property_ci(df_selected, groups=df['source'], n_boot=5000, n_workers=4)
+        """
+        if groups is None and 'source' in data.columns:
+            groups = data['source']
+        if isinstance(groups, pd.Series):
+            groups = groups.loc[data.index]
+        values = data[properties].to_numpy(dtype=np.float64)
+        replicates = bootstrap_means(values, groups=groups, n_boot=n_boot, seed=seed, n_workers=n_workers)
+        alpha = (1 - level) / 2
+        df_ci = pd.DataFrame({'average': values.mean(axis=0),
+                              'se': replicates.std(axis=0, ddof=1),
+                              'ci_low': np.quantile(replicates, alpha, axis=0),
+                              'ci_high': np.quantile(replicates, 1 - alpha, axis=0)}, index=properties)
+        df_ci.attrs.update({'level': level, 'n_boot': n_boot, 'n_rows': len(values),
+                            'n_experiments': 1 if groups is None else int(pd.Series(np.asarray(groups)).nunique())})
+        return df_ci
+
     # find optimal G(T,P) of PHP
+    @profiled
     def best_TP(self, data:pd.DataFrame):
         """ 
         best_TP finds best G(T,P) with lowest dG (Change in Gibbs Free Energy for Te->Tc values at constant Pressure) from the experimental dataset.
+        To get the result as a DataFrame use top_k(data, k=1).
 
         useage: analysis.best_TP(data)
         """
-        df_opt = data[data['dG[KJ/mol]'] == data['dG[KJ/mol]'].min()]
-        df_opt_idx = df_opt.index
-        Te_opt = data['Te[K]'].loc[df_opt_idx]
-        dT_opt = data['dT[K]'].loc[df_opt_idx]
-        P_opt = data['P[bar]'].loc[df_opt_idx]
-        dG_opt = data['dG[KJ/mol]'].loc[df_opt_idx]
-        GFE_opt = data['GFE[KJ/mol]'].loc[df_opt_idx]
-        TR_opt = data['TR[K/W]'].loc[df_opt_idx]
-        msg = (f'Optimal G(T,P) condition at lowest (optimal) dG[{round(dG_opt.iloc[0],4)}]\n'
-               f'Te optimal:        {round(Te_opt.iloc[0],4)}[K] \n'
-               f'P  optimal:        {round(P_opt.iloc[0],4)}[bar] \n'
-               f'dT optimal:        {round(dT_opt.iloc[0],4)}[K] \n'
-               f'TR optimal:        {round(TR_opt.iloc[0],4)}[K/W] \n'
-               f'GFE optimal:       dG({round(Te_opt.iloc[0],4)}, {round(P_opt.iloc[0],4)}) = {round(GFE_opt.iloc[0],4)} [KJ/mol]\n');
+        opt = self.top_k(data, k=1).iloc[0]
+        msg = (f'Optimal G(T,P) condition at lowest (optimal) dG[{round(opt["dG[KJ/mol]"],4)}]\n'
+               f'Te optimal:        {round(opt["Te[K]"],4)}[K] \n'
+               f'P  optimal:        {round(opt["P[bar]"],4)}[bar] \n'
+               f'dT optimal:        {round(opt["dT[K]"],4)}[K] \n'
+               f'TR optimal:        {round(opt["TR[K/W]"],4)}[K/W] \n'
+               f'GFE optimal:       dG({round(opt["Te[K]"],4)}, {round(opt["P[bar]"],4)}) = {round(opt["GFE[KJ/mol]"],4)} [KJ/mol]\n');
         return print(msg)
+
+    # best k operating points
+    @profiled
+    def top_k(self, data:pd.DataFrame, k=5, by='dG[KJ/mol]', ascending=True, group_by=None):
+        """
+        top_k returns the k rows with the lowest (ascending=True) or highest values of the objective column by, sorted by it.
+        Rows are selected with np.argpartition in O(n); with group_by (eg. ['Fluid', 'FR']) the top k rows of every group are returned.
+
+        useage: df_top = analysis.top_k(data, k=5, by='dG[KJ/mol]')
+                df_top = analysis.top_k(df_combined, k=3, by='TR[K/W]', group_by=['Fluid', 'FR'])
+        """
+        if group_by is not None:
+            return pd.concat([self.top_k(df_group, k=k, by=by, ascending=ascending) for _, df_group in data.groupby(group_by, sort=True, observed=True)])
+        values = data[by].to_numpy(dtype=np.float64)
+        values = values if ascending else -values
+        values = np.where(np.isnan(values), np.inf, values)
+        k = min(k, len(values))
+        idx = np.argpartition(values, k - 1)[:k] if 0 < k < len(values) else np.arange(len(values))
+        idx = idx[np.argsort(values[idx], kind='stable')][:k]
+        return data.iloc[idx]
+
+    # non-dominated operating points
+    @profiled
+    def pareto_front(self, data:pd.DataFrame, objectives=['dG[KJ/mol]', 'TR[K/W]', 'dT[K]'], maximize=[], group_by=None):
+        """
+        pareto_front returns the non-dominated rows (Pareto front) of data for the objective columns, sorted by the first objective.
+        All objectives are minimised except the columns listed in maximize. Rows are sorted once (O(n log n)) and swept;
+        with group_by (eg. ['Fluid', 'FR']) the front of every group is returned. Duplicated points are kept once.
+
+        useage: df_front = analysis.pareto_front(data, objectives=['dG[KJ/mol]', 'TR[K/W]', 'dT[K]'])
+                df_front = analysis.pareto_front(df_combined, objectives=['dG[KJ/mol]', 'TR[K/W]'], group_by=['Fluid', 'FR'])
+        """
+        if group_by is not None:
+            return pd.concat([self.pareto_front(df_group, objectives, maximize) for _, df_group in data.groupby(group_by, sort=True, observed=True)])
+        values = data[objectives].to_numpy(dtype=np.float64)
+        for i, objective in enumerate(objectives):
+            if objective in maximize:
+                values[:, i] = -values[:, i]
+        valid = ~np.isnan(values).any(axis=1)
+        return data.iloc[np.flatnonzero(valid)[pareto_front_idx(values[valid])]]
     
 ## Data Visualisation
 class DataVisualisation(PulseHeatPipe):
@@ -198,11 +985,14 @@ class DataVisualisation(PulseHeatPipe):
         super().__init__(sample)
         self.sample = sample
 
-    def plot_all_data(self, data:pd.DataFrame):
+    @profiled
+    def plot_all_data(self, data:pd.DataFrame, max_points=2000):
         """ Data Visualisation
+            long runs are reduced to about max_points rows by min/max decimation (see decimate_idx); max_points=None draws every row
             
             useage: visual.plot_all_data(data)
         """
+        data = data.iloc[decimate_idx(data.select_dtypes('number').to_numpy(), max_points)]
         plt.figure(figsize=(10,5))
         sns.lineplot(data)
         plt.xlabel('Data')
@@ -210,11 +1000,13 @@ class DataVisualisation(PulseHeatPipe):
         plt.title(f"All Data - {self.sample}")
         plt.legend()
 
-    def plot_Te_Tc(self, data:pd.DataFrame):
+    @profiled
+    def plot_Te_Tc(self, data:pd.DataFrame, max_points=2000):
         """ Data Visualisation
             
             useage: visual.plot_Te_Tc(data)
         """
+        data = data.iloc[decimate_idx(data[['Te[K]', 'Tc[K]']].to_numpy(), max_points)]
         plt.figure(figsize=(10,5))
         plt.plot(data['Te[K]'], label = 'Te[K]')
         plt.plot(data['Tc[K]'], label = 'Tc[K]')
@@ -223,8 +1015,10 @@ class DataVisualisation(PulseHeatPipe):
         plt.title(f"Te[K] vs Tc[K] - {self.sample}")
         plt.legend()
 
-    def plot_eu(self, df_mean:pd.DataFrame, df_std:pd.DataFrame, property:str, point='.k', eu='r'):
+    @profiled
+    def plot_eu(self, df_mean:pd.DataFrame, df_std:pd.DataFrame, property:str, point='.k', eu='r', max_points=2000):
         """ Data Visualisation
+            points and uncertainty band are reduced to about max_points (see decimate_idx and eu_envelope); max_points=None draws everything
             
             useage: visual.plot_eu(df_mean, df_std, property='Tc[K]', point='.k', eu='r')
                     here, choose value from property list: ['Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]', 'GFE[KJ/mol]', 'GFE_Tc[KJ/mol]', 'dG[KJ/mol]']
@@ -236,10 +1030,12 @@ class DataVisualisation(PulseHeatPipe):
         properties = ['Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]', 'GFE[KJ/mol]', 'GFE_Tc[KJ/mol]', 'dG[KJ/mol]']
         if self.property in properties:    
             plt.figure(figsize=(10,5));
-            plt.plot(df_mean[self.xproperty], df_mean[self.property], self.point, label=self.property)
+            df_points = df_mean.iloc[decimate_idx(df_mean[self.property].to_numpy(), max_points)]
+            plt.plot(df_points[self.xproperty], df_points[self.property], self.point, label=self.property)
             idx = df_std.index
             df_mean_idx = df_mean.loc[idx]
-            plt.fill_between(df_std[self.xproperty], df_mean_idx[self.property] - 2* df_std[self.property], df_mean_idx[self.property] + 2* df_std[self.property],color=self.eu, alpha=0.2, label='Expanded Uncertainty')
+            band = eu_envelope(df_std[self.xproperty], df_mean_idx[self.property] - 2* df_std[self.property], df_mean_idx[self.property] + 2* df_std[self.property], max_points)
+            plt.fill_between(*band, color=self.eu, alpha=0.2, label='Expanded Uncertainty')
             plt.xlabel(self.xproperty)
             plt.ylabel(self.property)
             plt.title(f"Expanded Uncertainty - {self.sample}")
@@ -0,0 +1,152 @@
+## PHP batch runner for all experimental campaigns
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from analysis import PulseHeatPipe, DataVisualisation, logger_files
+
+# template/placeholder workbooks which are not experimental data, eg. data/di_heat_inputs_6ofr/sample.xlsx (one row of 1s)
+PLACEHOLDER_FILES = ['sample*', 'template*']
+# standard figures of export_figures: plot_eu properties
+EU_PROPERTIES = ['Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]', 'GFE[KJ/mol]', 'GFE_Tc[KJ/mol]', 'dG[KJ/mol]']
+
+def discover_experiments(root:str, pattern='*.xlsx', exclude=PLACEHOLDER_FILES):
+    """
+    discover_experiments lists all directories below root (including root) which contain experimental data files (xlsx),
+    not counting files matching exclude (see logger_files).
+    Directories are returned with a trailing separator, as expected by PulseHeatPipe.
+
+    useage: datapaths = discover_experiments("data/")
+    """
+    datapaths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith('.'))
+        datapath = os.path.join(dirpath, '')
+        if logger_files(datapath, pattern, exclude):
+            datapaths.append(datapath)
+    return sorted(datapaths)
+
+def run_pipeline(datapath:str, Tmin=300, Tmax=400, bin_width=None, n_workers=1, exclude=PLACEHOLDER_FILES):
+    """
+    run_pipeline runs data_etl -> gibbs_fe -> data_chop -> data_stat -> data_property_summary -> best G(T,P) for one experiment directory
+    and returns a summary dict (JSON serialisable). Files matching exclude (default: template workbooks, PLACEHOLDER_FILES) are skipped.
+
+    useage: summary = run_pipeline("data/al2o3_diwater_exp/40_FR/", Tmin=300, Tmax=400)
+    """
+    start = time.perf_counter()
+    analysis = PulseHeatPipe(datapath)
+    df, df_conv = analysis.data_etl(n_workers=n_workers, exclude=exclude)
+    df_gfe = analysis.gibbs_fe(df_conv)
+    df_selected = analysis.data_chop(df_gfe, Tmin, Tmax)
+    df_mean, df_std = analysis.data_stat(df_selected, bin_width=bin_width)
+    df_summary = analysis.data_property_summary(df_mean, df_std)
+    best = analysis.top_k(df_mean, k=1).iloc[0]
+    return {'datapath': datapath,
+            'status': 'ok',
+            'files': sorted(df['source'].unique().tolist()),
+            'rows': int(len(df_conv)),
+            'rows_selected': int(len(df_selected)),
+            'averages': {prop: {'average': float(row['average']), 'std': float(row['std'])} for prop, row in df_summary.iterrows()},
+            'best_TP': {prop: float(value) for prop, value in best.items()},
+            'elapsed_s': round(time.perf_counter() - start, 4)}
+
+def _run_pipeline_safe(datapath:str, kwargs:dict):
+    try:
+        return run_pipeline(datapath, **kwargs)
+    except Exception as e:
+        return {'datapath': datapath, 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+def run_campaigns(datapaths:list, output='php_summary.json', n_workers=None, **kwargs):
+    """
+    run_campaigns runs run_pipeline for every experiment directory in a process pool and writes one consolidated JSON summary.
+    Failing directories are reported with status 'error' instead of stopping the batch.
+
+    useage: summary = run_campaigns(discover_experiments("data/"), output='php_summary.json', n_workers=4, Tmin=300, Tmax=400)
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        results = list(pool.map(_run_pipeline_safe, datapaths, [kwargs] * len(datapaths)))
+    summary = {'created': datetime.now().isoformat(timespec='seconds'),
+               'parameters': kwargs,
+               'elapsed_s': round(time.perf_counter() - start, 4),
+               'experiments': results}
+    if output:
+        with open(output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary of {len(results)} experiments saved at: {output}")
+    return summary
+
+def render_figures(datapath:str, output_dir=None, formats=('png',), Tmin=300, Tmax=400, bin_width=None, max_points=2000, exclude=PLACEHOLDER_FILES):
+    """
+    render_figures draws the standard figures of one experiment directory (plot_all_data, plot_Te_Tc and plot_eu of every property in EU_PROPERTIES)
+    with the Agg backend, so no display is needed, and saves them in every format of formats (eg. png, pdf).
+    Figures are written to output_dir (default: datapath/figures/); returns a dict (JSON serialisable) with the written files.
+    Files matching exclude are skipped, as in run_pipeline.
+
+    useage: result = render_figures("data/al2o3_diwater_exp/40_FR/", formats=('png', 'pdf'))
+    """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    start = time.perf_counter()
+    output_dir = output_dir or os.path.join(datapath, 'figures')
+    os.makedirs(output_dir, exist_ok=True)
+    visual = DataVisualisation(datapath)
+    df, df_conv = visual.data_etl(save=False, exclude=exclude)
+    df_gfe = visual.gibbs_fe(df_conv, save=False)
+    df_mean, df_std = visual.data_stat(visual.data_chop(df_gfe, Tmin, Tmax), bin_width=bin_width, save=False)
+    figures = [('all_data', lambda: visual.plot_all_data(df_conv, max_points=max_points)),
+               ('Te_Tc', lambda: visual.plot_Te_Tc(df_conv, max_points=max_points))]
+    figures += [('eu_' + prop.split('[')[0], lambda prop=prop: visual.plot_eu(df_mean, df_std, prop, max_points=max_points)) for prop in EU_PROPERTIES]
+    files = []
+    for name, plot in figures:
+        plot()
+        for fmt in formats:
+            filename = os.path.join(output_dir, f"{name}.{fmt}")
+            plt.savefig(filename, bbox_inches='tight')
+            files.append(filename)
+        plt.close('all')
+    return {'datapath': datapath, 'status': 'ok', 'files': files, 'elapsed_s': round(time.perf_counter() - start, 4)}
+
+def _render_figures_safe(datapath:str, kwargs:dict):
+    try:
+        return render_figures(datapath, **kwargs)
+    except Exception as e:
+        return {'datapath': datapath, 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+def export_figures(datapaths:list, n_workers=None, **kwargs):
+    """
+    export_figures runs render_figures for every experiment directory in a process pool (headless, Agg backend)
+    and returns the list of per directory results; failing directories are reported with status 'error'.
+
+    useage: results = export_figures(discover_experiments("data/"), n_workers=4, formats=('png', 'pdf'), Tmin=300, Tmax=400)
+    """
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        results = list(pool.map(_render_figures_safe, datapaths, [kwargs] * len(datapaths)))
+    print(f"Figures of {sum(result['status'] == 'ok' for result in results)}/{len(results)} experiments exported")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PulseHeatPipe analysis for all experiment directories in parallel.")
+    parser.add_argument('paths', nargs='*', default=['data/'], help="experiment directories or roots to search for xlsx data files (default: data/)")
+    parser.add_argument('--output', default='php_summary.json', help="consolidated JSON summary (default: php_summary.json)")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument('--Tmin', type=float, default=300, help="lower Te[K] limit for data_chop (default: 300)")
+    parser.add_argument('--Tmax', type=float, default=400, help="upper Te[K] limit for data_chop (default: 400)")
+    parser.add_argument('--bin-width', type=float, default=None, help="Te bin width [K] for data_stat (default: exact Te values)")
+    parser.add_argument('--figures', default=None, help="also export the standard figures in these formats, eg. png,pdf (written to <datapath>/figures/)")
+    parser.add_argument('--max-points', type=int, default=2000, help="points per curve after decimation in exported figures (default: 2000)")
+    args = parser.parse_args(argv)
+    datapaths = sorted({datapath for path in args.paths for datapath in discover_experiments(path)})
+    print(f"Found {len(datapaths)} experiment directories")
+    summary = run_campaigns(datapaths, output=args.output, n_workers=args.workers, Tmin=args.Tmin, Tmax=args.Tmax, bin_width=args.bin_width)
+    results = summary['experiments']
+    if args.figures:
+        results = results + export_figures(datapaths, n_workers=args.workers, formats=tuple(args.figures.split(',')), Tmin=args.Tmin, Tmax=args.Tmax,
+                                           bin_width=args.bin_width, max_points=args.max_points)
+    return 0 if all(result['status'] == 'ok' for result in results) else 1
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+## Benchmark suite for the PHP analysis stages
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis import DataVisualisation, logger_files, sns
+from synthetic import write_dataset
+from writer import write_result
+
+STAGES = ['etl', 'gibbs_fe', 'data_chop', 'data_stat', 'best_TP', 'data_compile', 'plot_all_data', 'plot_eu']
+# largest size written as xlsx workbooks by default; larger sizes are written and loaded as csv files (iter_etl)
+XLSX_LIMIT = 100000
+
+def measure(func, memory=True):
+    """
+    measure runs func and returns (result, wall time [s], peak traced memory [MB]).
+    The peak memory is taken from a second run under tracemalloc, so its overhead does not distort the time.
+
+    useage: result, time_s, peak_MB = measure(lambda: analysis.gibbs_fe(df_conv, save=False))
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = None
+        if memory:
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+def run_size(n_rows:int, workdir:str, fmt=None, stages=STAGES, memory=True, n_files=4):
+    """
+    run_size writes (or re-uses) a synthetic experiment directory with n_rows rows in workdir and benchmarks every stage of stages.
+    Returns one result dict per stage: rows, stage, fmt, time_s, peak_MB.
+
+    useage: results = run_size(10**5, "/tmp/php_bench")
+    """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    from ml_solution_module import MachineLearning
+    # seaborn import, font cache and backend set-up are not part of the plotting stages
+    sns.lineplot(pd.DataFrame({'warm-up': [0.0, 1.0]}))
+    plt.savefig(io.BytesIO(), format='png')
+    plt.close('all')
+    fmt = fmt or ('xlsx' if n_rows <= XLSX_LIMIT else 'csv')
+    root = os.path.join(workdir, f'{fmt}_{n_rows}')
+    if not os.path.isdir(root):
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_dataset(root, n_rows, n_files=n_files, fluids=['DI_Water'], fill_ratios=[40], fmt=fmt)
+    datapath = os.path.join(root, 'DI_Water', '40_FR', '')
+    with contextlib.redirect_stdout(io.StringIO()):
+        visual = DataVisualisation(datapath)
+    results = []
+    state = {}
+
+    def run(stage, func):
+        if stage in stages:
+            state[stage], elapsed, peak = measure(func, memory)
+            results.append({'rows': n_rows, 'stage': stage, 'fmt': fmt, 'time_s': elapsed, 'peak_MB': peak})
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                state[stage] = func()
+
+    if fmt == 'xlsx':
+        run('etl', lambda: visual.data_etl(save=False)[1])
+    else:
+        run('etl', lambda: pd.concat(visual.iter_etl(files=logger_files(datapath, '*.csv'), gfe=False)))
+    run('gibbs_fe', lambda: visual.gibbs_fe(state['etl'], save=False))
+    run('data_chop', lambda: visual.data_chop(state['gibbs_fe'], 300, 400))
+    run('data_stat', lambda: visual.data_stat(state['data_chop'], save=False))
+    run('best_TP', lambda: visual.best_TP(state['data_stat'][0]))
+    if 'data_compile' in stages:
+        # four prepared samples (fluid x fill ratio) of the benchmark data
+        with contextlib.redirect_stdout(io.StringIO()):
+            ml = MachineLearning(os.path.join(root, ''))
+            prepared = write_result(state['gibbs_fe'], os.path.join(root, 'gfe_bench.csv'), fmt=ml.fmt)
+            for fluid in ['DI_Water', 'Al2O3_DI_Water']:
+                for fr in [40, 60]:
+                    ml.data_prep(prepared, fluid, fr)
+        run('data_compile', lambda: ml.data_compile())
+
+    def plot(draw):
+        draw()
+        plt.savefig(io.BytesIO(), format='png')
+        plt.close('all')
+    run('plot_all_data', lambda: plot(lambda: visual.plot_all_data(state['etl'])))
+    run('plot_eu', lambda: plot(lambda: visual.plot_eu(*state['data_stat'], 'Tc[K]')))
+    return results
+
+def scaling(df_results:pd.DataFrame):
+    """
+    scaling returns the empirical scaling exponent of every stage between the two largest sizes: time ~ rows^exponent
+    (1: linear; clearly above 1: super-linear scaling).
+    """
+    exponents = {}
+    for stage, df_stage in df_results.groupby('stage', sort=False):
+        df_stage = df_stage.sort_values('rows')
+        if len(df_stage) < 2:
+            continue
+        (n1, t1), (n2, t2) = df_stage[['rows', 'time_s']].to_numpy()[-2:]
+        exponents[stage] = np.log(t2 / t1) / np.log(n2 / n1) if t1 > 0 and t2 > 0 else np.nan
+    return pd.Series(exponents, name='exponent')
+
+def compare(df_results:pd.DataFrame, df_baseline:pd.DataFrame, tolerance=1.5, min_time=0.05):
+    """
+    compare joins the results with a baseline run (same rows and stage) and returns the time ratios;
+    the 'regression' column marks stages slower than tolerance x baseline (ignoring stages faster than min_time seconds).
+    """
+    df = df_results.merge(df_baseline[['rows', 'stage', 'time_s', 'peak_MB']], on=['rows', 'stage'], suffixes=('', '_baseline'))
+    df['time_ratio'] = df['time_s'] / df['time_s_baseline']
+    df['regression'] = (df['time_ratio'] > tolerance) & (df['time_s'] > min_time)
+    return df
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark time and peak memory of the PHP analysis stages on synthetic data of growing size.")
+    parser.add_argument('--sizes', default='1e3,1e4,1e5', help="comma separated rows per experiment directory (default: 1e3,1e4,1e5)")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"comma separated stages (default: {','.join(STAGES)})")
+    parser.add_argument('--fmt', choices=['xlsx', 'csv'], default=None, help=f"data file format (default: xlsx up to {XLSX_LIMIT} rows, csv above)")
+    parser.add_argument('--workdir', default=None, help="directory for the synthetic data, re-used between runs (default: temporary)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory (tracemalloc) runs")
+    parser.add_argument('--output', default='bench_results.json', help="results file (default: bench_results.json)")
+    parser.add_argument('--baseline', default=None, help="results file of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="time ratio to the baseline reported as regression (default: 1.5)")
+    args = parser.parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='php_bench_')
+    stages = args.stages.split(',')
+    results = []
+    try:
+        for size in args.sizes.split(','):
+            n_rows = int(float(size))
+            print(f"Benchmarking {n_rows} rows ...")
+            results += run_size(n_rows, workdir, fmt=args.fmt, stages=stages, memory=not args.no_memory)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    df_results = pd.DataFrame(results)
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.4f}'.format):
+        print("\nTime [s]")
+        print(df_results.pivot(index='stage', columns='rows', values='time_s').reindex(stages).join(scaling(df_results)))
+        if not args.no_memory:
+            print("\nPeak memory [MB]")
+            print(df_results.pivot(index='stage', columns='rows', values='peak_MB').reindex(stages))
+    with open(args.output, 'w') as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                   'numpy': np.__version__, 'pandas': pd.__version__, 'results': results}, f, indent=2)
+    print(f"\nBenchmark results saved at: {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            df_baseline = pd.DataFrame(json.load(f)['results'])
+        df_compare = compare(df_results, df_baseline, args.tolerance)
+        with pd.option_context('display.width', 200, 'display.float_format', '{:.4f}'.format):
+            print(df_compare[['rows', 'stage', 'time_s', 'time_s_baseline', 'time_ratio', 'regression']].to_string(index=False))
+        if df_compare['regression'].any():
+            print(f"{int(df_compare['regression'].sum())} stages slower than {args.tolerance} x baseline")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+## Startup-time regression check for the PHP modules
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# modules imported by batch workers and CLI invocations, and packages they must not load at import
+MODULES = ['analysis', 'mdf', 'ml_solution_module', 'pipeline', 'batch', 'monitor', 'writer', 'ml_server', 'spectral', 'steady', 'store',
+           'profiling']
+HEAVY_PACKAGES = ['matplotlib', 'seaborn', 'sklearn', 'missingno', 'scipy']
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed_s': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def import_time(module:str, repeat=3):
+    """
+    import_time imports module in repeat fresh interpreters and returns the best import time [s]
+    and the heavy packages (HEAVY_PACKAGES) loaded by the import.
+
+    useage: elapsed, loaded = import_time('analysis')
+    """
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_PACKAGES)],
+                                cwd=REPO, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return min(result['elapsed_s'] for result in results), results[0]['loaded']
+
+def check(modules=MODULES, budget=1.5, repeat=3):
+    """
+    check measures the import time of every module and returns a list of failures: modules loading a heavy package
+    or taking longer than budget seconds.
+
+    useage: failures = check(budget=1.5)
+    """
+    failures = []
+    for module in modules:
+        elapsed, loaded = import_time(module, repeat)
+        status = 'ok'
+        if loaded:
+            status = f"loads {loaded}"
+        elif elapsed > budget:
+            status = f"slower than {budget} s"
+        print(f"{module:20s} {elapsed:7.3f} s  {status}")
+        if status != 'ok':
+            failures.append((module, status))
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the PHP modules import fast and without plotting/ML packages.")
+    parser.add_argument('modules', nargs='*', default=MODULES, help="modules to check (default: all)")
+    parser.add_argument('--budget', type=float, default=1.5, help="maximum import time per module [s] (default: 1.5)")
+    parser.add_argument('--repeat', type=int, default=3, help="fresh interpreters per module, best time is used (default: 3)")
+    args = parser.parse_args(argv)
+    failures = check(args.modules, args.budget, args.repeat)
+    print(f"{len(failures)} import time regressions" if failures else "No import time regressions")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
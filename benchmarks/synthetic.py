@@ -0,0 +1,131 @@
+## Synthetic PHP logger data for benchmarks
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# working fluids and fill ratios of the sample campaigns (data/), and their thermal resistance [K/W] at 40 W and 50 % fill ratio
+FLUIDS = {'DI_Water': 0.5, 'Al2O3_DI_Water': 0.42}
+FILL_RATIOS = [40, 60]
+Q_LEVELS = [40, 60, 80, 100, 120]
+# largest number of data rows of an xlsx sheet
+XLSX_MAX_ROWS = 1048575
+N_CONDENSER = 4
+N_EVAPORATOR = 5
+
+def _saturation_pressure(T):
+    # Antoine equation of water [mmHg], T [oC]
+    return 10 ** (8.07131 - 1730.63 / (233.426 + T))
+
+def synthetic_run(n_rows:int, fluid='DI_Water', fr=40, q_levels=Q_LEVELS, seed=0, start=0, stop=None, dt=0.5, T_amb=23.0):
+    """
+    synthetic_run returns rows start:stop of a synthetic PHP experiment with n_rows logger samples (every dt minutes)
+    in the column layout of the logger workbooks (condenser/evaporator channels, averages, pressure, Q, resistance).
+
+    The heat input steps through q_levels in equal segments; Te and Tc approach their steady state of every level
+    with a first-order response, pulsate with a Q-dependent amplitude and period and carry sensor noise.
+    The thermal resistance falls with the heat input (as in data/di_heat_inputs_6ofr) and depends on fluid and fill ratio;
+    the pressure follows the saturation pressure of water at Te plus a non-condensable offset.
+    The noise is seeded by (seed, start), so a long run can be generated chunk by chunk reproducibly.
+
+    useage: df = synthetic_run(100000, fluid='Al2O3_DI_Water', fr=60)
+    """
+    stop = n_rows if stop is None else min(stop, n_rows)
+    rng = np.random.default_rng([seed, start])
+    i = np.arange(start, stop)
+    t = i * dt
+    # heat input segments and first-order response to every segment's steady state
+    n_levels = len(q_levels)
+    segment = np.minimum(i * n_levels // max(n_rows, 1), n_levels - 1)
+    Q = np.asarray(q_levels, dtype=np.float64)
+    R_eff = FLUIDS.get(fluid, 0.5) * (1 + 0.5 * abs(fr - 50) / 50) * (40 / Q) ** 0.8
+    Tc_ss = T_amb + 0.63 * Q
+    Te_ss = Tc_ss + R_eff * Q
+    t_start = np.arange(n_levels) * n_rows // n_levels * dt
+    tau = 8.0
+    Te_0, Tc_0 = np.empty(n_levels), np.empty(n_levels)
+    Te_0[0], Tc_0[0] = T_amb, T_amb
+    for k in range(1, n_levels):
+        decay = np.exp(-(t_start[k] - t_start[k - 1]) / tau)
+        Te_0[k] = Te_ss[k - 1] + (Te_0[k - 1] - Te_ss[k - 1]) * decay
+        Tc_0[k] = Tc_ss[k - 1] + (Tc_0[k - 1] - Tc_ss[k - 1]) * decay
+    decay = np.exp(-(t - t_start[segment]) / tau)
+    Te = Te_ss[segment] + (Te_0[segment] - Te_ss[segment]) * decay
+    Tc = Tc_ss[segment] + (Tc_0[segment] - Tc_ss[segment]) * decay
+    # pulsating flow: amplitude grows and period shortens with the heat input
+    amplitude = 0.02 * Q[segment]
+    period = 3.0 - 1.5 * segment / max(n_levels - 1, 1)
+    phase = 2 * np.pi * t / period
+    Te = Te + amplitude * np.sin(phase)
+    Tc = Tc + 0.4 * amplitude * np.sin(phase - 0.8)
+    # channels (integer logger readings) and their averages
+    Te_ch = np.rint(Te[:, None] + np.linspace(-1.5, 1.5, N_EVAPORATOR) + rng.normal(0, 0.6, (len(i), N_EVAPORATOR)))
+    Tc_ch = np.rint(Tc[:, None] + np.linspace(-1.0, 1.0, N_CONDENSER) + rng.normal(0, 0.4, (len(i), N_CONDENSER)))
+    Te_avg = Te_ch.mean(axis=1)
+    Tc_avg = Tc_ch.mean(axis=1)
+    P = np.rint(220 + 0.2 * fr + 1.4 * _saturation_pressure(Te_avg) + rng.normal(0, 3, len(i)))
+    columns = {'Time (Min)': t}
+    columns.update({f'Condenser {k + 1} (oC)': Tc_ch[:, k] for k in range(N_CONDENSER)})
+    columns['Tc - AVG (oC)'] = Tc_avg
+    columns.update({f'Evaporator {k + 1} (oC)': Te_ch[:, k] for k in range(N_EVAPORATOR)})
+    columns['Te - AVG (oC)'] = Te_avg
+    columns['Pressure (mm of Hg)'] = P
+    columns['Te - Tc (oC)'] = Te_avg - Tc_avg
+    columns['Q (W)'] = Q[segment]
+    columns['Resistance (oC/W)'] = (Te_avg - Tc_avg) / Q[segment]
+    return pd.DataFrame(columns, index=pd.RangeIndex(start, stop))
+
+def write_run(filename:str, n_rows:int, chunksize=1000000, **kwargs):
+    """
+    write_run writes a synthetic experiment (see synthetic_run) as logger workbook (.xlsx, with the 'Avg' summary row of the logger)
+    or as csv file, generated in chunks of chunksize rows so memory use does not depend on n_rows.
+
+    useage: write_run("bench/DI_Water/40_FR/php_exp1.csv", 10**7, fluid='DI_Water', fr=40)
+    """
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    if filename.endswith('.xlsx'):
+        assert n_rows < XLSX_MAX_ROWS, f"xlsx sheets hold at most {XLSX_MAX_ROWS} rows; use csv for {n_rows} rows"
+        df = synthetic_run(n_rows, **kwargs)
+        summary = df.mean().to_frame().T.astype(object)
+        summary['Time (Min)'] = 'Avg'
+        pd.concat([df.astype(object), summary], ignore_index=True).to_excel(filename, index=False)
+        return filename
+    for start in range(0, max(n_rows, 1), chunksize):
+        df = synthetic_run(n_rows, start=start, stop=start + chunksize, **kwargs)
+        df.to_csv(filename, mode='w' if start == 0 else 'a', header=(start == 0), index=False)
+    return filename
+
+def write_dataset(root:str, n_rows:int, n_files=4, fluids=list(FLUIDS), fill_ratios=FILL_RATIOS, fmt='xlsx', chunksize=1000000, seed=0):
+    """
+    write_dataset writes a synthetic campaign below root in the layout of data/: root/<fluid>/<FR>_FR/php_<fluid>_<FR>fr_exp<k>.<fmt>,
+    with n_rows rows per experiment directory split over n_files experiments. Returns the list of experiment directories.
+
+    useage: datapaths = write_dataset("bench/", 10**5, fmt='xlsx')
+    """
+    datapaths = []
+    for fluid in fluids:
+        for fr in fill_ratios:
+            datapath = os.path.join(root, fluid, f'{fr}_FR', '')
+            for k in range(n_files):
+                n_file = n_rows // n_files + (k < n_rows % n_files)
+                filename = os.path.join(datapath, f'php_{fluid.lower()}_{fr}fr_exp{k + 1}.{fmt}')
+                write_run(filename, n_file, chunksize=chunksize, fluid=fluid, fr=fr, seed=seed + k)
+            datapaths.append(datapath)
+    return datapaths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic PHP logger data (xlsx workbooks or csv files) in the layout of data/.")
+    parser.add_argument('root', help="output directory")
+    parser.add_argument('--rows', type=float, default=1e4, help="rows per experiment directory, eg. 1e6 (default: 1e4)")
+    parser.add_argument('--files', type=int, default=4, help="experiments per directory (default: 4)")
+    parser.add_argument('--fmt', choices=['xlsx', 'csv'], default='xlsx', help="file format (default: xlsx; csv for more than 10^6 rows)")
+    parser.add_argument('--fluids', default=','.join(FLUIDS), help=f"comma separated fluids (default: {','.join(FLUIDS)})")
+    parser.add_argument('--fill-ratios', default=','.join(map(str, FILL_RATIOS)), help="comma separated fill ratios [%%] (default: 40,60)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    datapaths = write_dataset(args.root, int(args.rows), args.files, args.fluids.split(','), [int(fr) for fr in args.fill_ratios.split(',')],
+                              fmt=args.fmt, seed=args.seed)
+    print(f"Synthetic data written to {len(datapaths)} experiment directories below: {args.root}")
+
+if __name__ == '__main__':
+    main()
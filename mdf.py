@@ -2,10 +2,8 @@ import numpy as np
 import pandas as pd
 from os import listdir
 import os
-import glob
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set()
+from analysis import logger_files, read_logger_files, gibbs_frame, decimate_idx, eu_envelope, plt
+from profiling import profiled
 
 class mdf:
     """
@@ -47,24 +45,20 @@ class mdf:
         print(f"Loading data from: {datapath}")
 
     # data ETL
-    def DataETL(datapath: str):
+    @profiled
+    def DataETL(datapath: str, n_workers=1):
         """
         DataETL loads experimental data from all experimental data files (xlsx).
-        Filters data and keeps only important columns.
+        Filters data and keeps only important columns; each row is tagged with its source file.
         Combine selected data and save to csv file.
         Conver units to MKS [K, bar] system and save to csv file. 
 
         useage: df, df_conv = DataETL('datapath')
+                df, df_conv = DataETL('datapath', n_workers=4) # parallel loading
         """
-        data_filenames_list = glob.glob((datapath + 'php_*.xlsx'))
-        df_frames = []
-        for i in range(0, len(data_filenames_list)) :
-            # loading data in loop
-            df_raw = pd.read_excel((data_filenames_list[i]))
-            selected_columns = ['Time (Min)', 'Tc - AVG (oC)', 'Te - AVG (oC)', 'Pressure (mm of Hg)', 'Te - Tc (oC)', 'Q (W)','Resistance (oC/W)']
-            df_selected_columns = df_raw[selected_columns]
-            df_frames.append(df_selected_columns)
-            df = pd.concat(df_frames, axis=0, ignore_index=True).dropna()
+        data_filenames_list = logger_files(datapath, 'php_*.xlsx')
+        assert data_filenames_list, f"No experimental data files (xlsx) found at: {datapath}"
+        df = read_logger_files(data_filenames_list, n_workers=n_workers)
         # converting data to MKS
         df_conv_fram = [df['Time (Min)'], df['Te - AVG (oC)']+mdf.T_k, df['Tc - AVG (oC)']+mdf.T_k, df['Te - Tc (oC)'] , df['Pressure (mm of Hg)']/mdf.P_const, df['Resistance (oC/W)']]
         df_conv = pd.concat(df_conv_fram, axis=1, ignore_index=True).dropna()
@@ -77,7 +71,8 @@ class mdf:
         return df, df_conv
     
     # calculation of Gibbs Free Energy
-    def GibbsFE(data, datapath:str):
+    @profiled
+    def GibbsFE(data, datapath:str, save=True, dtype=np.float64):
         """
         GibbsFE calculates chagne in gibbs free energy at a given vacuum pressure and temperature of PHP
         dG = dG' + RTln(P/P')
@@ -86,21 +81,16 @@ class mdf:
         T = Temperature [K]
 
         useage: df = GibbsFE(data)
+                df = GibbsFE(data, datapath, save=False, dtype=np.float32)
         """
-        Te = (data['Te[K]']) 
-        Tc = (data['Tc[K]'])  
-        P_vacuum = (data['P[bar]']) # converting to bar
-        dG_vacuume_Te = mdf.R_const * Te * np.log(P_vacuum/mdf.P_standard)
-        dG_vacuume_Tc = mdf.R_const * Tc * np.log(P_vacuum/mdf.P_standard)
-        dG = dG_vacuume_Te - dG_vacuume_Tc
-        selected_columns = ['t(min)' ,'Te[K]', 'Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]', 'GFE [KJ/mol]', 'GFE_Tc [KJ/mol]', 'dG [KJ/mol]']
-        data = pd.concat([data, dG_vacuume_Te, dG_vacuume_Tc, dG], axis=1, ignore_index=True)
-        data.columns = selected_columns
-        data_out = data.to_csv(datapath + "gfe_combined.csv")
-        msg = print(f"Gibbs Free Energy calculated data saved at: {datapath}'gfe_combined.csv")
+        data = gibbs_frame(data, ['GFE [KJ/mol]', 'GFE_Tc [KJ/mol]', 'dG [KJ/mol]'], dtype=dtype, R_const=mdf.R_const, P_standard=mdf.P_standard)
+        if save:
+            data_out = data.to_csv(datapath + "gfe_combined.csv")
+            msg = print(f"Gibbs Free Energy calculated data saved at: {datapath}'gfe_combined.csv")
         return data
     
     # To select data from specific Te range
+    @profiled
     def DataChop(data, Tmin=300, Tmax=400):
         """ 
         DataChop function used to chop the data for the selected temperature value from the Te[K] column.
@@ -118,6 +108,7 @@ class mdf:
         return data_T
     
     # data mixing and re-arranging
+    @profiled
     def DataArrange(data, path:str):
         """
         DataArrange sorts and arrange value by group from the experimental data loaded with DataETL function, calculates mean and standard deviation of the grouped data.
@@ -133,6 +124,7 @@ class mdf:
         return df_mean, df_std
     
     # prepare average values for all thermal properties
+    @profiled
     def DataPropAvg(df_mean, df_std):
         """
         DataPropAvg calculates average values of measured thermal properties for given experiment data.
@@ -160,6 +152,7 @@ class mdf:
         return print(msg)
     
     # find optimal G(T,P) of PHP
+    @profiled
     def BestTP(data):
         """ 
         BestTP finds best G(T,P) with lowest dG (Change in Gibbs Free Energy for Te->Tc values at constant Pressure) from the experimental dataset.
@@ -204,103 +197,117 @@ class mdf:
                                       ylabel='Temperature[K]')
         return
     
-    def PlotEUTemp(df_mean, df_std):
+    def PlotEUTemp(df_mean, df_std, max_points=2000):
         """ Data plotting 
             Plotfunction(df_mean, df_std)
+            points and uncertainty band are reduced to about max_points (min/max decimation); max_points=None draws everything
         """
         plt.figure(figsize=(10,5));
-        plt.plot(df_mean['Te[K]'].index, df_mean['Te[K]'], '.b', label='Te-avg')
-        plt.plot(df_mean['Tc[K]'].index, df_mean['Tc[K]'], '.k', label='Tc-avg' )
+        df_points = df_mean.iloc[decimate_idx(df_mean[['Te[K]', 'Tc[K]']].to_numpy(), max_points)]
+        plt.plot(df_points['Te[K]'].index, df_points['Te[K]'], '.b', label='Te-avg')
+        plt.plot(df_points['Tc[K]'].index, df_points['Tc[K]'], '.k', label='Tc-avg' )
         idx = df_std.index
         df_mean_idx = df_mean.loc[idx]
-        plt.fill_between(df_std['Tc[K]'].index, df_mean_idx['Tc[K]'] - 2* df_std['Tc[K]'], df_mean_idx['Tc[K]'] + 2* df_std['Tc[K]'],color='r', alpha=0.2, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_std['Tc[K]'].index, df_mean_idx['Tc[K]'] - 2* df_std['Tc[K]'], df_mean_idx['Tc[K]'] + 2* df_std['Tc[K]'], max_points), color='r', alpha=0.2, label='Expanded Uncertainty')
         plt.xlabel('Data')
         plt.ylabel('Temperature[K]')
         plt.legend()
         return
     
-    def PlotEUPres(df_mean, df_std):
+    def PlotEUPres(df_mean, df_std, max_points=2000):
         """ Data plotting 
             Plotfunction(df_mean, df_std)
+            points and uncertainty band are reduced to about max_points (min/max decimation); max_points=None draws everything
         """
         plt.figure(figsize=(10,5));
-        plt.plot(df_mean['P[bar]'].index, df_mean['P[bar]'], '.k', label='Pressure [bar]' )
+        df_points = df_mean.iloc[decimate_idx(df_mean[['P[bar]']].to_numpy(), max_points)]
+        plt.plot(df_points['P[bar]'].index, df_points['P[bar]'], '.k', label='Pressure [bar]' )
         idx = df_std.index
         df_mean_idx = df_mean.loc[idx]
-        plt.fill_between(df_std['P[bar]'].index, df_mean_idx['P[bar]'] - 2* df_std['P[bar]'], df_mean_idx['P[bar]'] + 2* df_std['P[bar]'],color='g', alpha=0.2, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_std['P[bar]'].index, df_mean_idx['P[bar]'] - 2* df_std['P[bar]'], df_mean_idx['P[bar]'] + 2* df_std['P[bar]'], max_points), color='g', alpha=0.2, label='Expanded Uncertainty')
         plt.xlabel('Data')
         plt.ylabel('Pressure[bar]')
         plt.legend()
         return
     
-    def PlotEUTR(df_mean, df_std):
+    def PlotEUTR(df_mean, df_std, max_points=2000):
         """ Data plotting 
             Plotfunction(df_mean, df_std)
+            points and uncertainty band are reduced to about max_points (min/max decimation); max_points=None draws everything
         """
         plt.figure(figsize=(10,5));
-        plt.plot(df_mean['Te[K]'], df_mean['TR[K/W]'], '.k', label='Thermal Resistance [C/W]' )
+        df_points = df_mean.iloc[decimate_idx(df_mean[['TR[K/W]']].to_numpy(), max_points)]
+        plt.plot(df_points['Te[K]'], df_points['TR[K/W]'], '.k', label='Thermal Resistance [C/W]' )
         idx = df_std.index
         df_mean_idx = df_mean.loc[idx]
-        plt.fill_between(df_std['Te[K]'], df_mean_idx['TR[K/W]'] - 2* df_std['TR[K/W]'], df_mean_idx['TR[K/W]'] + 2* df_std['TR[K/W]'],color='m', alpha=0.2, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_std['Te[K]'], df_mean_idx['TR[K/W]'] - 2* df_std['TR[K/W]'], df_mean_idx['TR[K/W]'] + 2* df_std['TR[K/W]'], max_points), color='m', alpha=0.2, label='Expanded Uncertainty')
         plt.xlabel('Temperature [K]')
         plt.ylabel('Thermal Resistance [K/C]')
         plt.legend()
         return
     
-    def PlotEUTP(df_mean, df_std):
+    def PlotEUTP(df_mean, df_std, max_points=2000):
         """ Data plotting 
             Plotfunction(df_mean, df_std)
+            points and uncertainty band are reduced to about max_points (min/max decimation); max_points=None draws everything
         """
         plt.figure(figsize=(10,5));
-        plt.plot(df_mean['Te[K]'], df_mean['P[bar]'],'.g', label='Temperature[Te] vs Pressure')
+        df_points = df_mean.iloc[decimate_idx(df_mean[['P[bar]']].to_numpy(), max_points)]
+        plt.plot(df_points['Te[K]'], df_points['P[bar]'],'.g', label='Temperature[Te] vs Pressure')
         idx = df_std.index
         df_mean_idx = df_mean.loc[idx]
-        plt.fill_between(df_mean_idx['Te[K]'],df_mean_idx['P[bar]'] - 2* df_std['P[bar]'], df_mean_idx['P[bar]'] + 2* df_std['P[bar]'], color='r', alpha=0.2, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_mean_idx['Te[K]'], df_mean_idx['P[bar]'] - 2* df_std['P[bar]'], df_mean_idx['P[bar]'] + 2* df_std['P[bar]'], max_points), color='r', alpha=0.2, label='Expanded Uncertainty')
         plt.xlabel('Temperature-Te[K]')
         plt.ylabel('Pressure[bar]')
         plt.legend()
         return
 
-    def PlotEUGFE(df_mean, df_std):
+    def PlotEUGFE(df_mean, df_std, max_points=2000):
         """ Data plotting 
             Plotfunction(df_mean, df_std)
+            points and uncertainty band are reduced to about max_points (min/max decimation); max_points=None draws everything
         """
         plt.figure(figsize=(10,5));
-        plt.plot(df_mean['Te[K]'], df_mean['GFE [KJ/mol]'], '.k', label='dG-Te [KJ/mol]')
-        plt.plot(df_mean['Te[K]'], df_mean['GFE_Tc [KJ/mol]'], '.r', label='dG-Tc [KJ/mol]')
+        df_points = df_mean.iloc[decimate_idx(df_mean[['GFE [KJ/mol]', 'GFE_Tc [KJ/mol]']].to_numpy(), max_points)]
+        plt.plot(df_points['Te[K]'], df_points['GFE [KJ/mol]'], '.k', label='dG-Te [KJ/mol]')
+        plt.plot(df_points['Te[K]'], df_points['GFE_Tc [KJ/mol]'], '.r', label='dG-Tc [KJ/mol]')
         idx = df_std.index
         df_mean_idx = df_mean.loc[idx]
-        plt.fill_between(df_mean_idx['Te[K]'],df_mean_idx['GFE [KJ/mol]'] - 2* df_std['GFE [KJ/mol]'], df_mean_idx['GFE [KJ/mol]'] + 2* df_std['GFE [KJ/mol]'], color='g', alpha=0.3, label='Expanded Uncertainty')
-        plt.fill_between(df_mean_idx['Te[K]'],df_mean_idx['GFE_Tc [KJ/mol]'] - 2* df_std['GFE_Tc [KJ/mol]'], df_mean_idx['GFE_Tc [KJ/mol]'] + 2* df_std['GFE_Tc [KJ/mol]'], color='r', alpha=0.2, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_mean_idx['Te[K]'], df_mean_idx['GFE [KJ/mol]'] - 2* df_std['GFE [KJ/mol]'], df_mean_idx['GFE [KJ/mol]'] + 2* df_std['GFE [KJ/mol]'], max_points), color='g', alpha=0.3, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_mean_idx['Te[K]'], df_mean_idx['GFE_Tc [KJ/mol]'] - 2* df_std['GFE_Tc [KJ/mol]'], df_mean_idx['GFE_Tc [KJ/mol]'] + 2* df_std['GFE_Tc [KJ/mol]'], max_points), color='r', alpha=0.2, label='Expanded Uncertainty')
         plt.xlabel('Temperature - Te [K]')
         plt.ylabel('Change in Gibbs Free Energy [KJ/mol]')
         plt.legend()
         return
     
-    def PlotEUdG(df_mean, df_std):
+    def PlotEUdG(df_mean, df_std, max_points=2000):
         """ Data plotting 
             Plotfunction(df_mean, df_std)
+            points and uncertainty band are reduced to about max_points (min/max decimation); max_points=None draws everything
         """
         plt.figure(figsize=(10,5));
-        plt.plot(df_mean['Te[K]'], df_mean['dG [KJ/mol]'], '.k', label='dG-Te [KJ/mol]')
+        df_points = df_mean.iloc[decimate_idx(df_mean[['dG [KJ/mol]']].to_numpy(), max_points)]
+        plt.plot(df_points['Te[K]'], df_points['dG [KJ/mol]'], '.k', label='dG-Te [KJ/mol]')
         idx = df_std.index
         df_mean_idx = df_mean.loc[idx]
-        plt.fill_between(df_mean_idx['Te[K]'],df_mean_idx['dG [KJ/mol]'] - 2* df_std['dG [KJ/mol]'], df_mean_idx['dG [KJ/mol]'] + 2* df_std['dG [KJ/mol]'], color='g', alpha=0.3, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_mean_idx['Te[K]'], df_mean_idx['dG [KJ/mol]'] - 2* df_std['dG [KJ/mol]'], df_mean_idx['dG [KJ/mol]'] + 2* df_std['dG [KJ/mol]'], max_points), color='g', alpha=0.3, label='Expanded Uncertainty')
         plt.ylim(-200,100)
         plt.xlabel('Temperature - Te [K]')
         plt.ylabel('Change in Gibbs Free Energy [KJ/mol]')
         plt.legend()
         return
     
-    def PlotEUdT(df_mean, df_std):
+    def PlotEUdT(df_mean, df_std, max_points=2000):
         """ Data plotting 
             Plotfunction(df_mean, df_std)
+            points and uncertainty band are reduced to about max_points (min/max decimation); max_points=None draws everything
         """
         plt.figure(figsize=(10,5));
-        plt.plot(df_mean['Te[K]'], df_mean['dT[K]'], '.k', label='dT[K]')
+        df_points = df_mean.iloc[decimate_idx(df_mean[['dT[K]']].to_numpy(), max_points)]
+        plt.plot(df_points['Te[K]'], df_points['dT[K]'], '.k', label='dT[K]')
         idx = df_std.index
         df_mean_idx = df_mean.loc[idx]
-        plt.fill_between(df_mean_idx['Te[K]'],df_mean_idx['dT[K]'] - 2* df_std['dT[K]'], df_mean_idx['dT[K]'] + 2* df_std['dT[K]'], color='r', alpha=0.3, label='Expanded Uncertainty')
+        plt.fill_between(*eu_envelope(df_mean_idx['Te[K]'], df_mean_idx['dT[K]'] - 2* df_std['dT[K]'], df_mean_idx['dT[K]'] + 2* df_std['dT[K]'], max_points), color='r', alpha=0.3, label='Expanded Uncertainty')
         plt.xlabel('Temperature - Te [K]')
         plt.ylabel('Change in Temperature [K]')
         plt.legend()
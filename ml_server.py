@@ -0,0 +1,239 @@
+## PHP prediction service
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+
+## Prediction Server
+class PredictionServer:
+    """
+    ## PredictionServer serves a trained PHP model over HTTP on localhost:
+    (Te[K], P[bar], Fluid, FR) -> (Tc[K], TR[K/W], dG[KJ/mol])
+
+    Concurrent requests are collected for up to max_wait seconds (or max_batch rows) and answered with one vectorised
+    model.predict call. Request, batch and latency counters are available with stats() or GET /stats.
+    Requests are rejected once the server is stopped, and fail after timeout seconds or when the batching thread fails.
+
+    ## useage:
+    ### importing module
+    from ml_server import PredictionServer, predict_remote
+    ### starting the server with a model from MachineLearning.train_model / load_model
+    server = PredictionServer(model, port=8000).start()
+    ### querying from any client
+    predict_remote(server.url, [{'Te[K]': 330.0, 'P[bar]': 0.4, 'Fluid': 'DI_Water', 'FR': 60}])
+    ### counters and shutdown
+    server.stats()
+    server.stop()
+
+    ## endpoints
+    1. POST /predict  {"records": [{...}, ...]} -> {"predictions": [{...}, ...]}
+    2. GET  /stats
+    """
+    def __init__(self, model, x=None, y=None, host='127.0.0.1', port=0, max_batch=4096, max_wait=0.002, timeout=30):
+        self.model = model
+        self.x = x or getattr(model, 'php_features_', ['Te[K]', 'P[bar]', 'Fluid', 'FR'])
+        self.y = y or getattr(model, 'php_targets_', ['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]'])
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=10000)
+        self._counters = {'requests': 0, 'rows': 0, 'batches': 0, 'errors': 0}
+        self._started = None
+        self._running = False
+        self._error = None # exception of a failed batching thread
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self.url = f"http://{host}:{self._httpd.server_address[1]}"
+
+    def start(self):
+        """ start runs the batching thread and the HTTP server in background threads """
+        self._started = time.perf_counter()
+        self._running = True
+        threading.Thread(target=self._batch_worker, name='PredictionBatcher', daemon=True).start()
+        threading.Thread(target=self._httpd.serve_forever, name='PredictionServer', daemon=True).start()
+        print(f"Prediction server running at {self.url}")
+        return self
+
+    def stop(self):
+        """ stop shuts the HTTP server down (also if it was never started); requests queued before are still answered, later requests are rejected """
+        if self._started is not None:
+            # shutdown waits for serve_forever, which only runs after start
+            self._httpd.shutdown()
+        self._httpd.server_close()
+        with self._lock:
+            if self._running:
+                self._running = False
+                self._queue.put(None)
+
+    def predict(self, records, timeout=None):
+        """
+        predict queues records (list of dicts or DataFrame with the feature columns) for the next batch and returns
+        the predictions as a DataFrame. Used by the HTTP endpoint; can be called from many threads.
+        Raises RuntimeError if the server is not running, TimeoutError after timeout seconds (default: self.timeout),
+        and the exception of model.predict (or of the batching thread) if the batch failed.
+        """
+        data = pd.DataFrame(records)[self.x]
+        request = {'data': data, 'done': threading.Event(), 'start': time.perf_counter()}
+        with self._lock:
+            if self._error is not None:
+                raise RuntimeError("Prediction server batching thread failed") from self._error
+            if not self._running:
+                raise RuntimeError("Prediction server is not running")
+            self._queue.put(request)
+        if not request['done'].wait(self.timeout if timeout is None else timeout):
+            raise TimeoutError(f"No prediction within {self.timeout if timeout is None else timeout} s")
+        if 'error' in request:
+            raise request['error']
+        return request['result']
+
+    def stats(self):
+        """ stats returns request/row/batch counters, throughput and latency percentiles [ms] """
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = np.array(self._latencies) * 1000
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        counters['rows_per_batch'] = counters['rows'] / counters['batches'] if counters['batches'] else 0.0
+        counters['rows_per_s'] = counters['rows'] / elapsed if elapsed else 0.0
+        for name, q in [('latency_p50[ms]', 50), ('latency_p95[ms]', 95), ('latency_p99[ms]', 99)]:
+            counters[name] = float(np.percentile(latencies, q)) if len(latencies) else 0.0
+        counters['latency_max[ms]'] = float(latencies.max()) if len(latencies) else 0.0
+        return counters
+
+    def _batch_worker(self):
+        batch = []
+        try:
+            self._collect_batches(batch)
+        except Exception as e:
+            # failing the current and all queued requests, and rejecting new ones
+            with self._lock:
+                self._error = e
+                self._running = False
+            while True:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not None:
+                    batch.append(request)
+            for request in batch:
+                if not request['done'].is_set():
+                    request['error'] = e
+                    request['done'].set()
+
+    def _collect_batches(self, batch:list):
+        while True:
+            batch.clear()
+            request = self._queue.get()
+            if request is None:
+                return
+            batch.append(request)
+            rows = len(request['data'])
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+                rows += len(request['data'])
+            self._run_batch(batch)
+
+    def _run_batch(self, batch:list):
+        lengths = [len(request['data']) for request in batch]
+        try:
+            data = pd.concat([request['data'] for request in batch], ignore_index=True)
+            prediction = np.asarray(self.model.predict(data)).reshape(len(data), -1)
+            results = pd.DataFrame(prediction, columns=self.y)
+        except Exception as e:
+            for request in batch:
+                request['error'] = e
+                request['done'].set()
+            with self._lock:
+                self._counters['errors'] += len(batch)
+            return
+        end = time.perf_counter()
+        offsets = np.cumsum([0] + lengths)
+        for request, start, stop in zip(batch, offsets[:-1], offsets[1:]):
+            request['result'] = results.iloc[start:stop].reset_index(drop=True)
+            request['done'].set()
+        with self._lock:
+            self._counters['requests'] += len(batch)
+            self._counters['rows'] += int(offsets[-1])
+            self._counters['batches'] += 1
+            self._latencies.extend(end - request['start'] for request in batch)
+
+def _handler(server:PredictionServer):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/predict':
+                return self._reply(404, {'error': f"Unknown endpoint {self.path}"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                records = body['records'] if isinstance(body, dict) else body
+                predictions = server.predict(records)
+            except (RuntimeError, TimeoutError) as e:
+                return self._reply(503, {'error': f"{type(e).__name__}: {e}"})
+            except Exception as e:
+                return self._reply(400, {'error': f"{type(e).__name__}: {e}"})
+            self._reply(200, {'predictions': predictions.to_dict(orient='records')})
+
+        def do_GET(self):
+            if self.path != '/stats':
+                return self._reply(404, {'error': f"Unknown endpoint {self.path}"})
+            self._reply(200, server.stats())
+
+        def _reply(self, status:int, payload:dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+    return PredictionHandler
+
+def predict_remote(url:str, records:list, timeout=10):
+    """
+    predict_remote queries a PredictionServer and returns the predictions as a DataFrame.
+
+    useage: df_pred = predict_remote("http://127.0.0.1:8000", [{'Te[K]': 330.0, 'P[bar]': 0.4, 'Fluid': 'DI_Water', 'FR': 60}])
+    """
+    request = urllib.request.Request(url + '/predict', data=json.dumps({'records': records}).encode(),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return pd.DataFrame(json.loads(response.read())['predictions'])
+
+def main(argv=None):
+    from ml_solution_module import load_model
+    parser = argparse.ArgumentParser(description="Serve a trained PHP model (MachineLearning.save_model) over HTTP.")
+    parser.add_argument('model', help="model file, eg. data/ml_result/php_model.joblib")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=4096, help="maximum rows per predict call")
+    parser.add_argument('--max-wait', type=float, default=0.002, help="seconds to collect a batch")
+    args = parser.parse_args(argv)
+    server = PredictionServer(load_model(args.model), host=args.host, port=args.port, max_batch=args.max_batch, max_wait=args.max_wait).start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
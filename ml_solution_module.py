@@ -1,21 +1,127 @@
 # importing pkgs
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set()
 import os
-import missingno as msno
 import glob
+import json
+import hashlib
+import importlib.util
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from sklearn.feature_selection import mutual_info_regression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, r2_score
+from writer import FORMATS, get_writer, read_result, write_result
+from profiling import profiled
+# plotting and missingno are imported on first use, scikit-learn inside the functions using it
+from analysis import grouped_stats, lazy_import, plt, sns
+msno = lazy_import('missingno')
+
+# schema of the combined ML dataset: float32 physical properties, categorical Fluid, small-int FR (fill ratio in whole percent)
+ML_SCHEMA = {'t(min)': 'float32', 'Te[K]': 'float32', 'Tc[K]': 'float32', 'dT[K]': 'float32', 'P[bar]': 'float32', 'TR[K/W]': 'float32',
+             'GFE[KJ/mol]': 'float32', 'GFE_Tc[KJ/mol]': 'float32', 'dG[KJ/mol]': 'float32', 'Fluid': 'category', 'FR': 'int8'}
+# column titles of older gfe_combined.csv files (mdf.GibbsFE)
+ML_LEGACY_COLUMNS = {'GFE [KJ/mol]': 'GFE[KJ/mol]', 'GFE_Tc [KJ/mol]': 'GFE_Tc[KJ/mol]', 'dG [KJ/mol]': 'dG[KJ/mol]'}
+
+@profiled
+def apply_schema(data:pd.DataFrame):
+    """
+    apply_schema enforces ML_SCHEMA on the ML dataset: stray index columns ('Unnamed: 0') are removed, older column titles are merged
+    into the current ones, schema columns are cast to their dtype and other numeric columns to float32.
+    Fill ratios (FR) must be whole percent values in [0, 100], so the int8 cast does not truncate them.
+
+    usage:
+    df = apply_schema(df)
+    """
+    data = data.drop(columns=[column for column in data.columns if str(column).startswith('Unnamed:')])
+    for legacy, column in ML_LEGACY_COLUMNS.items():
+        if legacy in data.columns:
+            data[column] = data[column].fillna(data[legacy]) if column in data.columns else data[legacy]
+            data = data.drop(columns=legacy)
+    dtypes = {column: dtype for column, dtype in ML_SCHEMA.items() if column in data.columns}
+    if 'FR' in dtypes:
+        data['FR'] = pd.to_numeric(data['FR'])
+        fr = data['FR'].to_numpy(dtype=np.float64)
+        invalid = fr[(fr != np.round(fr)) | (fr < 0) | (fr > 100)]
+        assert not len(invalid), f"Fill ratio (FR) must be a whole percent value in [0, 100]: {np.unique(invalid).tolist()}"
+    dtypes.update({column: 'float32' for column in data.columns if column not in ML_SCHEMA and pd.api.types.is_numeric_dtype(data[column])})
+    columns = [column for column in ML_SCHEMA if column in data.columns] + [column for column in data.columns if column not in ML_SCHEMA]
+    return data[columns].astype(dtypes).reset_index(drop=True)
+
+@profiled
+def read_prepared(filename:str):
+    """
+    read_prepared loads one prepared data file (from MachineLearning.data_prep) in any result format with ML_SCHEMA enforced.
+
+    usage:
+    df = read_prepared("data/ml_result/all_combined_data_DI_Water_40.parquet")
+    """
+    return apply_schema(read_result(filename))
+
+def model_pipeline(x=['Te[K]', 'P[bar]', 'Fluid', 'FR'], categorical=['Fluid'], **params):
+    """
+    model_pipeline builds the multi-output PHP regressor used in ml_solution_php.ipynb: scaled numeric features,
+    one-hot encoded categorical features and a RandomForestRegressor with params.
+
+    usage:
+    model = model_pipeline(n_estimators=200, max_depth=10)
+    """
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    numeric_features = [feature for feature in x if feature not in categorical]
+    categorical_features = [feature for feature in x if feature in categorical]
+    preprocessor = ColumnTransformer(transformers=[('num', StandardScaler(), numeric_features),
+                                                   ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features)])
+    params = {'random_state': 42, **params}
+    return make_pipeline(preprocessor, RandomForestRegressor(**params))
+
+def data_hash(data:pd.DataFrame):
+    """
+    data_hash returns a content hash of a DataFrame (values and column names, not the index), used as cache key.
+
+    usage:
+    key = data_hash(df)
+    """
+    row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes() + json.dumps([str(column) for column in data.columns]).encode()).hexdigest()
+
+def _fit_fold(x_data, y_data, train_idx, test_idx, params, fold, cache_file):
+    import joblib
+    from sklearn.metrics import mean_absolute_error, r2_score
+    if cache_file is not None and os.path.exists(cache_file):
+        return joblib.load(cache_file)['metrics']
+    start = time.perf_counter()
+    model = model_pipeline(list(x_data.columns), **params)
+    model.fit(x_data.iloc[train_idx], y_data.iloc[train_idx])
+    fit_time = time.perf_counter() - start
+    y_test = y_data.iloc[test_idx]
+    prediction = model.predict(x_data.iloc[test_idx]).reshape(len(test_idx), -1)
+    n, k = len(test_idx), x_data.shape[1]
+    r2 = r2_score(y_test, prediction)
+    metrics = {'params': json.dumps(params, sort_keys=True), 'fold': fold, 'n_train': len(train_idx), 'n_test': n,
+               'r2': r2, 'r2_adj': 1 - (((1-r2)*(n-1)) / (n-k-1)), 'fit_time[s]': fit_time}
+    for i, target in enumerate(y_data.columns):
+        metrics[f'mae {target}'] = mean_absolute_error(y_test[target], prediction[:, i])
+        metrics[f'r2 {target}'] = r2_score(y_test[target], prediction[:, i])
+    if cache_file is not None:
+        joblib.dump({'metrics': metrics, 'model': model}, cache_file)
+    return metrics
+
+def load_model(model_path:str):
+    """
+    load_model loads a model stored with MachineLearning.save_model, with its numeric arrays memory-mapped.
+
+    usage:
+    model = load_model("data/ml_result/php_model.joblib")
+    """
+    import joblib
+    return joblib.load(model_path, mmap_mode='r')
 
 class MachineLearning:
-    def __init__(self, path:str):
+    def __init__(self, path:str, fmt=None):
         """
         ## MachineLearning is a class to perform various operations related to Machine Learning practice.
+        The ML dataset follows ML_SCHEMA and is stored in a typed binary format (fmt, default: parquet, or npz without pyarrow).
 
         ## usage:
         ### from ml_solutions import MachineLearning
@@ -24,6 +130,9 @@ class MachineLearning:
         help(ml)
 
         """
+        if fmt is None:
+            fmt = 'parquet' if importlib.util.find_spec('pyarrow') else 'npz'
+        self.fmt = fmt
         self.path = path
         self.dir_result = 'ml_result'
         self.output_path = os.path.join(self.path + self.dir_result)
@@ -34,45 +143,107 @@ class MachineLearning:
         else:
             print(f'{self.output_path} already exists and ML results will be stored here.')
 
-    def data_prep(self, csv_file:str, sample:str, fr:float):
+    @profiled
+    def data_prep(self, csv_file:str, sample:str, fr:float, store=None, groups=None):
         """
         data_prep is a method to add information about the type of the working fluid (nanofluid or water as a simple working fluid) and its filling ratio in the PHP setup.
+        With store (ExperimentStore or path of the store file, see store.py) the prepared data is also written into the store as stage 'prepared',
+        per experiment of groups (source file per row, eg. df['source'] of data_etl, aligned by the index saved in csv_file; default: a 'source'
+        column of csv_file), and all experiments of the directory of csv_file are labelled with the fluid and fill ratio.
 
         usage:
         df_prep = ml.data_prep("data/path_individual_file", "DI", "40")
+        df_prep = ml.data_prep("data/di_water_exp/40_FR/gfe_combined.csv", "DI_Water", 40, store="data/php_store.sqlite", groups=df['source'])
         """
         self.csv_file = csv_file
         self.sample = sample
         self.fr = fr
-        data = pd.read_csv(self.csv_file)
+        data = read_result(self.csv_file)
+        if isinstance(groups, pd.Series):
+            groups = groups.loc[data.index]
+        data = data.reset_index(drop=True)
         dict = {"Fluid": self.sample, "FR": self.fr}
-        data_fr = data.assign(**dict)
-        data_fr = data_fr.drop(data_fr.columns[0], axis=1)
+        data_fr = apply_schema(data.assign(**dict))
+        if store is not None:
+            from store import opened
+            assert groups is not None or 'source' in data_fr.columns, "Enter groups (eg. df['source'] of data_etl) to write into the store"
+            groups = data_fr['source'] if groups is None else np.asarray(groups)
+            with opened(store) as experiment_store:
+                experiment_store.write(data_fr, 'prepared', groups=groups, datapath=os.path.dirname(self.csv_file), fluid=self.sample, fr=self.fr)
         output_csv = (f"all_combined_data_{self.sample}_{self.fr}.csv")
-        data_fr_out_path = os.path.join(self.output_path, output_csv)
-        data_fr_out = data_fr.to_csv(data_fr_out_path)
-        print(f'Compiled data stored at {data_fr_out_path}')
+        data_fr_out_path = write_result(data_fr, os.path.join(self.output_path, output_csv), fmt=self.fmt)
+        if data_fr_out_path:
+            print(f'Compiled data stored at {data_fr_out_path}')
         return data_fr
     
-    def data_compile(self):
+    @profiled
+    def data_compile(self, n_workers=1):
         """
-        data_compile is a method to combine all prepared data (from MachineLearning.data_prep method) and save them to a csv file.
+        data_compile is a method to combine all prepared data (from MachineLearning.data_prep method) and save them to a file.
+        Prepared data files in any result format (csv, parquet, feather, npz) are read (in a process pool with n_workers > 1, or None for all cores),
+        combined with a single concat and ML_SCHEMA is enforced; if a sample exists in several formats, the file in the format of MachineLearning is used.
+        The result is stored as memory-mappable Arrow IPC file 'super_combined_data.arrow' (see open_store);
+        without pyarrow it is saved in the format of MachineLearning.
 
         useage:
         df_compiled  = data_compile()
+        df_compiled  = data_compile(n_workers=4)
         """
-        file_list = glob.glob(os.path.join(self.output_path,"all_combined_*.csv"))
-        df_frames = []
+        # one file per prepared sample, preferring the format of MachineLearning
+        prepared_files = {}
+        for ext in FORMATS.values():
+            for f in glob.glob(os.path.join(self.output_path, "all_combined_*" + ext)):
+                stem = os.path.splitext(f)[0]
+                if stem not in prepared_files or ext == FORMATS[self.fmt]:
+                    prepared_files[stem] = f
+        file_list = [prepared_files[stem] for stem in sorted(prepared_files)]
+        assert file_list, f"No prepared data files (all_combined_*) found at: {self.output_path}"
+        if n_workers == 1 or len(file_list) < 2:
+            df_frames = [read_prepared(f) for f in file_list]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                df_frames = list(pool.map(read_prepared, file_list))
+        df_combined = apply_schema(pd.concat(df_frames, axis=0, ignore_index=True))
         combined_data_file = 'super_combined_data.csv' 
-        for i in range(0, len(file_list)):
-            data = pd.read_csv(file_list[i])
-            df_frames.append(data)
-            df_combined = pd.concat(df_frames, axis=0, ignore_index=True)
-        data_combined_out_path = os.path.join(self.output_path, combined_data_file)
-        df_out = df_combined.to_csv(data_combined_out_path)
-        print(f"All data compiled in a single csv file and saved at: {self.output_path} as {combined_data_file}")
+        if importlib.util.find_spec('pyarrow'):
+            data_combined_out_path = self._write_store(df_combined)
+        else:
+            data_combined_out_path = write_result(df_combined, os.path.join(self.output_path, combined_data_file), fmt=self.fmt)
+        if data_combined_out_path:
+            print(f"All data compiled in a single file and saved at: {data_combined_out_path}")
         return df_combined
 
+    def _write_store(self, data:pd.DataFrame):
+        import pyarrow as pa
+        if not get_writer().persist:
+            return None
+        store_path = os.path.join(self.output_path, 'super_combined_data.arrow')
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        # uncompressed Arrow IPC file, so that open_store can memory-map the columns
+        with pa.OSFile(store_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as ipc_writer:
+                ipc_writer.write_table(table)
+        return store_path
+
+    @profiled
+    def open_store(self):
+        """
+        open_store opens the compiled dataset ('super_combined_data.arrow' from data_compile) memory-mapped.
+        Numeric columns are not copied or parsed; the operating system pages them in when they are used.
+
+        useage:
+        df_combined = ml.open_store()
+        """
+        import pyarrow as pa
+        store_path = os.path.join(self.output_path, 'super_combined_data.arrow')
+        assert os.path.exists(store_path), f"No compiled data store at: {store_path}; run data_compile first"
+        # the mapping stays open as long as the returned columns reference it
+        table = pa.ipc.open_file(pa.memory_map(store_path, 'r')).read_all()
+        return table.to_pandas(split_blocks=True)
+
+    def _dataset(self, data):
+        return self.open_store() if data is None else data
+
     def etl_visual(self, df:pd.DataFrame, y_value='dG[KJ/mol]', hue='Fluid', point=['b','o']):
         """
         etl_visual is a method to plot (scatter plot) a selected data as a function of Te[C]
@@ -98,38 +269,48 @@ class MachineLearning:
             print(f"Entered invalid value [{self.y_value}] of thermal property!\n")
             print(f"Select any correct value from: {properties}")
     
-    def data_filter_dG(self, data:pd.DataFrame, cutoff=0):
+    @profiled
+    def data_filter_dG(self, data:pd.DataFrame=None, cutoff=0):
         """
         data_filter is a method to remove outliers and irrelevant data from dataset. All positive value of dG[KJ/mol] will be removed by default.
+        Without data the compiled data store is used (see open_store).
 
         useage:
         ml.data_filter(data)
         """
+        data = self._dataset(data)
         self.data = data
         self.cutoff = cutoff
         data_filtered = self.data[data['dG[KJ/mol]'] <= self.cutoff]
         return data_filtered
 
-    def data_filter_Te(self, data:pd.DataFrame, cutoff=400):
+    @profiled
+    def data_filter_Te(self, data:pd.DataFrame=None, cutoff=400):
         """
         data_filter is a method to remove outliers and irrelevant data from dataset. Data can be filtered on the basis of Te[K] value.
+        Without data the compiled data store is used (see open_store).
 
         useage:
         ml.data_filter(data)
         """
+        data = self._dataset(data)
         self.data = data
         self.cutoff = cutoff
         data_filtered = self.data[data['Te[K]'] <= self.cutoff]
         return data_filtered
 
-    def data_split(self, data:pd.DataFrame, x=['Te[K]', 'P[bar]', 'Fluid', 'FR'], y=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]']):
+    @profiled
+    def data_split(self, data:pd.DataFrame=None, x=['Te[K]', 'P[bar]', 'Fluid', 'FR'], y=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]']):
         """
         data_xy_split is a method to split the data in features (x) and labels (y) as well as for train and test split.
         default values for x=['Te[K]', 'P[bar]', 'Fluid', 'FR']
+        Without data the compiled data store is used (see open_store).
 
         useage:
         x_data, y_data = data_xy_split(data, x=['Te[K]', 'P[bar]', 'Fluid', 'FR'], y=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol])
         """
+        from sklearn.model_selection import train_test_split
+        data = self._dataset(data)
         self.data = data
         self.x = x
         self.y = y
@@ -138,6 +319,171 @@ class MachineLearning:
         x_train, x_test, y_train, y_test = train_test_split(self.x_data, self.y_data, test_size=0.2, random_state=42)
         return x_train, x_test, y_train, y_test
     
+    @profiled
+    def cross_validate(self, data:pd.DataFrame=None, x=['Te[K]', 'P[bar]', 'Fluid', 'FR'], y=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]'],
+                       param_grid={'n_estimators': [100]}, k=5, n_jobs=-1, cache=True):
+        """
+        cross_validate runs k-fold cross-validation of the multi-output regressor (model_pipeline) for every parameter set of param_grid.
+        All (parameter set, fold) fits run in parallel on n_jobs cores (-1: all cores). With cache=True every fitted fold
+        (model and metrics) is stored in 'ml_result/cv_cache/', keyed by the data hash, x, y, k, fold and parameters, and re-used.
+        Without data the compiled data store is used (see open_store).
+
+        Returns the metrics per fold (MAE and R2 per target, R2, R2-adjusted, fit time) and their mean/std per parameter set.
+
+        useage:
+        df_folds, df_summary = ml.cross_validate(df_clean, param_grid={'n_estimators': [100, 300], 'max_depth': [None, 10]}, k=5)
+        """
+        from joblib import Parallel, delayed
+        from sklearn.model_selection import KFold, ParameterGrid
+        data = self._dataset(data)
+        x_data = data[x].reset_index(drop=True)
+        y_data = data[y].reset_index(drop=True)
+        folds = list(KFold(n_splits=k, shuffle=True, random_state=42).split(x_data))
+        cache_dir = os.path.join(self.output_path, 'cv_cache')
+        if cache:
+            os.makedirs(cache_dir, exist_ok=True)
+            key = data_hash(pd.concat([x_data, y_data], axis=1)) + json.dumps([x, y, k])
+        tasks = []
+        for params in ParameterGrid(param_grid):
+            for fold, (train_idx, test_idx) in enumerate(folds):
+                cache_file = None
+                if cache:
+                    fold_key = hashlib.sha1((key + json.dumps(params, sort_keys=True) + str(fold)).encode()).hexdigest()
+                    cache_file = os.path.join(cache_dir, fold_key + '.joblib')
+                tasks.append(delayed(_fit_fold)(x_data, y_data, train_idx, test_idx, params, fold, cache_file))
+        df_folds = pd.DataFrame(Parallel(n_jobs=n_jobs)(tasks))
+        metrics = [column for column in df_folds.columns if column not in ['params', 'fold', 'n_train', 'n_test']]
+        grouped = df_folds.groupby('params', sort=False)[metrics]
+        df_summary = grouped.mean().add_suffix(' mean').join(grouped.std().add_suffix(' std')).sort_values('r2 mean', ascending=False).reset_index()
+        return df_folds, df_summary
+
+    @profiled
+    def feature_ranking(self, data:pd.DataFrame=None, targets=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]'], features=None, subsample=None,
+                        strata=['Fluid', 'FR'], n_jobs=-1, cache=True):
+        """
+        feature_ranking ranks the candidate features by their mutual information (mutual_info_regression) with every target;
+        the targets are computed in parallel on n_jobs cores (-1: all cores).
+        Candidate features are all other columns (default), with Fluid/FR encoded as discrete integer codes; dT[K] and GFE[KJ/mol]
+        are derived when missing. Features without any value are dropped; for every target the rows missing the target or a feature
+        (eg. Q[W] in older prepared files) are left out. With subsample (number of rows) a sample stratified by strata is used.
+        With cache=True the result is stored in 'ml_result/mi_cache/', keyed by the dataset hash and the arguments.
+        Without data the compiled data store is used (see open_store).
+
+        Returns a DataFrame (index: features, columns: targets) sorted by the mean mutual information.
+
+        useage:
+        df_mi = ml.feature_ranking(df_clean, subsample=100000)
+        """
+        import joblib
+        from joblib import Parallel, delayed
+        from sklearn.feature_selection import mutual_info_regression
+        data = self._dataset(data)
+        if 'dT[K]' not in data.columns and {'Te[K]', 'Tc[K]'} <= set(data.columns):
+            data = data.assign(**{'dT[K]': data['Te[K]'] - data['Tc[K]']})
+        if 'GFE[KJ/mol]' not in data.columns and {'Te[K]', 'P[bar]'} <= set(data.columns):
+            data = data.assign(**{'GFE[KJ/mol]': 8.314 * data['Te[K]'] * np.log(data['P[bar]'])})
+        if features is None:
+            features = [column for column in data.columns if column not in targets]
+        key_args = json.dumps([features, targets, subsample, strata], default=str)
+        if cache:
+            cache_dir = os.path.join(self.output_path, 'mi_cache')
+            os.makedirs(cache_dir, exist_ok=True)
+            key = hashlib.sha1((data_hash(data[features + targets]) + key_args).encode()).hexdigest()
+            cache_file = os.path.join(cache_dir, key + '.joblib')
+            if os.path.exists(cache_file):
+                return joblib.load(cache_file)
+        if subsample is not None and subsample < len(data):
+            strata = [column for column in strata if column in data.columns]
+            if strata:
+                data = data.groupby(strata, observed=True, group_keys=False).sample(frac=subsample / len(data), random_state=42)
+            else:
+                data = data.sample(n=subsample, random_state=42)
+        # features missing in all rows (eg. Q[W] in legacy files only) are dropped
+        missing = data[features].isna()
+        empty = [feature for feature in features if missing[feature].all()]
+        if empty:
+            print(f"feature_ranking: dropped features without values: {empty}")
+            features = [feature for feature in features if feature not in empty]
+        x_data = pd.DataFrame(index=data.index)
+        discrete = []
+        for feature in features:
+            column = data[feature]
+            if not pd.api.types.is_numeric_dtype(column) or feature in ['Fluid', 'FR']:
+                x_data[feature] = pd.factorize(column, sort=True)[0]
+                discrete.append(True)
+            else:
+                x_data[feature] = column.astype(np.float64)
+                discrete.append(False)
+        # per target only the rows with the target and all features present are used
+        present = ~missing[features].any(axis=1).to_numpy()
+        rows = [present & data[target].notna().to_numpy() for target in targets]
+        scores = Parallel(n_jobs=n_jobs)(delayed(mutual_info_regression)(x_data.to_numpy()[valid], data[target].to_numpy(dtype=np.float64)[valid],
+                                                                         discrete_features=np.array(discrete), random_state=42)
+                                         for target, valid in zip(targets, rows))
+        df_mi = pd.DataFrame(np.column_stack(scores), index=features, columns=targets)
+        df_mi = df_mi.loc[df_mi.mean(axis=1).sort_values(ascending=False).index]
+        if cache:
+            joblib.dump(df_mi, cache_file)
+        return df_mi
+
+    @profiled
+    def data_compare(self, data:pd.DataFrame=None, keys=['Fluid', 'FR', 'Q[W]'], properties=['Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]', 'dG[KJ/mol]'],
+                     bins={'Te[K]': 5.0}, quantiles=(0.25, 0.5, 0.75)):
+        """
+        data_compare builds the comparison matrix of the compiled dataset in one pass (see analysis.grouped_stats):
+        count, mean, std and quantiles of every property for every combination of keys, eg. DI water vs Al2O3, 40 vs 60 % FR,
+        heat input and Te bin. Keys in bins are binned with the given width and added to keys; keys missing from the data are skipped.
+        Without data the compiled data store is used (see open_store).
+
+        useage:
+        df_compare = ml.data_compare()
+        df_compare = ml.data_compare(df_clean, keys=['Fluid', 'FR'], bins={'Te[K]': 1.0}, quantiles=(0.05, 0.5, 0.95))
+        """
+        data = self._dataset(data)
+        keys = [key for key in list(keys) + [key for key in bins if key not in keys] if key in data.columns]
+        properties = [column for column in properties if column in data.columns and column not in keys]
+        return grouped_stats(data, keys, properties, bins=bins, quantiles=quantiles)
+
+    @profiled
+    def train_model(self, data:pd.DataFrame=None, x=['Te[K]', 'P[bar]', 'Fluid', 'FR'], y=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]'], **params):
+        """
+        train_model fits the multi-output regressor (model_pipeline) with params on the whole dataset.
+        Without data the compiled data store is used (see open_store).
+
+        useage:
+        model = ml.train_model(df_clean, n_estimators=300)
+        """
+        data = self._dataset(data)
+        model = model_pipeline(x, **params)
+        model.fit(data[x], data[y])
+        model.php_features_, model.php_targets_ = list(x), list(y)
+        return model
+
+    @profiled
+    def save_model(self, model, name='php_model'):
+        """
+        save_model stores a fitted model (with its feature and target names) uncompressed in 'ml_result/<name>.joblib',
+        so that load_model can memory-map its arrays.
+
+        useage:
+        model_path = ml.save_model(model, name='php_model')
+        """
+        import joblib
+        model_path = os.path.join(self.output_path, name + '.joblib')
+        joblib.dump(model, model_path)
+        print(f'Model stored at {model_path}')
+        return model_path
+
+    def load_model(self, name='php_model'):
+        """
+        load_model loads a model stored with save_model; the numeric arrays are memory-mapped (fast cold load).
+        name can also be the path of a .joblib file.
+
+        useage:
+        model = ml.load_model('php_model')
+        """
+        return load_model(name if name.endswith('.joblib') else os.path.join(self.output_path, name + '.joblib'))
+
     def mae_error(self, prediction, y_test, para=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]']):
         """
         mae_error is a method to estimate the Mean Absolute error in the prediction by the ML model.
@@ -145,6 +491,7 @@ class MachineLearning:
         useage:
         mae_error(prediction, y_test, para=['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]'])
         """
+        from sklearn.metrics import mean_absolute_error
         self.prediction = prediction
         self.y_test = y_test
         self.para = para
@@ -175,6 +522,7 @@ class MachineLearning:
         goodness_of_fit(prediction, y_test)
         here, k = number of explanatory variables
         """
+        from sklearn.metrics import r2_score
         self.prediction = prediction
         self.y_test = y_test
         r2 = r2_score(y_test, prediction)
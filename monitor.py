@@ -0,0 +1,176 @@
+## PHP live monitoring during an experiment
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+from analysis import PulseHeatPipe, logger_files, iter_logger_file, select_logger_columns
+
+## Live Monitor
+class LiveMonitor(PulseHeatPipe):
+    """
+    ## LiveMonitor follows growing experimental data files (csv/xlsx) or a directory of new files during a PHP run
+    and keeps running per-Te-bin mean/std (Welford) and the current best G(T,P) up to date, in O(new rows) per update.
+
+    ## useage:
+    ### importing module
+    from monitor import LiveMonitor
+    ### creating the reference variable
+    live = LiveMonitor("datapath", pattern='*.csv', bin_width=1.0)
+    ### polling once for new rows or watching the run
+    live.poll()
+    live.watch(interval=10, callback=lambda live: print(live.best_TP()))
+    ### current statistics (same layout as data_stat)
+    df_mean, df_std = live.data_stat()
+
+    ## list of avilable functions
+    1. poll
+    2. update
+    3. watch
+    4. data_stat
+    5. best_TP
+    """
+    def __init__(self, datapath:str, pattern='*.xlsx', bin_width=1.0):
+        super().__init__(datapath)
+        self.pattern = pattern
+        self.bin_width = bin_width
+        self.n_rows = 0
+        self.best = None
+        self._count = pd.Series(dtype='int64')
+        self._mean = None
+        self._m2 = None
+        self._offsets = {} # consumed bytes (csv) or rows (xlsx) per file
+        self._headers = {} # csv header line per file
+        self._signatures = {} # (size, mtime) per xlsx file
+
+    def poll(self):
+        """
+        poll reads the rows appended to the data files since the last poll (and new files in datapath) and updates the statistics.
+        Returns the number of new rows.
+
+        useage: n_new = live.poll()
+        """
+        n_new = 0
+        for filename in logger_files(self.datapath, self.pattern):
+            for df_chunk in self._new_rows(filename):
+                n_new += self.update(self._convert_units(df_chunk))
+        return n_new
+
+    def update(self, data:pd.DataFrame):
+        """
+        update merges a chunk of converted data (as df_conv of data_etl, or with Gibbs free energy columns) into the running statistics.
+        Returns the number of rows merged.
+
+        useage: live.update(df_conv_chunk)
+        """
+        if len(data) == 0:
+            return 0
+        if 'dG[KJ/mol]' not in data.columns:
+            data = self._gibbs_fe(data)
+        # per bin statistics of the chunk
+        bins = np.floor(data['Te[K]'].to_numpy() / self.bin_width).astype('int64')
+        grouped = data.groupby(bins)
+        count_b = grouped.size()
+        mean_b = grouped.mean()
+        m2_b = grouped.var(ddof=0).mul(count_b, axis=0)
+        # merging with running statistics (Chan et al. parallel update of Welford's algorithm)
+        if self._mean is None:
+            self._count, self._mean, self._m2 = count_b, mean_b, m2_b
+        else:
+            bins_all = self._count.index.union(count_b.index)
+            count_a = self._count.reindex(bins_all, fill_value=0)
+            count_b = count_b.reindex(bins_all, fill_value=0)
+            mean_a = self._mean.reindex(bins_all, fill_value=0.0)
+            mean_b = mean_b.reindex(bins_all, fill_value=0.0)
+            count = count_a + count_b
+            delta = mean_b - mean_a
+            self._mean = mean_a + delta.mul(count_b / count, axis=0)
+            self._m2 = (self._m2.reindex(bins_all, fill_value=0.0) + m2_b.reindex(bins_all, fill_value=0.0)
+                        + (delta ** 2).mul(count_a * count_b / count, axis=0))
+            self._count = count
+        # current optimum
+        row_opt = data.iloc[data['dG[KJ/mol]'].to_numpy().argmin()]
+        if self.best is None or row_opt['dG[KJ/mol]'] < self.best['dG[KJ/mol]']:
+            self.best = row_opt
+        self.n_rows += len(data)
+        return len(data)
+
+    def watch(self, interval=10, max_polls=None, callback=None):
+        """
+        watch polls the data files every interval seconds and calls callback(live) whenever new rows arrived.
+        Stops after max_polls polls (default: runs until interrupted).
+
+        useage: live.watch(interval=10, callback=lambda live: print(live.data_stat()[0]))
+        """
+        n_polls = 0
+        try:
+            while max_polls is None or n_polls < max_polls:
+                if self.poll() and callback is not None:
+                    callback(self)
+                n_polls += 1
+                if max_polls is None or n_polls < max_polls:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            print(f"Stopped watching {self.datapath} after {self.n_rows} rows")
+        return self
+
+    def data_stat(self):
+        """
+        data_stat returns the running mean and standard deviation per Te bin in the layout of PulseHeatPipe.data_stat,
+        with an additional 'count' column. Bins with a single sample have no standard deviation and are left out of df_std.
+
+        useage: df_mean, df_std = live.data_stat()
+        """
+        assert self._mean is not None, "No data received yet"
+        df_mean = self._mean.reset_index(drop=True)
+        df_mean['count'] = self._count.to_numpy()
+        df_std = (self._m2.div((self._count - 1).where(self._count > 1), axis=0)) ** 0.5
+        df_std['Te[K]'] = self._mean['Te[K]']
+        df_std = df_std.reset_index(drop=True)
+        df_std['count'] = self._count.to_numpy()
+        df_std = df_std[df_std['count'] > 1]
+        return df_mean, df_std
+
+    def best_TP(self):
+        """
+        best_TP returns the data row with the lowest dG received so far.
+
+        useage: row_opt = live.best_TP()
+        """
+        assert self.best is not None, "No data received yet"
+        return self.best
+
+    # rows appended to a data file since the last poll
+    def _new_rows(self, filename:str):
+        if filename.endswith('.csv'):
+            offset = self._offsets.get(filename, 0)
+            with open(filename, 'rb') as f:
+                f.seek(offset)
+                block = f.read()
+            end = block.rfind(b'\n') + 1 # only complete lines
+            if end == 0:
+                return
+            block = block[:end]
+            if offset == 0:
+                header_end = block.find(b'\n') + 1
+                self._headers[filename] = block[:header_end]
+                block = block[header_end:]
+            self._offsets[filename] = offset + end
+            if block:
+                df_raw = pd.read_csv(io.BytesIO(self._headers[filename] + block))
+                yield select_logger_columns(df_raw, os.path.basename(filename))
+        else:
+            # xlsx files are rewritten as a whole; only rows after the consumed ones are merged
+            stat = os.stat(filename)
+            if self._signatures.get(filename) == (stat.st_size, stat.st_mtime_ns):
+                return
+            self._signatures[filename] = (stat.st_size, stat.st_mtime_ns)
+            n_skip = self._offsets.get(filename, 0)
+            for df_chunk in iter_logger_file(filename):
+                if n_skip >= len(df_chunk):
+                    n_skip -= len(df_chunk)
+                    continue
+                df_chunk = df_chunk.iloc[n_skip:]
+                n_skip = 0
+                self._offsets[filename] = self._offsets.get(filename, 0) + len(df_chunk)
+                yield df_chunk
@@ -0,0 +1,102 @@
+## Lazy PHP analysis pipeline
+import os
+from collections import Counter
+import numpy as np
+from analysis import PulseHeatPipe, logger_files
+
+## Pipeline
+class Pipeline:
+    """
+    ## Pipeline is a lazy, memoised graph of the PulseHeatPipe stages:
+    etl -> gibbs_fe -> chop -> stat -> property_avg / best_TP
+
+    A requested stage evaluates only the stages it depends on, and every stage result is memoised by its own parameters
+    and the keys of its inputs; eg. changing only Tmin/Tmax re-runs chop and stat, but not etl and gibbs_fe.
+    etl is keyed by the size and modification time of the data files, so new or modified files are picked up.
+
+    ## useage:
+    ### importing module
+    from pipeline import Pipeline
+    ### creating the reference variable
+    pipe = Pipeline("datapath", Tmin=300, Tmax=400)
+    ### requesting a stage result
+    df_mean, df_std = pipe.get('stat')
+    df_best = pipe.get('best_TP', Tmin=310, Tmax=350)
+    ### changing parameters for all later requests
+    pipe.set(Tmin=320)
+    ### stage graph and number of stage evaluations
+    pipe.graph, pipe.runs
+
+    ## stages and parameters
+    1. etl: n_workers, cache -> (df, df_conv)
+    2. gibbs_fe: dtype -> df_gfe
+    3. chop: Tmin, Tmax -> df_selected
+    4. stat: bin_width -> (df_mean, df_std)
+    5. property_avg -> df_summary (see PulseHeatPipe.data_property_summary)
+    6. best_TP -> row with the lowest dG of df_mean (as DataFrame)
+    """
+    graph = {'etl': [], 'gibbs_fe': ['etl'], 'chop': ['gibbs_fe'], 'stat': ['chop'], 'property_avg': ['stat'], 'best_TP': ['stat']}
+    parameters = {'etl': {'n_workers': 1, 'cache': False}, 'gibbs_fe': {'dtype': np.float64}, 'chop': {'Tmin': 300, 'Tmax': 400},
+                  'stat': {'bin_width': None}, 'property_avg': {}, 'best_TP': {}}
+
+    def __init__(self, datapath:str, save=False, **params):
+        self.analysis = PulseHeatPipe(datapath)
+        self.datapath = datapath
+        self.save = save
+        self.params = {name: value for stage in self.parameters.values() for name, value in stage.items()}
+        self.set(**params)
+        self.runs = Counter()
+        self._memo = {}
+
+    def set(self, **params):
+        """
+        set changes stage parameters for all later requests.
+
+        useage: pipe.set(Tmin=310, Tmax=350)
+        """
+        unknown = set(params) - set(self.params)
+        assert not unknown, f"Unknown parameters {sorted(unknown)}; select from: {sorted(self.params)}"
+        self.params.update(params)
+        return self
+
+    def get(self, stage:str, **params):
+        """
+        get returns the result of stage, evaluating (and memoising) only the stages it depends on.
+        Parameters given here apply to this request only.
+
+        useage: df_mean, df_std = pipe.get('stat', Tmin=310)
+        """
+        assert stage in self.graph, f"Entered invalid stage [{stage}]; select from: {list(self.graph)}"
+        unknown = set(params) - set(self.params)
+        assert not unknown, f"Unknown parameters {sorted(unknown)}; select from: {sorted(self.params)}"
+        return self._evaluate(stage, {**self.params, **params})[1]
+
+    def clear(self):
+        """ clear removes all memoised stage results """
+        self._memo.clear()
+
+    def _evaluate(self, stage:str, params:dict):
+        inputs = [self._evaluate(dependency, params) for dependency in self.graph[stage]]
+        stage_params = tuple((name, str(params[name])) for name in self.parameters[stage])
+        if stage == 'etl':
+            stage_params += tuple((filename, os.stat(filename).st_size, os.stat(filename).st_mtime_ns) for filename in logger_files(self.datapath))
+        key = (stage, stage_params, tuple(input_key for input_key, _ in inputs))
+        if key not in self._memo:
+            self._memo[key] = self._run(stage, [result for _, result in inputs], params)
+            self.runs[stage] += 1
+        return key, self._memo[key]
+
+    def _run(self, stage:str, inputs:list, params:dict):
+        analysis = self.analysis
+        if stage == 'etl':
+            return analysis.data_etl(n_workers=params['n_workers'], cache=params['cache'], save=self.save)
+        if stage == 'gibbs_fe':
+            return analysis.gibbs_fe(inputs[0][1], save=self.save, dtype=params['dtype'])
+        if stage == 'chop':
+            return analysis.data_chop(inputs[0], params['Tmin'], params['Tmax'])
+        if stage == 'stat':
+            return analysis.data_stat(inputs[0], bin_width=params['bin_width'], save=self.save)
+        if stage == 'property_avg':
+            return analysis.data_property_summary(*inputs[0])
+        if stage == 'best_TP':
+            return analysis.top_k(inputs[0][0], k=1)
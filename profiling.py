@@ -0,0 +1,190 @@
+## Opt-in stage profiling for PHP analysis
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+class _State:
+    enabled = False
+    memory = False
+    output = None
+    callback = None
+
+_state = _State()
+_events = []
+_lock = threading.Lock()
+_local = threading.local()
+
+def profiled(func):
+    """
+    profiled instruments a function or method: when profiling is enabled (see enable) every call records wall time, CPU time,
+    rows in (first DataFrame-like argument) and rows out (result), and optionally peak traced memory, as an event.
+    When profiling is disabled the wrapper only checks a flag before calling func.
+
+    useage: @profiled
+            def data_stat(self, data, bin_width=None, save=True):
+                ...
+    """
+    stage = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state.enabled:
+            return func(*args, **kwargs)
+        return _record(stage, func, args, kwargs)
+    return wrapper
+
+def enable(output=None, memory=False, callback=None):
+    """
+    enable switches profiling on for all instrumented functions.
+    output: file to which every event is appended as one JSON line (also works from worker processes), None keeps events in memory only
+    memory: also record the peak traced memory of every call (tracemalloc; slows down allocation-heavy code)
+    callback: called with every event dict
+
+    useage: profiling.enable(output='php_profile.jsonl', memory=True)
+    """
+    _state.output = output
+    _state.memory = memory
+    _state.callback = callback
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _state.enabled = True
+
+def disable():
+    """ disable switches profiling off; recorded events are kept (see events, summary, reset) """
+    _state.enabled = False
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.memory = False
+
+def reset():
+    """ reset removes all recorded events """
+    with _lock:
+        _events.clear()
+
+def events():
+    """ events returns the recorded events (list of dicts) """
+    with _lock:
+        return list(_events)
+
+class profile:
+    """
+    profile enables profiling inside a with-block and disables it afterwards.
+
+    useage: with profiling.profile(memory=True):
+                analysis.data_etl()
+            print(profiling.summary())
+    """
+    def __init__(self, output=None, memory=False, callback=None):
+        self.kwargs = {'output': output, 'memory': memory, 'callback': callback}
+
+    def __enter__(self):
+        enable(**self.kwargs)
+        return self
+
+    def __exit__(self, *exc):
+        disable()
+
+def summary(events_list=None):
+    """
+    summary returns a table (DataFrame) of the recorded events per stage, sorted by total wall time:
+    calls, total/mean wall time [s], total CPU time [s], total rows in/out and maximum peak memory [MB].
+    events_list can be a list of events or the path of a JSON lines file written by enable(output=...).
+
+    useage: df_profile = profiling.summary()
+    """
+    import pandas as pd
+    if isinstance(events_list, str):
+        with open(events_list) as f:
+            events_list = [json.loads(line) for line in f if line.strip()]
+    df = pd.DataFrame(events() if events_list is None else events_list)
+    columns = ['calls', 'wall_s', 'wall_mean_s', 'cpu_s', 'rows_in', 'rows_out', 'peak_MB']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    grouped = df.groupby('stage')
+    df_summary = pd.DataFrame({'calls': grouped.size(),
+                               'wall_s': grouped['wall_s'].sum(),
+                               'wall_mean_s': grouped['wall_s'].mean(),
+                               'cpu_s': grouped['cpu_s'].sum(),
+                               'rows_in': grouped['rows_in'].sum(min_count=1),
+                               'rows_out': grouped['rows_out'].sum(min_count=1),
+                               'peak_MB': grouped['peak_MB'].max() if 'peak_MB' in df else None})
+    return df_summary[columns].sort_values('wall_s', ascending=False)
+
+# number of data rows of an argument or result: DataFrame/Series/array, list of frames (sum), tuple (first item), TeIndex
+def _rows(obj):
+    if obj is None or isinstance(obj, (str, bytes, dict)):
+        return None
+    if isinstance(obj, list):
+        rows = [_rows(item) for item in obj]
+        return sum(rows) if rows and None not in rows else None
+    if isinstance(obj, tuple):
+        return _rows(obj[0]) if obj else None
+    if hasattr(obj, 'shape') and hasattr(obj, '__len__'):
+        return len(obj)
+    if hasattr(obj, 'data') and hasattr(obj, '__len__'):
+        return len(obj)
+    return None
+
+def _record(stage, func, args, kwargs):
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    frame = {'peak': 0}
+    memory = _state.memory and tracemalloc.is_tracing()
+    if memory:
+        # nested calls: the parent keeps the peak reached so far, the child measures from a fresh peak
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        frame['current'] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    stack.append(frame)
+    rows_in = next((rows for rows in map(_rows, list(args) + list(kwargs.values())) if rows is not None), None)
+    start = datetime.now().isoformat(timespec='milliseconds')
+    wall, cpu = time.perf_counter(), time.process_time()
+    result, error = None, None
+    try:
+        result = func(*args, **kwargs)
+        return result
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        stack.pop()
+        event = {'stage': stage, 'start': start, 'wall_s': wall, 'cpu_s': cpu, 'rows_in': rows_in, 'rows_out': _rows(result),
+                 'depth': len(stack), 'pid': os.getpid()}
+        if memory and tracemalloc.is_tracing():
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            event['peak_MB'] = (peak - frame['current']) / 2**20
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        if error:
+            event['error'] = error
+        _emit(event)
+
+def _emit(event:dict):
+    with _lock:
+        _events.append(event)
+        if _state.output:
+            with open(_state.output, 'a') as f:
+                f.write(json.dumps(event) + '\n')
+    if _state.callback is not None:
+        _state.callback(event)
+
+def _print_summary():
+    if _events:
+        import pandas as pd
+        with pd.option_context('display.width', 200, 'display.float_format', '{:.4f}'.format):
+            print(summary())
+
+# opt-in from the environment, eg. for CLI runs and worker processes: PHP_PROFILE=1 (summary at exit) or PHP_PROFILE=events.jsonl
+if os.environ.get('PHP_PROFILE'):
+    _setting = os.environ['PHP_PROFILE']
+    enable(output=None if _setting.lower() in ('1', 'true', 'yes') else _setting, memory=os.environ.get('PHP_PROFILE_MEMORY', '') == '1')
+    if _state.output is None:
+        atexit.register(_print_summary)
@@ -0,0 +1,180 @@
+## PHP pulsation: batched spectral analysis of Te/Tc/P time series
+import numpy as np
+import pandas as pd
+from analysis import PulseHeatPipe
+from profiling import profiled
+from writer import write_result
+
+SPECTRAL_COLUMNS = ['Te[K]', 'Tc[K]', 'P[bar]']
+
+def stack_windows(values:np.ndarray, groups=None, window=None, step=None):
+    """
+    stack_windows cuts the time series of every experiment (rows of values with the same group label, in time order)
+    into windows of window samples every step samples and stacks them into one NaN-padded array of shape
+    (files x windows x samples x properties). Files with fewer windows are padded with NaN windows; a file shorter than
+    window gives one window padded with NaN. window=None uses one window per file (the whole file).
+
+    Returns stack, n_valid (valid samples per file and window), the row position of every window start and the file labels.
+
+    useage: stack, n_valid, starts, files = stack_windows(df_conv[['Te[K]', 'P[bar]']].to_numpy(), groups=df['source'], window=256, step=128)
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    if groups is None:
+        groups = np.zeros(len(values), dtype=np.int64)
+    codes, files = pd.factorize(np.asarray(groups))
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes, minlength=len(files))
+    offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+    window = int(window or sizes.max())
+    step = int(step or window)
+    n_windows = np.maximum(1 + (sizes - window) // step, 1)
+    w = np.arange(n_windows.max())[None, :, None]
+    s = np.arange(window)[None, None, :]
+    position = w * step + s # sample position in the file
+    valid = (w < n_windows[:, None, None]) & (position < sizes[:, None, None])
+    rows = order[np.minimum(offsets[:, None, None] + position, len(values) - 1)]
+    stack = np.where(valid[..., None], values[rows], np.nan)
+    starts = np.where(valid[:, :, 0], order[np.minimum(offsets[:, None] + w[..., 0] * step, len(values) - 1)], -1)
+    return stack, valid.sum(axis=2), starts, np.asarray(files)
+
+def _prepare(stack:np.ndarray, detrend='linear'):
+    # detrended, Hann-weighted windows (NaN padding -> 0); the Hann window spans the valid samples of every window
+    valid = np.isfinite(stack)
+    n = valid.sum(axis=2, keepdims=True)
+    x = np.where(valid, stack, 0.0)
+    s = np.arange(stack.shape[2], dtype=np.float64)[None, None, :, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = x.sum(axis=2, keepdims=True) / n
+        if detrend == 'linear':
+            s_mean = (valid * s).sum(axis=2, keepdims=True) / n
+            slope = (valid * (s - s_mean) * (x - x_mean)).sum(axis=2, keepdims=True) / (valid * (s - s_mean) ** 2).sum(axis=2, keepdims=True)
+            x = x - x_mean - np.nan_to_num(slope) * (s - s_mean)
+        elif detrend == 'constant':
+            x = x - x_mean
+        hann = np.where(valid, 0.5 - 0.5 * np.cos(2 * np.pi * s / n), 0.0) # periodic Hann window (as scipy.signal)
+    return np.where(valid, x, 0.0) * hann, hann, n[:, :, 0, :]
+
+def dominant_frequency(stack:np.ndarray, dt, detrend='linear', min_samples=8, rtol=1e-9):
+    """
+    dominant_frequency returns the frequency [1/time unit of dt] and amplitude of the strongest oscillation of every window
+    of a stacked array (files x windows x samples x properties, see stack_windows), from one batched real FFT
+    of the detrended, Hann-weighted windows. dt: sample interval per file (array) or for all files.
+    The amplitude is the peak amplitude of the sinusoid (corrected for the window gain). Windows with fewer than min_samples valid samples,
+    and flat windows (peak amplitude <= rtol x the largest absolute value of the window, ie. rounding noise) give NaN.
+
+    useage: f_dom, amplitude = dominant_frequency(stack, dt=0.5)
+    """
+    x, hann, n = _prepare(stack, detrend)
+    amplitude = np.abs(np.fft.rfft(x, axis=2))
+    amplitude[:, :, 0, :] = 0.0 # no DC
+    k = amplitude.argmax(axis=2)
+    gain = hann.sum(axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peak = 2 * np.take_along_axis(amplitude, k[:, :, None, :], axis=2)[:, :, 0, :] / gain
+    dt = np.broadcast_to(np.asarray(dt, dtype=np.float64).reshape(-1, 1, 1), k.shape)
+    f_dom = k / (stack.shape[2] * dt)
+    scale = np.abs(np.where(np.isfinite(stack), stack, 0.0)).max(axis=2)
+    missing = (n < min_samples) | ~(peak > rtol * scale)
+    return np.where(missing, np.nan, f_dom), np.where(missing, np.nan, peak)
+
+def welch_psd(stack:np.ndarray, dt, detrend='constant'):
+    """
+    welch_psd returns the Welch power spectral density (one-sided, density scaling as scipy.signal.welch) of every file
+    of a stacked array of overlapping segments (files x segments x samples x properties, see stack_windows with step=window//2):
+    one batched real FFT of all Hann-weighted segments, averaged over the valid segments of each file.
+    Returns the frequencies (files x frequencies) [1/time unit of dt] and the PSD (files x frequencies x properties).
+
+    useage: freqs, psd = welch_psd(stack_windows(values, groups, window=64, step=32)[0], dt=0.5)
+    """
+    x, hann, n = _prepare(stack, detrend)
+    n_samples = stack.shape[2]
+    dt = np.asarray(dt, dtype=np.float64).reshape(-1)
+    dt = np.broadcast_to(dt, (stack.shape[0],))
+    power = np.abs(np.fft.rfft(x, axis=2)) ** 2
+    used = (n == n.max(axis=1, keepdims=True)) & (n > 1) # full segments of every file
+    with np.errstate(invalid='ignore', divide='ignore'):
+        power = power * dt[:, None, None, None] / (hann ** 2).sum(axis=2, keepdims=True)
+        power[:, :, 1:(n_samples + 1) // 2, :] *= 2 # one-sided: double all but DC and Nyquist
+        psd = np.where(used[:, :, None, :], power, 0.0).sum(axis=1) / used.sum(axis=1)[:, None, :]
+    freqs = np.fft.rfftfreq(n_samples)[None, :] / dt[:, None]
+    return freqs, psd
+
+def _sample_interval(data:pd.DataFrame, groups:np.ndarray, files:np.ndarray):
+    # median sample interval [min] of every file
+    dt = pd.Series(data['t(min)'].to_numpy()).groupby(groups).apply(lambda t: np.median(np.diff(t.to_numpy())) if len(t) > 1 else np.nan)
+    return dt.reindex(files).to_numpy(dtype=np.float64)
+
+## Spectral Analysis
+class SpectralAnalysis(PulseHeatPipe):
+    """
+    ## SpectralAnalysis - pulsation of a PHP from the Te, Tc and P time series (t(min)) of every experiment file:
+    dominant pulsation frequency, amplitude and Welch PSD, per file and per sliding window.
+    All files (eg. a full campaign) are stacked into one (files x windows x samples) array and analysed with one batched real FFT.
+
+    ## useage:
+    ### importing module
+    from spectral import SpectralAnalysis
+    ### creating the reference variable
+    spectral = SpectralAnalysis("datapath")
+    ### time series with source file labels
+    df, df_conv = spectral.data_etl()
+    ### dominant frequency and amplitude per file, or per sliding window of 64 samples
+    df_pulse = spectral.data_pulsation(df_conv, groups=df['source'])
+    df_pulse = spectral.data_pulsation(df_conv, groups=df['source'], window=64, step=16)
+    ### Welch PSD per file
+    df_psd = spectral.data_psd(df_conv, groups=df['source'], nperseg=64)
+
+    ## list of avilable functions
+    1. data_pulsation
+    2. data_psd
+    """
+    @profiled
+    def data_pulsation(self, data:pd.DataFrame, groups=None, columns=SPECTRAL_COLUMNS, window=None, step=None, save=True):
+        """
+        data_pulsation returns the dominant pulsation frequency [1/min] and amplitude of every property in columns,
+        per experiment file (window=None) or per sliding window of window samples every step samples (default: window // 2).
+        groups: experiment label per row, eg. df['source'] of data_etl (aligned by index); default: data['source'] if present, else one series
+        The result is saved as 'pulsation.csv' in datapath (see writer.configure).
+
+        useage: df_pulse = spectral.data_pulsation(df_conv, groups=df['source'], window=64)
+        """
+        groups = self._groups(data, groups)
+        stack, n_valid, starts, files = stack_windows(data[columns].to_numpy(), groups, window, step or (window // 2 if window else None))
+        dt = _sample_interval(data, groups, files)
+        f_dom, amplitude = dominant_frequency(stack, dt)
+        t = data['t(min)'].to_numpy()
+        file_idx, window_idx = np.nonzero(starts >= 0)
+        start_rows = starts[file_idx, window_idx]
+        df_pulse = pd.DataFrame({'source': files[file_idx], 'window': window_idx, 't_start(min)': t[start_rows],
+                                 'samples': n_valid[file_idx, window_idx]})
+        for i, column in enumerate(columns):
+            df_pulse[f'{column} f[1/min]'] = f_dom[file_idx, window_idx, i]
+            df_pulse[f'{column} amplitude'] = amplitude[file_idx, window_idx, i]
+        if save:
+            output_path = write_result(df_pulse, self.datapath + 'pulsation.csv')
+            if output_path:
+                print(f"Pulsation frequencies and amplitudes are saved at: '{output_path}'")
+        return df_pulse
+
+    @profiled
+    def data_psd(self, data:pd.DataFrame, groups=None, columns=SPECTRAL_COLUMNS, nperseg=64, save=True):
+        """
+        data_psd returns the Welch power spectral density of every property in columns per experiment file
+        (Hann segments of nperseg samples with 50 % overlap), with the frequency in [1/min].
+        The result is saved as 'psd.csv' in datapath (see writer.configure).
+
+        useage: df_psd = spectral.data_psd(df_conv, groups=df['source'], nperseg=64)
+        """
+        groups = self._groups(data, groups)
+        stack, n_valid, starts, files = stack_windows(data[columns].to_numpy(), groups, nperseg, max(nperseg // 2, 1))
+        dt = _sample_interval(data, groups, files)
+        freqs, psd = welch_psd(stack, dt)
+        n_freqs = freqs.shape[1]
+        df_psd = pd.DataFrame({'source': np.repeat(files, n_freqs), 'f[1/min]': freqs.ravel()})
+        for i, column in enumerate(columns):
+            df_psd[f'PSD {column}'] = psd[:, :, i].ravel()
+        if save:
+            output_path = write_result(df_psd, self.datapath + 'psd.csv')
+            if output_path:
+                print(f"Welch PSD is saved at: '{output_path}'")
+        return df_psd
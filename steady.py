@@ -0,0 +1,375 @@
+## PHP steady state: rolling-window detection of steady operation per heat input level
+import numpy as np
+import pandas as pd
+from analysis import PulseHeatPipe
+from profiling import profiled
+from writer import write_result
+
+STEADY_COLUMNS = ['Te[K]', 'Tc[K]', 'TR[K/W]']
+# thresholds of a steady window: largest rolling standard deviation, and largest change of the rolling mean over one window
+STEADY_STD = {'Te[K]': 1.0, 'Tc[K]': 1.0, 'TR[K/W]': 0.015}
+STEADY_DRIFT = {'Te[K]': 1.0, 'Tc[K]': 1.0, 'TR[K/W]': 0.015}
+# decimals of std and drift compared with the thresholds: rounding differences of the prefix sums (eg. between
+# SteadyStateDetector chunks and the whole series, about 1e-11 or less) can not flip a label when a statistic is exactly at a threshold
+TIE_DECIMALS = 9
+# properties summarised per steady segment
+SEGMENT_COLUMNS = ['Te[K]', 'Tc[K]', 'dT[K]', 'P[bar]', 'TR[K/W]']
+
+def level_starts(*keys, previous=None):
+    """
+    level_starts marks the rows (in time order) where a new operating level starts: the first row, and every row where
+    any of keys (eg. source file and heat input) differs from the row before. previous: keys of the row before the first row
+    (incremental use); None starts a level at the first row.
+
+    useage: starts = level_starts(df['source'].to_numpy(), df_conv['Q[W]'].to_numpy())
+    """
+    n = len(keys[0])
+    starts = np.zeros(n, dtype=bool)
+    if n == 0:
+        return starts
+    for i, key in enumerate(keys):
+        key = np.asarray(key)
+        starts[1:] |= key[1:] != key[:-1]
+        if previous is not None:
+            starts[0] |= key[0] != previous[i]
+    if previous is None:
+        starts[0] = True
+    return starts
+
+def _positions(starts:np.ndarray):
+    # level number and sample position within the level of every row
+    level = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    return level, np.arange(len(starts)) - first[level], first
+
+def _window_sums(x:np.ndarray, window:int):
+    # trailing window sums from compensated prefix sums: the rounding error of every step of the cumsum is recovered exactly
+    # (Knuth's TwoSum) and accumulated separately, so the error of a window sum is about eps x |window sum|, for any n
+    s = np.cumsum(x, axis=0)
+    before = np.concatenate([np.zeros((1, x.shape[1])), s[:-1]])
+    added = s - before # value actually added by every step
+    error = (before - (s - added)) + (x - added)
+    c = np.cumsum(error, axis=0)
+    # window sum of row i: S[i] - S[i - window] (rows before the first row sum to 0)
+    s[window:] -= s[:-window].copy()
+    c[window:] -= c[:-window].copy()
+    return s + c
+
+def rolling_mean_std(values:np.ndarray, window:int, starts=None):
+    """
+    rolling_mean_std returns the mean and standard deviation (ddof=1) of the trailing window of window samples of every row
+    (rows in time order), in O(n) from compensated prefix sums of the values relative to the first finite sample of their level,
+    so the rounding error does not grow with the length of the series. Windows that are incomplete, cross a level start
+    (see level_starts) or hold a non-finite value give NaN.
+
+    useage: mean, std = rolling_mean_std(df_conv[['Te[K]', 'Tc[K]']].to_numpy(), window=36, starts=starts)
+    """
+    assert window >= 2, "window needs at least 2 samples"
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    n = len(values)
+    if starts is None:
+        starts = level_starts(np.zeros(n))
+    level, position, first = _positions(starts)
+    finite = np.isfinite(values)
+    # values relative to the first finite sample of their level: less cancellation in the sums of squares
+    offset = pd.DataFrame(np.where(finite, values, np.nan)).groupby(level).transform('first').to_numpy()
+    x = np.where(finite, values - np.nan_to_num(offset), 0.0)
+    sum1 = _window_sums(x, window)
+    sum2 = _window_sums(x * x, window)
+    bad = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(~finite, axis=0)])
+    end = np.arange(1, n + 1)
+    valid = (position >= window - 1)[:, None] & (bad[end] == bad[np.maximum(end - window, 0)])
+    mean = sum1 / window
+    var = np.maximum(sum2 - sum1 * mean, 0.0) / (window - 1)
+    return np.where(valid, mean + offset, np.nan), np.where(valid, np.sqrt(var), np.nan)
+
+def steady_state(values:np.ndarray, window:int, std_max, drift_max, starts=None, causal=False):
+    """
+    steady_state labels every row (in time order) as steady or not. A trailing window of window samples is stable when,
+    for every property (column of values), its standard deviation is at most std_max and its mean changed by at most drift_max
+    since the window before (both arrays with one threshold per column), both rounded to TIE_DECIMALS. Windows never cross a level start.
+    causal=False: a row is steady when it lies in any stable window (whole steady plateau);
+    causal=True: a row is steady when the window ending at it is stable (only past rows are used, as for a stream).
+
+    useage: steady = steady_state(df_conv[['Te[K]', 'Tc[K]', 'TR[K/W]']].to_numpy(), 36, [1.0, 1.0, 0.015], [1.0, 1.0, 0.015], starts)
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    n = len(values)
+    if starts is None:
+        starts = level_starts(np.zeros(n))
+    mean, std = rolling_mean_std(values, window, starts)
+    position = _positions(starts)[1]
+    drift = np.full_like(mean, np.nan)
+    drift[window:] = mean[window:] - mean[:-window]
+    drift[position < 2 * window - 1] = np.nan
+    with np.errstate(invalid='ignore'):
+        stable = ((np.round(std, TIE_DECIMALS) <= np.asarray(std_max, dtype=np.float64))
+                  & (np.round(np.abs(drift), TIE_DECIMALS) <= np.asarray(drift_max, dtype=np.float64))).all(axis=1)
+    if causal:
+        return stable
+    # rows covered by a stable window ending at i..i+window-1 (stable windows never cross a level start)
+    covered = np.concatenate([[0], np.cumsum(stable)])
+    return covered[np.minimum(np.arange(n) + window, n)] > covered[:n]
+
+def segment_labels(steady:np.ndarray, starts:np.ndarray, previous=-1, continued=False):
+    """
+    segment_labels numbers the runs of consecutive steady rows within a level (0, 1, ...; -1 for transient rows).
+    previous: last segment number used so far, continued: the row before the first row was steady in the same level (incremental use).
+
+    useage: segment = segment_labels(steady, starts)
+    """
+    steady = np.asarray(steady, dtype=bool)
+    before = np.concatenate([[continued], steady[:-1]])
+    new = steady & (~before | starts)
+    return np.where(steady, previous + np.cumsum(new), -1)
+
+def _thresholds(thresholds:dict, columns:list):
+    missing = [column for column in columns if column not in thresholds]
+    assert not missing, f"No threshold for: {missing}"
+    return np.array([thresholds[column] for column in columns], dtype=np.float64)
+
+def _segment_moments(data:pd.DataFrame, groups:np.ndarray, segment:np.ndarray, columns:list):
+    # per segment: source, heat input, time span (info), sample count, mean and sum of squared deviations (m2)
+    steady = segment >= 0
+    labels = segment[steady]
+    df = data.loc[steady, columns]
+    grouped = df.groupby(labels)
+    count = grouped.size()
+    mean = grouped.mean()
+    m2 = grouped.var(ddof=0).mul(count, axis=0)
+    t = data['t(min)'].to_numpy()[steady]
+    info = pd.DataFrame({'source': pd.Series(groups[steady]).groupby(labels).first(),
+                         'Q[W]': (pd.Series(data['Q[W]'].to_numpy()[steady]).groupby(labels).first()
+                                  if 'Q[W]' in data.columns else np.nan),
+                         't_start(min)': pd.Series(t).groupby(labels).min(),
+                         't_end(min)': pd.Series(t).groupby(labels).max()})
+    return info, count, mean, m2
+
+def _segment_frame(info:pd.DataFrame, count:pd.Series, mean:pd.DataFrame, m2:pd.DataFrame):
+    df_segments = info.copy()
+    df_segments['samples'] = count
+    std = (m2.div((count - 1).where(count > 1), axis=0)) ** 0.5
+    for column in mean.columns:
+        df_segments[column] = mean[column]
+        df_segments[f'{column} std'] = std[column]
+    return df_segments.rename_axis('segment').reset_index()
+
+def resistance_curve(df_segments:pd.DataFrame):
+    """
+    resistance_curve pools steady segments (see SteadyState.data_steady) per heat input Q[W]: number of segments, samples,
+    and the sample-weighted mean and pooled standard deviation of every segment property.
+
+    useage: df_curve = resistance_curve(df_segments)
+    """
+    columns = [column for column in SEGMENT_COLUMNS if column in df_segments.columns]
+    n = df_segments['samples'].to_numpy(dtype=np.float64)
+    grouped_n = df_segments.groupby('Q[W]')['samples']
+    n_total = grouped_n.sum()
+    df_curve = pd.DataFrame({'segments': grouped_n.size(), 'samples': n_total})
+    for column in columns:
+        mean = df_segments[column].to_numpy()
+        # within-segment sums of squared deviations plus the spread of the segment means around the pooled mean
+        m2 = np.nan_to_num(df_segments[f'{column} std'].to_numpy() ** 2) * (n - 1)
+        pooled_mean = pd.Series(n * mean).groupby(df_segments['Q[W]'].to_numpy()).sum() / n_total
+        deviation = mean - pooled_mean.reindex(df_segments['Q[W]']).to_numpy()
+        ss = pd.Series(m2 + n * deviation ** 2).groupby(df_segments['Q[W]'].to_numpy()).sum()
+        df_curve[column] = pooled_mean
+        df_curve[f'{column} std'] = (ss / (n_total - 1).where(n_total > 1)) ** 0.5
+    df_curve = df_curve.reset_index()
+    return df_curve
+
+## Steady State
+class SteadyState(PulseHeatPipe):
+    """
+    ## SteadyState - steady operation of a PHP: rolling-window (O(n)) detection of the steady plateaus of Te, Tc and TR
+    in every experiment and heat input level (Q[W]), per-segment statistics and the thermal resistance vs heat input curve
+    from steady data only. For live data see SteadyStateDetector.
+
+    ## useage:
+    ### importing module
+    from steady import SteadyState
+    ### creating the reference variable
+    steady = SteadyState("datapath")
+    ### time series with source file labels and heat input
+    df, df_conv = steady.data_etl()
+    ### steady rows and segments (window of 36 samples, thresholds per property)
+    df_steady, df_segments = steady.data_steady(df_conv, groups=df['source'], window=36)
+    ### thermal resistance vs heat input from the steady segments
+    df_curve = steady.data_resistance_curve(df_segments)
+
+    ## list of avilable functions
+    1. data_steady
+    2. data_resistance_curve
+    """
+    @profiled
+    def data_steady(self, data:pd.DataFrame, groups=None, columns=STEADY_COLUMNS, window=36, std_max=STEADY_STD, drift_max=STEADY_DRIFT,
+                    causal=False, save=True):
+        """
+        data_steady labels the steady rows of every experiment and heat input level and summarises the steady segments.
+        A level is a run of rows of one experiment (groups) with the same heat input (Q[W]); rows of an experiment are taken in time order.
+        A trailing window of window samples is stable when every property in columns has a standard deviation <= std_max[property]
+        and its mean changed by <= drift_max[property] over one window; see steady_state for causal.
+        groups: experiment label per row, eg. df['source'] of data_etl (aligned by index); default: data['source'] if present, else one series
+
+        Returns data with the columns 'steady' (bool) and 'segment' (segment number, -1 for transient rows), and the segment table:
+        source, Q[W], t_start(min), t_end(min), samples, mean and std of the SEGMENT_COLUMNS present.
+        The segment table is saved as 'steady_segments.csv' in datapath (see writer.configure).
+
+        useage: df_steady, df_segments = steady.data_steady(df_conv, groups=df['source'])
+                df_steady, df_segments = steady.data_steady(df_conv, window=60, std_max={'Te[K]': 0.5, 'Tc[K]': 0.5, 'TR[K/W]': 0.01})
+        """
+        groups = self._groups(data, groups)
+        order = np.argsort(pd.factorize(groups)[0], kind='stable')
+        keys = [groups[order]] + ([data['Q[W]'].to_numpy()[order]] if 'Q[W]' in data.columns else [])
+        starts = level_starts(*keys)
+        steady_sorted = steady_state(data[columns].to_numpy()[order], window, _thresholds(std_max, columns), _thresholds(drift_max, columns),
+                                     starts, causal)
+        segment_sorted = segment_labels(steady_sorted, starts)
+        steady, segment = np.empty_like(steady_sorted), np.empty_like(segment_sorted)
+        steady[order], segment[order] = steady_sorted, segment_sorted
+        df_steady = data.assign(steady=steady, segment=segment)
+        stat_columns = [column for column in SEGMENT_COLUMNS if column in data.columns]
+        df_segments = _segment_frame(*_segment_moments(data, groups, segment, stat_columns))
+        print(f"Steady state: {int(steady.sum())} of {len(data)} rows in {len(df_segments)} segments")
+        if save:
+            output_path = write_result(df_segments, self.datapath + 'steady_segments.csv')
+            if output_path:
+                print(f"Steady segments are saved at: '{output_path}'")
+        return df_steady, df_segments
+
+    @profiled
+    def data_resistance_curve(self, df_segments:pd.DataFrame, save=True):
+        """
+        data_resistance_curve pools the steady segments (see data_steady or SteadyStateDetector.segments) per heat input Q[W]:
+        number of segments, samples, and the sample-weighted mean and pooled standard deviation of every segment property,
+        eg. the thermal resistance TR[K/W] vs heat input from steady data only.
+        The result is saved as 'steady_TR_Q.csv' in datapath (see writer.configure).
+
+        useage: df_curve = steady.data_resistance_curve(df_segments)
+        """
+        df_curve = resistance_curve(df_segments)
+        if save:
+            output_path = write_result(df_curve, self.datapath + 'steady_TR_Q.csv')
+            if output_path:
+                print(f"Steady thermal resistance vs heat input is saved at: '{output_path}'")
+        return df_curve
+
+## Steady State Detector
+class SteadyStateDetector(PulseHeatPipe):
+    """
+    ## SteadyStateDetector - incremental steady state detection on a stream of converted data chunks (eg. from LiveMonitor or iter_etl):
+    every update labels the new rows in O(chunk + window), keeping only the last 2 x window - 1 rows, and merges the steady rows
+    into running per-segment statistics (Welford). The rolling sums of a chunk start at its tail, so they round differently
+    from the whole stream (about 1e-11 or less); with the statistics rounded to TIE_DECIMALS before the threshold test, the labels equal
+    SteadyState.data_steady(..., causal=True) on the whole stream for any chunking, unless a statistic lies within that rounding
+    error of a midpoint of the 10**-TIE_DECIMALS grid.
+
+    ## useage:
+    ### importing module
+    from steady import SteadyStateDetector
+    ### creating the reference variable
+    detector = SteadyStateDetector("datapath", window=36)
+    ### labelling every new chunk of converted data (in time order)
+    df_labels = detector.update(df_conv_chunk)
+    ### current steady segments and thermal resistance vs heat input
+    df_segments = detector.segments()
+    df_curve = detector.data_resistance_curve()
+
+    ## list of avilable functions
+    1. update
+    2. segments
+    3. data_resistance_curve
+    """
+    def __init__(self, datapath:str, columns=STEADY_COLUMNS, window=36, std_max=STEADY_STD, drift_max=STEADY_DRIFT):
+        super().__init__(datapath)
+        assert window >= 2, "window needs at least 2 samples"
+        self.columns = columns
+        self.window = window
+        self.std_max = _thresholds(std_max, columns)
+        self.drift_max = _thresholds(drift_max, columns)
+        self.n_rows = 0
+        self._tail = np.empty((0, len(columns))) # last 2 x window - 1 rows
+        self._tail_starts = np.empty(0, dtype=bool)
+        self._key = None # (source, Q[W]) of the last row
+        self._steady = False # last row steady
+        self._segment = -1 # last segment number
+        self._info = None
+        self._count = None
+        self._mean = None
+        self._m2 = None
+
+    def update(self, data:pd.DataFrame, groups=None):
+        """
+        update labels a chunk of converted data (as df_conv of data_etl, rows following the previous chunk in time)
+        and merges its steady rows into the segment statistics.
+        groups: experiment label per row (Series aligned by index, or array); default: data['source'] if present, else one series
+        Returns a DataFrame (index of data) with the columns 'steady' and 'segment'.
+
+        useage: df_labels = detector.update(df_conv_chunk)
+        """
+        if len(data) == 0:
+            return pd.DataFrame({'steady': np.empty(0, dtype=bool), 'segment': np.empty(0, dtype=np.int64)}, index=data.index)
+        groups = self._groups(data, groups)
+        keys = [groups] + ([data['Q[W]'].to_numpy()] if 'Q[W]' in data.columns else [np.zeros(len(data))])
+        starts = level_starts(*keys, previous=self._key)
+        n_tail = len(self._tail)
+        tail_starts = self._tail_starts.copy()
+        if n_tail:
+            tail_starts[0] = True
+        values = np.concatenate([self._tail, data[self.columns].to_numpy(dtype=np.float64)])
+        all_starts = np.concatenate([tail_starts, starts])
+        steady = steady_state(values, self.window, self.std_max, self.drift_max, all_starts, causal=True)[n_tail:]
+        segment = segment_labels(steady, starts, self._segment, self._steady)
+        # state for the next chunk
+        keep = 2 * self.window - 1
+        self._tail = values[-keep:]
+        self._tail_starts = all_starts[-keep:]
+        self._key = tuple(key[-1] for key in keys)
+        self._steady = bool(steady[-1])
+        self._segment = max(self._segment, int(segment.max()))
+        self.n_rows += len(data)
+        if steady.any():
+            stat_columns = [column for column in SEGMENT_COLUMNS if column in data.columns]
+            self._merge(*_segment_moments(data, groups, segment, stat_columns))
+        return pd.DataFrame({'steady': steady, 'segment': segment}, index=data.index)
+
+    def segments(self):
+        """
+        segments returns the steady segments so far in the layout of SteadyState.data_steady:
+        source, Q[W], t_start(min), t_end(min), samples, mean and std of the segment properties.
+
+        useage: df_segments = detector.segments()
+        """
+        assert self._count is not None, "No steady data received yet"
+        return _segment_frame(self._info, self._count, self._mean, self._m2)
+
+    def data_resistance_curve(self):
+        """
+        data_resistance_curve returns the thermal resistance (and the other segment properties) vs heat input
+        from the steady segments so far (see SteadyState.data_resistance_curve).
+
+        useage: df_curve = detector.data_resistance_curve()
+        """
+        return resistance_curve(self.segments())
+
+    # merging segment statistics of a chunk (Chan et al. parallel update of Welford's algorithm)
+    def _merge(self, info:pd.DataFrame, count_b:pd.Series, mean_b:pd.DataFrame, m2_b:pd.DataFrame):
+        if self._count is None:
+            self._info, self._count, self._mean, self._m2 = info, count_b, mean_b, m2_b
+            return
+        segments = self._count.index.union(count_b.index)
+        count_a = self._count.reindex(segments, fill_value=0)
+        count_b = count_b.reindex(segments, fill_value=0)
+        mean_a = self._mean.reindex(segments, fill_value=0.0)
+        mean_b = mean_b.reindex(segments, fill_value=0.0)
+        count = count_a + count_b
+        delta = mean_b - mean_a
+        self._mean = mean_a + delta.mul(count_b / count, axis=0)
+        self._m2 = (self._m2.reindex(segments, fill_value=0.0) + m2_b.reindex(segments, fill_value=0.0)
+                    + (delta ** 2).mul(count_a * count_b / count, axis=0))
+        self._count = count
+        info_a = self._info.reindex(segments)
+        info_b = info.reindex(segments)
+        self._info = info_a.combine_first(info_b)
+        self._info['t_start(min)'] = np.fmin(info_a['t_start(min)'], info_b['t_start(min)'])
+        self._info['t_end(min)'] = np.fmax(info_a['t_end(min)'], info_b['t_end(min)'])
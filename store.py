@@ -0,0 +1,186 @@
+## Embedded experiment store (SQLite) for PHP data
+import contextlib
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from profiling import profiled
+
+# column of the samples table for every data column
+STORE_COLUMNS = {'t(min)': 't_min', 'Te[K]': 'te', 'Tc[K]': 'tc', 'dT[K]': 'dt', 'P[bar]': 'p', 'TR[K/W]': 'tr', 'Q[W]': 'q',
+                 'GFE[KJ/mol]': 'gfe', 'GFE_Tc[KJ/mol]': 'gfe_tc', 'dG[KJ/mol]': 'dg'}
+# data written by data_etl (converted), gibbs_fe (gfe) and MachineLearning.data_prep (prepared)
+STAGES = ['converted', 'gfe', 'prepared']
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS experiments (id INTEGER PRIMARY KEY, datapath TEXT NOT NULL, source TEXT NOT NULL, fluid TEXT, fr REAL,
+                                        UNIQUE (datapath, source));
+CREATE TABLE IF NOT EXISTS samples (experiment INTEGER NOT NULL REFERENCES experiments (id), stage TEXT NOT NULL,
+                                    {', '.join(f'{column} REAL' for column in STORE_COLUMNS.values())});
+CREATE INDEX IF NOT EXISTS idx_experiments_fluid ON experiments (fluid, fr);
+CREATE INDEX IF NOT EXISTS idx_experiments_fr ON experiments (fr);
+CREATE INDEX IF NOT EXISTS idx_samples_experiment ON samples (experiment, stage, te);
+CREATE INDEX IF NOT EXISTS idx_samples_q ON samples (stage, q, te);
+CREATE INDEX IF NOT EXISTS idx_samples_te ON samples (stage, te);
+"""
+
+def connect(store):
+    """
+    connect returns store if it is an ExperimentStore, else opens the store file at path store.
+
+    useage: store = connect("data/php_store.sqlite")
+    """
+    return store if isinstance(store, ExperimentStore) else ExperimentStore(store)
+
+@contextlib.contextmanager
+def opened(store):
+    """
+    opened is connect as a context manager: a store opened here from a path is closed at the end of the with block,
+    an ExperimentStore passed in stays open.
+
+    useage: with opened("data/php_store.sqlite") as experiment_store:
+                experiment_store.write(df_conv, 'converted', groups=df['source'])
+    """
+    experiment_store = connect(store)
+    try:
+        yield experiment_store
+    finally:
+        if experiment_store is not store:
+            experiment_store.close()
+
+def _condition(column:str, value):
+    # SQL condition and parameters for one value or a list of values
+    if isinstance(value, (list, tuple, set, np.ndarray, pd.Index, pd.Series)):
+        values = [item.item() if isinstance(item, np.generic) else item for item in value]
+        return f"{column} IN ({', '.join('?' * len(values))})", values
+    return f"{column} = ?", [value.item() if isinstance(value, np.generic) else value]
+
+## Experiment Store
+class ExperimentStore:
+    """
+    ## ExperimentStore - one local SQLite file holding the converted, Gibbs free energy and prepared (ML) data of all campaigns.
+    Rows are tagged with their experiment (campaign directory and source file) and stage; experiments carry the working fluid and fill ratio.
+    Indexes on fluid, fill ratio, heat input, experiment and Te let a query read only the slice it needs.
+    data_etl, gibbs_fe and MachineLearning.data_prep write into a store with store="path" (or an ExperimentStore).
+
+    ## useage:
+    ### importing module
+    from store import ExperimentStore
+    ### creating (or opening) the store
+    store = ExperimentStore("data/php_store.sqlite")
+    ### filling the store from the analysis stages
+    df, df_conv = analysis.data_etl(store=store)
+    df_gfe = analysis.gibbs_fe(df_conv, groups=df['source'], store=store)
+    df_prep = ml.data_prep("data/di_water_exp/40_FR/gfe_combined.csv", "DI_Water", 40, store=store, groups=df['source'])
+    ### slices as DataFrames
+    df_slice = store.query('gfe', fluid='DI_Water', fr=40, Te=(300, 350))
+    df_experiments = store.experiments()
+
+    ## list of avilable functions
+    1. write
+    2. query
+    3. experiments
+    4. close
+    """
+    def __init__(self, path='php_store.sqlite'):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # page cache of up to 64 MB: bulk writes update the Te/Q indexes mostly in memory
+        self.connection.execute("PRAGMA cache_size = -65536")
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """ close closes the store file """
+        self.connection.close()
+
+    @profiled
+    def write(self, data:pd.DataFrame, stage:str, groups=None, datapath='', fluid=None, fr=None):
+        """
+        write stores the rows of data (columns of STORE_COLUMNS; others are ignored) as stage of their experiments, replacing the rows
+        an earlier write stored for the same experiments and stage. An experiment is a source label (groups per row; default: data['source'],
+        else one experiment 'combined') in the campaign directory datapath. With fluid and fr all experiments of datapath are labelled.
+        Returns the number of rows written.
+
+        useage: store.write(df_conv, 'converted', groups=df['source'], datapath="data/di_water_exp/40_FR/")
+                store.write(df_prep, 'prepared', datapath="data/di_water_exp/40_FR/", fluid='DI_Water', fr=40)
+        """
+        assert stage in STAGES, f"Entered invalid stage [{stage}]; select from: {STAGES}"
+        if len(data) == 0:
+            return 0
+        if groups is None:
+            groups = data['source'] if 'source' in data.columns else np.full(len(data), 'combined', dtype=object)
+        labels, sources = pd.factorize(np.asarray(groups).astype(str))
+        datapath = os.path.abspath(datapath)
+        columns = {column: store_column for column, store_column in STORE_COLUMNS.items() if column in data.columns}
+        with self.connection:
+            cursor = self.connection.cursor()
+            cursor.executemany("INSERT OR IGNORE INTO experiments (datapath, source) VALUES (?, ?)", [(datapath, source) for source in sources])
+            if fluid is not None or fr is not None:
+                cursor.execute("UPDATE experiments SET fluid = COALESCE(?, fluid), fr = COALESCE(?, fr) WHERE datapath = ?",
+                               (fluid, None if fr is None else float(fr), datapath))
+            condition, params = _condition('source', list(sources))
+            ids = dict(cursor.execute(f"SELECT source, id FROM experiments WHERE datapath = ? AND {condition}", [datapath] + params).fetchall())
+            experiment_ids = np.array([ids[source] for source in sources], dtype=np.int64)
+            condition, params = _condition('experiment', experiment_ids.tolist())
+            cursor.execute(f"DELETE FROM samples WHERE stage = ? AND {condition}", [stage] + params)
+            # one executemany over plain Python values (NaN is stored as NULL)
+            rows = zip(experiment_ids[labels].tolist(), [stage] * len(data),
+                       *(data[column].to_numpy(dtype=np.float64).tolist() for column in columns))
+            cursor.executemany(f"INSERT INTO samples (experiment, stage, {', '.join(columns.values())}) "
+                               f"VALUES ({', '.join('?' * (len(columns) + 2))})", rows)
+        print(f"{len(data)} rows of {len(sources)} experiments stored as '{stage}' in: '{self.path}'")
+        return len(data)
+
+    @profiled
+    def query(self, stage='gfe', fluid=None, fr=None, q=None, experiment=None, datapath=None, Te=None, columns=None):
+        """
+        query returns the rows of stage that match all given filters as a DataFrame (source, Fluid, FR and the data columns, in stored order).
+        fluid, fr, q (heat input [W]), experiment (source file name, or experiment id) and datapath take one value or a list of values;
+        Te = (Tmin, Tmax) selects Tmin <= Te[K] <= Tmax. columns: data columns to return (default: all columns holding values).
+
+        useage: df_slice = store.query('gfe', fluid='DI_Water', fr=[40, 60], Te=(300, 350))
+                df_slice = store.query('converted', q=[40, 80], columns=['t(min)', 'Te[K]', 'TR[K/W]'])
+        """
+        assert stage in STAGES, f"Entered invalid stage [{stage}]; select from: {STAGES}"
+        conditions, params = ["s.stage = ?"], [stage]
+        filters = [('e.fluid', fluid), ('e.fr', fr), ('s.q', q)]
+        if experiment is not None:
+            experiments = experiment if isinstance(experiment, (list, tuple, set, np.ndarray, pd.Index, pd.Series)) else [experiment]
+            filters.append(('e.id' if all(isinstance(item, (int, np.integer)) for item in experiments) else 'e.source', experiment))
+        if datapath is not None:
+            filters.append(('e.datapath', [os.path.abspath(path) for path in np.atleast_1d(datapath)]))
+        for column, value in filters:
+            if value is not None:
+                condition, values = _condition(column, value)
+                conditions.append(condition)
+                params += values
+        if Te is not None:
+            conditions.append("s.te BETWEEN ? AND ?")
+            params += [float(Te[0]), float(Te[1])]
+        selected = {column: STORE_COLUMNS[column] for column in (columns or STORE_COLUMNS)}
+        fields = ', '.join(f's.{store_column} AS "{column}"' for column, store_column in selected.items())
+        sql = (f"SELECT e.source AS source, e.fluid AS Fluid, e.fr AS FR, {fields} "
+               f"FROM samples s JOIN experiments e ON e.id = s.experiment WHERE {' AND '.join(conditions)} ORDER BY s.rowid")
+        df = pd.read_sql_query(sql, self.connection, params=params)
+        if columns is None:
+            df = df.drop(columns=[column for column in selected if df[column].isna().all()])
+        return df
+
+    def experiments(self):
+        """
+        experiments returns all experiments (id, datapath, source, fluid, fr) with their number of rows per stage.
+
+        useage: df_experiments = store.experiments()
+        """
+        counts = ', '.join(f"SUM(s.stage = '{stage}') AS \"{stage}\"" for stage in STAGES)
+        sql = (f"SELECT e.id, e.datapath, e.source, e.fluid, e.fr, {counts} FROM experiments e "
+               f"LEFT JOIN samples s ON s.experiment = e.id GROUP BY e.id ORDER BY e.id")
+        df = pd.read_sql_query(sql, self.connection)
+        df[STAGES] = df[STAGES].fillna(0).astype('int64')
+        return df
@@ -0,0 +1,176 @@
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from analysis import binned_stats, pareto_front_idx
+
+def _frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    Te = 300 + rng.uniform(0, 60, n)
+    return pd.DataFrame({'t(min)': np.arange(n) * 0.5, 'Te[K]': Te, 'Tc[K]': Te - rng.uniform(5, 20, n),
+                         'P[bar]': rng.uniform(0.2, 1.5, n), 'TR[K/W]': rng.uniform(0.1, 0.5, n)})
+
+def test_binned_stats_empty_frame():
+    data = _frame().iloc[:0]
+    df_mean, df_std = binned_stats(data, bin_width=1.0)
+    assert len(df_mean) == 0 and len(df_std) == 0
+    assert list(df_mean.columns) == list(data.columns) + ['count']
+
+def _frame_with_nan(seed=0):
+    data = _frame(seed=seed)
+    # missing values in single columns, a row without a key value, and a column which is all NaN in some bins
+    data.loc[[3, 17, 40], 'Tc[K]'] = np.nan
+    data.loc[[5, 90], 'P[bar]'] = np.nan
+    data.loc[60, 'Te[K]'] = np.nan
+    data.loc[data['Te[K]'] < 310, 'TR[K/W]'] = np.nan
+    return data
+
+def test_binned_stats_matches_groupby():
+    for data in (_frame(), _frame_with_nan()):
+        df_mean, df_std = binned_stats(data, bin_width=5.0)
+        grouped = data.groupby(np.floor(data['Te[K]'] / 5.0))
+        np.testing.assert_allclose(df_mean[data.columns].to_numpy(), grouped.mean().to_numpy())
+        expected_std = grouped.std()[grouped.size() > 1]
+        np.testing.assert_allclose(df_std[data.columns.drop('Te[K]')].to_numpy(), expected_std[data.columns.drop('Te[K]')].to_numpy())
+        assert df_mean['count'].sum() == data['Te[K]'].notna().sum()
+
+def test_te_index_ranges_match_data_chop():
+    from analysis import TeIndex
+    data = _frame_with_nan()
+    windows = [(300, 320), (310, 340), (330, 331), (400, 410)]
+    df_mean, df_std = TeIndex(data).ranges(windows)
+    for i, (Tmin, Tmax) in enumerate(windows):
+        selected = data[(data['Te[K]'] >= Tmin) & (data['Te[K]'] <= Tmax)]
+        np.testing.assert_allclose(df_mean.loc[i, data.columns].to_numpy(dtype=np.float64), selected.mean().to_numpy())
+        np.testing.assert_allclose(df_std.loc[i, data.columns].to_numpy(dtype=np.float64), selected.std().to_numpy())
+        assert df_mean.loc[i, 'count'] == len(selected)
+
+def test_gibbs_fe_result_is_writable():
+    from analysis import PulseHeatPipe
+    analysis = PulseHeatPipe('')
+    data = _frame()
+    df_gfe = analysis.gibbs_fe(data, save=False)
+    df_gfe.loc[0, 'Te[K]'] = 999.0
+    df_gfe.iloc[0, 0] = 1.0
+    df_gfe.loc[1, 'dG[KJ/mol]'] = 0.0
+    assert df_gfe.loc[0, 'Te[K]'] == 999.0 and df_gfe.iloc[0, 0] == 1.0 and df_gfe.loc[1, 'dG[KJ/mol]'] == 0.0
+    # the input frame is not changed
+    assert data.loc[0, 'Te[K]'] != 999.0 and data.iloc[0, 0] == 0.0
+    # list input
+    df_list = analysis.gibbs_fe([data.iloc[:50], data.iloc[50:]], save=False)
+    df_list[1].loc[60, 'Te[K]'] = 999.0
+    assert df_list[1].loc[60, 'Te[K]'] == 999.0
+
+def test_pareto_front_idx_matches_brute_force():
+    rng = np.random.default_rng(2)
+    for n_obj in (2, 3, 4):
+        # integer values: ties and duplicate rows (only the first of equal rows is kept)
+        values = rng.integers(0, 6, (500, n_obj)).astype(np.float64)
+        expected = [i for i in range(len(values))
+                    if not any((values[j] <= values[i]).all() and ((values[j] < values[i]).any() or j < i)
+                               for j in range(len(values)) if j != i)]
+        idx = pareto_front_idx(values, block_size=64)
+        assert sorted(map(tuple, values[idx])) == sorted(map(tuple, values[expected]))
+        assert np.all(np.diff(values[idx, 0]) >= 0)
+
+def test_stream_etl_matches_data_etl(tmp_path):
+    pytest.importorskip('openpyxl')
+    import writer
+    from analysis import PulseHeatPipe
+    from benchmarks.synthetic import write_run
+    datapath = str(tmp_path) + '/'
+    for i in range(2):
+        write_run(datapath + f'php_exp{i + 1}.xlsx', 300, seed=i)
+    analysis = PulseHeatPipe(datapath)
+    df_gfe = analysis.gibbs_fe(analysis.data_etl(save=False)[1], save=False)
+    try:
+        writer.configure(persist=False)
+        assert analysis.stream_etl(chunksize=128) == len(df_gfe)
+        assert sorted(os.listdir(tmp_path)) == ['php_exp1.xlsx', 'php_exp2.xlsx']
+        for fmt in ['csv', 'parquet'] if importlib.util.find_spec('pyarrow') else ['csv']:
+            writer.configure(fmt=fmt)
+            assert analysis.stream_etl(chunksize=128) == len(df_gfe)
+            df_read = writer.read_result(datapath + 'gfe_combined' + writer.FORMATS[fmt])
+            pd.testing.assert_frame_equal(df_read, df_gfe, check_dtype=False)
+    finally:
+        writer.configure()
+
+def test_top_k_and_pareto_front_group_only_observed_categories():
+    import warnings
+    from analysis import PulseHeatPipe
+    analysis = PulseHeatPipe('')
+    data = _frame().assign(**{'dG[KJ/mol]': np.linspace(-1, 1, 200), 'dT[K]': np.linspace(5, 20, 200),
+                              'Fluid': pd.Categorical(['DI_Water', 'Ethanol'] * 100, categories=['DI_Water', 'Ethanol', 'Al2O3_DI_Water']),
+                              'FR': pd.Categorical([40] * 100 + [60] * 100, categories=[40, 50, 60])})
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        df_top = analysis.top_k(data, k=2, group_by=['Fluid', 'FR'])
+        df_front = analysis.pareto_front(data, objectives=['dG[KJ/mol]', 'TR[K/W]'], group_by=['Fluid', 'FR'])
+    assert len(df_top) == 8
+    assert set(zip(df_front['Fluid'], df_front['FR'])) == {('DI_Water', 40), ('DI_Water', 60), ('Ethanol', 40), ('Ethanol', 60)}
+
+def _bootstrap_loop(values, groups, n_boot, seed):
+    # reference: one replicate, experiment and row draw at a time, in the order of the random stream of _bootstrap_replicates
+    labels = np.unique(groups)
+    experiments = [values[groups == label] for label in labels]
+    rng = np.random.default_rng(np.random.SeedSequence(seed))
+    chosen = rng.integers(0, len(labels), size=(n_boot, len(labels)))
+    sums = np.zeros((n_boot, values.shape[1]))
+    for group, experiment in enumerate(experiments):
+        for replicate in range(n_boot):
+            for _ in range(int((chosen[replicate] == group).sum())):
+                sums[replicate] += experiment[rng.integers(0, len(experiment), size=len(experiment))].sum(axis=0)
+    return sums / np.array([sum(len(experiments[group]) for group in row) for row in chosen])[:, None]
+
+def test_bootstrap_means_matches_loop_reference():
+    from analysis import _bootstrap_replicates, bootstrap_means
+    data = _frame(n=120, seed=3)
+    values = data[['Tc[K]', 'P[bar]', 'TR[K/W]']].to_numpy()
+    groups = np.array(['exp2', 'exp1', 'exp3'])[np.arange(120) % 3]
+    groups[:20] = 'exp4' # experiments of different size
+    expected = _bootstrap_loop(values, groups, n_boot=50, seed=7)
+    np.testing.assert_allclose(bootstrap_means(values, groups=groups, n_boot=50, seed=7), expected)
+    # rows only: one experiment
+    np.testing.assert_allclose(bootstrap_means(values, n_boot=50, seed=7), _bootstrap_loop(values, np.zeros(120), n_boot=50, seed=7))
+    # batched row draws give the same replicates
+    order = np.argsort(pd.factorize(groups, sort=True)[0], kind='stable')
+    sizes = np.bincount(pd.factorize(groups, sort=True)[0])
+    replicates = _bootstrap_replicates(values[order], np.r_[0, np.cumsum(sizes)[:-1]], sizes, 50, np.random.SeedSequence(7), batch_elements=64)
+    np.testing.assert_allclose(replicates, expected)
+    # worker processes: independent streams, reproducible for a seed
+    parallel = bootstrap_means(values, groups=groups, n_boot=50, seed=7, n_workers=2)
+    np.testing.assert_array_equal(parallel, bootstrap_means(values, groups=groups, n_boot=50, seed=7, n_workers=2))
+
+def test_grouped_stats_matches_groupby():
+    from analysis import grouped_stats
+    rng = np.random.default_rng(5)
+    data = _frame(n=600, seed=5).assign(Fluid=rng.choice(['DI_Water', 'Al2O3_DI_Water', None], 600), FR=rng.choice([40.0, 60.0, np.nan], 600))
+    data.loc[rng.choice(600, 60, replace=False), 'Tc[K]'] = np.nan
+    # TR[K/W] is missing for all rows of one fluid
+    data.loc[data['Fluid'] == 'Al2O3_DI_Water', 'TR[K/W]'] = np.nan
+    properties = ['Tc[K]', 'P[bar]', 'TR[K/W]']
+    df_groups = grouped_stats(data, ['Fluid', 'FR', 'Te[K]'], properties=properties, bins={'Te[K]': 10.0})
+    expected = data.assign(**{'Te[K]': np.floor(data['Te[K]'] / 10.0) * 10.0}).groupby(['Fluid', 'FR', 'Te[K]'], dropna=False, sort=True)
+    df_expected = expected[properties].agg(['mean', 'std'])
+    assert len(df_groups) == len(df_expected) and (df_groups['count'] == expected.size().to_numpy()).all()
+    assert df_groups['Fluid'].isna().any() and df_groups['FR'].isna().any()
+    for column in properties:
+        np.testing.assert_allclose(df_groups[f'{column} mean'], df_expected[(column, 'mean')])
+        np.testing.assert_allclose(df_groups[f'{column} std'], df_expected[(column, 'std')])
+        for q in (0.25, 0.5, 0.75):
+            np.testing.assert_allclose(df_groups[f'{column} q{q * 100:g}'], expected[column].quantile(q))
+    assert df_groups.loc[df_groups['Fluid'] == 'Al2O3_DI_Water', 'TR[K/W] mean'].isna().all()
+
+def test_grouped_stats_many_key_levels():
+    from analysis import grouped_stats
+    rng = np.random.default_rng(6)
+    # 7 keys with about 700 levels each: the mixed radix group key outgrows int64 and is re-encoded
+    data = pd.DataFrame({f'k{i}': rng.integers(0, 1000, 1200) for i in range(7)}).assign(v=rng.normal(size=1200))
+    data = pd.concat([data, data.iloc[:100].assign(v=rng.normal(size=100))], ignore_index=True)
+    keys = [f'k{i}' for i in range(7)]
+    df_groups = grouped_stats(data, keys, properties=['v'])
+    expected = data.groupby(keys, sort=True)['v'].agg(['size', 'mean'])
+    np.testing.assert_array_equal(df_groups['count'], expected['size'])
+    np.testing.assert_allclose(df_groups['v mean'], expected['mean'])
+    np.testing.assert_array_equal(df_groups[keys].to_numpy(), expected.index.to_frame().to_numpy())
@@ -0,0 +1,37 @@
+import json
+import os
+import pandas as pd
+import pytest
+from analysis import logger_files
+from batch import discover_experiments, run_campaigns
+from benchmarks.synthetic import write_run
+
+def test_campaign_skips_sample_workbook(tmp_path, capsys):
+    pytest.importorskip('openpyxl')
+    datapath = os.path.join(str(tmp_path), 'di_heat_inputs', '')
+    write_run(datapath + 'di_40w.xlsx', 300, q_levels=[40], seed=1)
+    # placeholder workbook of the logger template: one row of 1s in the alternative column titles
+    pd.DataFrame({'t(min)': [1], 'Te[C]': [1], 'Tc[C]': [1], 'P[mmHg]': [1], 'Q[W]': [1]}).to_excel(datapath + 'Sample.xlsx')
+    (tmp_path / 'templates').mkdir()
+    pd.DataFrame({'t(min)': [1], 'Te[C]': [1], 'Tc[C]': [1], 'P[mmHg]': [1], 'Q[W]': [1]}).to_excel(tmp_path / 'templates' / 'sample.xlsx')
+    assert discover_experiments(str(tmp_path)) == [datapath]
+    assert "Skipped files matching ['sample*', 'template*']: ['Sample.xlsx']" in capsys.readouterr().out
+    summary = run_campaigns([datapath], output=str(tmp_path / 'php_summary.json'), n_workers=1, Tmin=250, Tmax=450)
+    result = summary['experiments'][0]
+    assert result['status'] == 'ok'
+    assert result['files'] == ['di_40w.xlsx']
+    assert result['rows'] == 300
+    df_conv = pd.read_csv(datapath + 'combined_converted_data.csv')
+    assert df_conv['Q[W]'].unique().tolist() == [40]
+    assert df_conv['Te[K]'].min() > 274.15
+    with open(tmp_path / 'php_summary.json') as f:
+        assert json.load(f)['experiments'][0]['files'] == ['di_40w.xlsx']
+
+def test_logger_files_keeps_sample_files_by_default(tmp_path, capsys):
+    for name in ['sample_40w.xlsx', 'php_exp1.xlsx', '~$php_exp1.xlsx']:
+        (tmp_path / name).touch()
+    datapath = str(tmp_path) + '/'
+    assert [os.path.basename(f) for f in logger_files(datapath)] == ['php_exp1.xlsx', 'sample_40w.xlsx']
+    assert capsys.readouterr().out == ''
+    assert [os.path.basename(f) for f in logger_files(datapath, exclude=['SAMPLE*'])] == ['php_exp1.xlsx']
+    assert 'sample_40w.xlsx' in capsys.readouterr().out
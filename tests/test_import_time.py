@@ -0,0 +1,8 @@
+import pytest
+from benchmarks.import_time import HEAVY_PACKAGES, MODULES, import_time
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_loads_no_heavy_packages(module):
+    # fresh interpreter per module; the loaded packages are deterministic, unlike the import time
+    elapsed, loaded = import_time(module, repeat=1)
+    assert loaded == [], f"importing {module} loads {loaded} (of {HEAVY_PACKAGES})"
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from ml_server import PredictionServer, predict_remote
+
+def _model():
+    pytest.importorskip('sklearn')
+    from ml_solution_module import model_pipeline
+    rng = np.random.default_rng(0)
+    n = 300
+    data = pd.DataFrame({'Te[K]': rng.uniform(300, 360, n), 'P[bar]': rng.uniform(0.1, 1.0, n),
+                         'Fluid': np.where(np.arange(n) % 2, 'DI_Water', 'Al2O3_DI_Water'), 'FR': np.where(np.arange(n) % 3, 40, 60)})
+    y = pd.DataFrame({'Tc[K]': data['Te[K]'] - 10 * data['P[bar]'], 'TR[K/W]': 0.3 + 0.001 * data['FR'], 'dG[KJ/mol]': -data['P[bar]']})
+    return model_pipeline(n_estimators=5).fit(data, y), data
+
+def test_concurrent_remote_predictions_match_model():
+    model, data = _model()
+    server = PredictionServer(model, max_wait=0.01).start()
+    try:
+        chunks = [data.iloc[start:start + 7] for start in range(0, 140, 7)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda df: predict_remote(server.url, df.to_dict(orient='records')), chunks))
+        for df, df_pred in zip(chunks, results):
+            np.testing.assert_allclose(df_pred[['Tc[K]', 'TR[K/W]', 'dG[KJ/mol]']].to_numpy(), model.predict(df))
+        stats = server.stats()
+        assert stats['requests'] == len(chunks) and stats['rows'] == 140 and stats['batches'] <= len(chunks)
+    finally:
+        server.stop()
+
+def test_predict_fails_instead_of_blocking():
+    class FailingModel:
+        def predict(self, data):
+            raise ValueError("model failed")
+    records = [{'Te[K]': 330.0, 'P[bar]': 0.4, 'Fluid': 'DI_Water', 'FR': 60}]
+    server = PredictionServer(FailingModel(), timeout=5)
+    with pytest.raises(RuntimeError):
+        server.predict(records)
+    server.start()
+    with pytest.raises(ValueError, match="model failed"):
+        server.predict(records)
+    server.stop()
+    with pytest.raises(RuntimeError):
+        server.predict(records)
+
+def test_batching_thread_failure_reaches_callers():
+    model, data = _model()
+    server = PredictionServer(model, timeout=5)
+    def crash(batch):
+        raise MemoryError("batch failed")
+    server._run_batch = crash
+    server.start()
+    records = data.iloc[:3].to_dict(orient='records')
+    with pytest.raises(MemoryError):
+        server.predict(records)
+    with pytest.raises(RuntimeError):
+        server.predict(records)
+    server.stop()
+
+def test_stop_without_start_returns():
+    import threading
+    server = PredictionServer(object())
+    thread = threading.Thread(target=server.stop, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    with pytest.raises(RuntimeError):
+        server.predict([{'Te[K]': 330.0, 'P[bar]': 0.4, 'Fluid': 'DI_Water', 'FR': 60}])
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ml_solution_module import MachineLearning, apply_schema
+
+def test_apply_schema_fill_ratio():
+    df = pd.DataFrame({'Te[K]': [300.0, 310.0], 'Fluid': ['DI_Water', 'Ethanol'], 'FR': ['40', '60.0']})
+    df = apply_schema(df)
+    assert df['FR'].dtype == np.int8
+    np.testing.assert_array_equal(df['FR'], [40, 60])
+    # fractional, missing or out of range fill ratios are not truncated by the cast
+    for fr in [['42.5', '60'], [40, np.nan], [40, 160]]:
+        with pytest.raises(AssertionError):
+            apply_schema(df.assign(FR=fr))
+
+def test_feature_ranking_with_missing_features(tmp_path):
+    pytest.importorskip('sklearn')
+    rng = np.random.default_rng(0)
+    n = 400
+    te = rng.uniform(300, 360, n)
+    q = rng.uniform(20, 100, n)
+    # legacy rows (first half) have no Q[W]; 'Extra' has no values at all
+    df = pd.DataFrame({'Te[K]': te, 'P[bar]': rng.uniform(0.1, 1.0, n), 'Q[W]': np.where(np.arange(n) < n // 2, np.nan, q),
+                       'Extra': np.nan, 'Fluid': np.where(np.arange(n) % 2, 'DI_Water', 'Ethanol'), 'FR': 40,
+                       'Tc[K]': te - 0.1 * q + rng.normal(0, 0.5, n), 'TR[K/W]': rng.uniform(0.2, 0.6, n)})
+    ml = MachineLearning(str(tmp_path) + '/')
+    df_mi = ml.feature_ranking(df, targets=['Tc[K]', 'TR[K/W]'], n_jobs=1, cache=False)
+    assert 'Extra' not in df_mi.index
+    assert {'Te[K]', 'P[bar]', 'Q[W]', 'Fluid', 'FR'} <= set(df_mi.index)
+    assert np.isfinite(df_mi.to_numpy()).all()
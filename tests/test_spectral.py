@@ -0,0 +1,12 @@
+import numpy as np
+from spectral import dominant_frequency, stack_windows
+
+def test_dominant_frequency_of_flat_windows_is_nan():
+    t = np.arange(256) * 0.5
+    values = np.column_stack([np.full(256, 330.15), 300.0 + 0.01 * t, 320.0 + 0.8 * np.sin(2 * np.pi * t / 4.0)])
+    stack = stack_windows(values, window=64)[0]
+    f_dom, amplitude = dominant_frequency(stack, dt=0.5)
+    # constant and (detrended) linear signals have no dominant frequency
+    assert np.isnan(f_dom[..., :2]).all() and np.isnan(amplitude[..., :2]).all()
+    np.testing.assert_allclose(f_dom[..., 2], 0.25)
+    np.testing.assert_allclose(amplitude[..., 2], 0.8, rtol=0.05)
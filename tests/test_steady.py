@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pytest
+import writer
+from steady import SteadyState, SteadyStateDetector, level_starts, rolling_mean_std
+
+DATAPATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'di_heat_inputs_6ofr', '')
+
+@pytest.fixture(scope='module')
+def batch_labels():
+    pytest.importorskip('openpyxl')
+    steady = SteadyState(DATAPATH)
+    try:
+        writer.configure(persist=False)
+        df, df_conv = steady.data_etl()
+        df_conv = df_conv.assign(source=df['source'].to_numpy())
+        # window=12: the Te drift of this campaign is exactly on the threshold (1.0 K) at some rows
+        df_steady = steady.data_steady(df_conv, window=12, causal=True)[0]
+    finally:
+        writer.configure()
+    return df_conv, df_steady
+
+@pytest.mark.parametrize('n_chunks', [1, 2, 7, 23, 200])
+def test_detector_matches_batch_labels_for_any_chunking(batch_labels, n_chunks):
+    df_conv, df_steady = batch_labels
+    detector = SteadyStateDetector(DATAPATH, window=12)
+    df_labels = [detector.update(df_conv.iloc[idx]) for idx in np.array_split(np.arange(len(df_conv)), n_chunks)]
+    np.testing.assert_array_equal(np.concatenate([df['steady'].to_numpy() for df in df_labels]), df_steady['steady'].to_numpy())
+    np.testing.assert_array_equal(np.concatenate([df['segment'].to_numpy() for df in df_labels]), df_steady['segment'].to_numpy())
+
+def test_rolling_mean_std_matches_direct_windows():
+    rng = np.random.default_rng(0)
+    n, window = 5000, 36
+    values = 300 + np.cumsum(rng.normal(0, 0.05, (n, 2)), axis=0)
+    values[1234, 1] = np.nan
+    starts = level_starts(np.repeat([40, 60, 80], [2000, 2500, 500]))
+    mean, std = rolling_mean_std(values, window, starts)
+    level_first = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+    for i in range(n):
+        segment = values[i - window + 1:i + 1]
+        if i - window + 1 < level_first[i]:
+            assert np.isnan(mean[i]).all() and np.isnan(std[i]).all()
+            continue
+        np.testing.assert_allclose(mean[i], segment.mean(axis=0), rtol=0, atol=1e-11)
+        np.testing.assert_allclose(std[i], segment.std(axis=0, ddof=1), rtol=0, atol=1e-11)
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from analysis import PulseHeatPipe
+from ml_solution_module import MachineLearning
+from store import STAGES, ExperimentStore
+from benchmarks.synthetic import write_run
+
+def test_stages_share_experiment_ids(tmp_path):
+    pytest.importorskip('openpyxl')
+    datapath = str(tmp_path / 'di_water_exp' / '40_FR') + '/'
+    for i, seed in enumerate([1, 2]):
+        write_run(datapath + f'php_exp{i + 1}.xlsx', 200, fluid='DI_Water', fr=40, seed=seed)
+    analysis = PulseHeatPipe(datapath)
+    ml = MachineLearning(str(tmp_path) + '/')
+    with ExperimentStore(str(tmp_path / 'php_store.sqlite')) as store:
+        df, df_conv = analysis.data_etl(store=store)
+        with pytest.raises(AssertionError):
+            analysis.gibbs_fe(df_conv, save=False, store=store)
+        analysis.gibbs_fe(df_conv, groups=df['source'], store=store)
+        ml.data_prep(datapath + 'gfe_combined.csv', 'DI_Water', 40, store=store, groups=df['source'])
+        df_experiments = store.experiments()
+        assert len(df_experiments) == 2
+        assert (df_experiments[STAGES] == df['source'].value_counts().sort_index().to_numpy()[:, None]).all().all()
+        assert (df_experiments['fluid'] == 'DI_Water').all()
+        for stage in STAGES:
+            df_stage = store.query(stage)
+            pd.testing.assert_series_equal(df_stage['source'], df['source'].reset_index(drop=True), check_names=False)
+
+def test_store_opened_from_path_is_closed(tmp_path, monkeypatch):
+    pytest.importorskip('openpyxl')
+    import store
+    datapath = str(tmp_path / 'di_water_exp' / '40_FR') + '/'
+    write_run(datapath + 'php_exp1.xlsx', 100, fluid='DI_Water', fr=40, seed=1)
+    opened_stores = []
+    monkeypatch.setattr(store.ExperimentStore, 'close', lambda self: opened_stores.remove(self) or self.connection.close())
+    init = store.ExperimentStore.__init__
+    monkeypatch.setattr(store.ExperimentStore, '__init__', lambda self, *args, **kwargs: init(self, *args, **kwargs) or opened_stores.append(self))
+    store_path = str(tmp_path / 'php_store.sqlite')
+    analysis = PulseHeatPipe(datapath)
+    df, df_conv = analysis.data_etl(store=store_path)
+    analysis.gibbs_fe(df_conv, groups=df['source'], store=store_path)
+    MachineLearning(str(tmp_path) + '/').data_prep(datapath + 'gfe_combined.csv', 'DI_Water', 40, store=store_path, groups=df['source'])
+    assert opened_stores == []
+    # a store passed in stays open
+    with ExperimentStore(store_path) as experiment_store:
+        analysis.gibbs_fe(df_conv, groups=df['source'], store=experiment_store, save=False)
+        assert opened_stores == [experiment_store]
+        assert len(experiment_store.experiments()) == 1
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from writer import ResultWriter, read_result
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'feather'])
+@pytest.mark.parametrize('index', [True, False])
+def test_read_result_restores_index(tmp_path, fmt, index):
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'Te[K]': [300.0, 310.0, 320.0], 'TR[K/W]': [0.5, 0.4, 0.3]}, index=[4, 9, 13])
+    output_path = ResultWriter(fmt=fmt, index=index).write(df, str(tmp_path / 'result.csv'))
+    df_read = read_result(output_path)
+    np.testing.assert_array_equal(df_read.index, df.index if index else np.arange(len(df)))
+    pd.testing.assert_frame_equal(df_read.reset_index(drop=True), df.reset_index(drop=True), check_dtype=False)
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'feather'])
+def test_stream_matches_single_write(tmp_path, fmt):
+    if fmt != 'csv':
+        pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'Te[K]': np.linspace(300, 350, 10), 'TR[K/W]': np.linspace(0.5, 0.3, 10)})
+    with ResultWriter(fmt=fmt).stream(str(tmp_path / 'result.csv')) as sink:
+        for start in range(0, len(df), 4):
+            sink.write(df.iloc[start:start + 4])
+    pd.testing.assert_frame_equal(read_result(sink.output_path), df)
+    assert ResultWriter(fmt=fmt, persist=False).stream(str(tmp_path / 'result.csv')) is None
+
+def test_background_write_is_isolated_from_later_changes(tmp_path):
+    df = pd.DataFrame({'Te[K]': np.linspace(300, 350, 1000), 'TR[K/W]': np.linspace(0.5, 0.3, 1000)})
+    expected = df.copy()
+    result_writer = ResultWriter(background=True)
+    output_path = result_writer.write(df, str(tmp_path / 'result.csv'))
+    df.iloc[:, 0] = -1.0
+    result_writer.flush()
+    pd.testing.assert_frame_equal(read_result(output_path), expected)
@@ -0,0 +1,228 @@
+## Result writer for PHP data
+import atexit
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from profiling import profiled
+
+# supported formats and their file extensions
+FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather', 'npz': '.npz'}
+
+class ResultWriter:
+    """
+    ## ResultWriter saves result DataFrames in a selectable format (csv, parquet, feather, npz),
+    optionally on a background thread (write-behind) so the calculation does not wait for the disk.
+    With persist=False nothing is written at all (eg. for interactive use).
+    With index=True the DataFrame index is saved in csv, parquet and feather files (not in npz) and restored by read_result.
+
+    All PulseHeatPipe and MachineLearning methods write their results through the global writer (see configure).
+
+    ## useage:
+    ### importing module
+    import writer
+    ### parquet files written in the background
+    writer.configure(fmt='parquet', background=True)
+    ### no files at all
+    writer.configure(persist=False)
+    ### waiting for pending background writes
+    writer.flush()
+    ### reading a result back in any format
+    df = writer.read_result("datapath/gfe_combined.parquet")
+    """
+    def __init__(self, fmt='csv', background=False, persist=True, index=True):
+        assert fmt in FORMATS, f"Entered invalid format [{fmt}]; select from: {list(FORMATS)}"
+        self.fmt = fmt
+        self.background = background
+        self.persist = persist
+        self.index = index
+        self._queue = None
+        self._thread = None
+        self._errors = []
+
+    def path(self, path:str, fmt=None):
+        """ path with the file extension of the selected format (or of fmt) """
+        return os.path.splitext(path)[0] + FORMATS[fmt or self.fmt]
+
+    def write(self, df:pd.DataFrame, path:str, fmt=None):
+        """
+        write saves df at path (extension replaced by the selected format, or by fmt for this write only) and returns the output path,
+        or None if persistence is disabled. In background mode the write is queued and write returns immediately.
+        """
+        if not self.persist:
+            return None
+        assert fmt is None or fmt in FORMATS, f"Entered invalid format [{fmt}]; select from: {list(FORMATS)}"
+        output_path = self.path(path, fmt)
+        if self.background:
+            if self._thread is None:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._worker, name='ResultWriter', daemon=True)
+                self._thread.start()
+            # deep copy: in-place changes of df by the caller can not race with the writer thread (any pandas version)
+            self._queue.put((df.copy(), output_path))
+        else:
+            self._write(df, output_path)
+        return output_path
+
+    def stream(self, path:str, fmt=None):
+        """
+        stream opens path (extension replaced by the selected format, or by fmt) for writing a result in chunks, see ResultStream.
+        Returns None if persistence is disabled. Chunks are written synchronously, also in background mode, so memory stays bounded.
+
+        useage: with writer.stream("datapath/gfe_combined.csv") as sink:
+                    for df_chunk in chunks:
+                        sink.write(df_chunk)
+        """
+        if not self.persist:
+            return None
+        assert fmt is None or fmt in FORMATS, f"Entered invalid format [{fmt}]; select from: {list(FORMATS)}"
+        return ResultStream(self.path(path, fmt), index=self.index)
+
+    def flush(self):
+        """ flush waits until all queued background writes are done and raises the first failed write """
+        if self._queue is not None:
+            self._queue.join()
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise errors[0]
+
+    def _worker(self):
+        while True:
+            df, output_path = self._queue.get()
+            try:
+                self._write(df, output_path)
+            except Exception as e:
+                self._errors.append(e)
+            finally:
+                self._queue.task_done()
+
+    @profiled
+    def _write(self, df:pd.DataFrame, output_path:str):
+        ext = os.path.splitext(output_path)[1]
+        if ext == '.csv':
+            df.to_csv(output_path, index=self.index)
+        elif ext == '.parquet':
+            df.to_parquet(output_path, index=self.index)
+        elif ext == '.feather':
+            if self.index:
+                # the index is stored as column(s) with the pandas metadata, so read_result restores it
+                import pyarrow as pa
+                from pyarrow import feather
+                feather.write_feather(pa.Table.from_pandas(df, preserve_index=True), output_path)
+            else:
+                df.reset_index(drop=True).to_feather(output_path)
+        elif ext == '.npz':
+            columns = {f'col_{i}': _npz_array(df[column]) for i, column in enumerate(df.columns)}
+            np.savez(output_path, __columns__=np.array(df.columns, dtype=str), **columns)
+
+class ResultStream:
+    """
+    ## ResultStream appends DataFrame chunks with equal columns to one result file (csv, parquet or feather), eg. for stream_etl.
+    Parquet and feather chunks are cast to the schema of the first chunk. npz files can not be appended to.
+    Opened with ResultWriter.stream; close (or the with block) finishes the file.
+
+    ## useage:
+    with get_writer().stream("datapath/gfe_combined.csv") as sink:
+        sink.write(df_chunk)
+    """
+    def __init__(self, output_path:str, index=True):
+        self.output_path = output_path
+        self.ext = os.path.splitext(output_path)[1]
+        assert self.ext != '.npz', "npz results can not be written in chunks; select csv, parquet or feather"
+        self.index = index
+        self.n_rows = 0
+        self._schema = None
+        self._sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @profiled
+    def write(self, df:pd.DataFrame):
+        """ write appends df to the result file """
+        if self.ext == '.csv':
+            df.to_csv(self.output_path, mode='w' if self._schema is None else 'a', header=(self._schema is None), index=self.index)
+            self._schema = df.columns
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df if self.index else df.reset_index(drop=True), schema=self._schema, preserve_index=self.index)
+            if self._sink is None:
+                self._schema = table.schema
+                if self.ext == '.parquet':
+                    from pyarrow import parquet
+                    self._sink = parquet.ParquetWriter(self.output_path, self._schema)
+                else:
+                    self._sink = pa.ipc.new_file(self.output_path, self._schema)
+            self._sink.write_table(table)
+        self.n_rows += len(df)
+
+    def close(self):
+        """ close finishes the result file """
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+def _npz_array(column:pd.Series):
+    values = column.to_numpy()
+    return values.astype(str) if values.dtype == object or not np.issubdtype(values.dtype, np.number) else values
+
+@profiled
+def read_result(path:str):
+    """
+    read_result loads a result file written by ResultWriter (csv, parquet, feather or npz) as a DataFrame.
+    The index of files written with index is restored (for csv files: the 'Unnamed: 0' column); npz files never store the index.
+
+    useage: df = read_result("datapath/gfe_combined.csv")
+    """
+    ext = os.path.splitext(path)[1]
+    if ext == '.csv':
+        df = pd.read_csv(path)
+        if len(df.columns) and str(df.columns[0]).startswith('Unnamed: 0'):
+            df = df.set_index(df.columns[0]).rename_axis(None)
+        return df
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    if ext == '.feather':
+        return pd.read_feather(path)
+    if ext == '.npz':
+        with np.load(path) as npz:
+            columns = npz['__columns__']
+            return pd.DataFrame({column: npz[f'col_{i}'] for i, column in enumerate(columns)})
+    raise ValueError(f"Unknown result format [{ext}]; select from: {list(FORMATS.values())}")
+
+# global writer used by all analysis methods
+_writer = ResultWriter()
+
+def get_writer():
+    """ get_writer returns the global ResultWriter """
+    return _writer
+
+def configure(**kwargs):
+    """
+    configure replaces the global ResultWriter (pending background writes are flushed first).
+
+    useage: writer.configure(fmt='parquet', background=True, persist=True, index=True)
+    """
+    global _writer
+    _writer.flush()
+    _writer = ResultWriter(**kwargs)
+    return _writer
+
+def write_result(df:pd.DataFrame, path:str, fmt=None):
+    """
+    write_result saves df at path with the global ResultWriter and returns the output path (None if persistence is disabled).
+    fmt overrides the format of the global writer for this write.
+
+    useage: output_path = write_result(df, "datapath/combined_data.csv")
+    """
+    return _writer.write(df, path, fmt=fmt)
+
+def flush():
+    """ flush waits for all pending background writes of the global ResultWriter """
+    _writer.flush()
+
+atexit.register(lambda: _writer.flush())